@@ -0,0 +1,210 @@
+"""Tempo and musical key estimation.
+
+Only an excerpt from the middle of each track is analyzed, decoded to mono at
+a low sample rate: enough for beat tracking and a chromagram, at a fraction
+of the cost of the full track. The tempo comes from librosa's beat tracker;
+the key is the Krumhansl-Kessler profile (one of 24, a major and a minor per
+pitch class) best correlated with the excerpt's average chroma.
+
+Tracks are handed to worker processes in chunks, and the key profiles of a
+chunk are matched in a single matrix product.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable
+
+import librosa
+import numpy as np
+
+from audiopyle import audio, cache, decoding
+
+PITCH_CLASSES: list[str] = [
+    "C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"
+]  # fmt: skip
+
+# Krumhansl-Kessler key profiles, starting at the tonic
+MAJOR_PROFILE = np.array(
+    [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+)
+MINOR_PROFILE = np.array(
+    [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+)
+
+# Key names in the order of ``KEY_PROFILES``, minor keys in Rekordbox notation (e.g "Am")
+KEYS: list[str] = PITCH_CLASSES + [f"{pitch}m" for pitch in PITCH_CLASSES]
+
+
+def _key_profiles() -> np.ndarray:
+    """The 24 key profiles, each rotated to its tonic and standardized."""
+    profiles = np.array(
+        [np.roll(MAJOR_PROFILE, tonic) for tonic in range(12)]
+        + [np.roll(MINOR_PROFILE, tonic) for tonic in range(12)]
+    )
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    return profiles / profiles.std(axis=1, keepdims=True)
+
+
+KEY_PROFILES: np.ndarray = _key_profiles()
+
+
+@dataclass(frozen=True)
+class AnalysisConfig:
+    """Parameters of the tempo and key estimation.
+
+    Args:
+        sample_rate (int): Rate excerpts are resampled to before analysis.
+        excerpt_seconds (float): Length of the excerpt taken from the middle of a track.
+        hop_length (int): Number of samples between frames.
+        n_fft (int): FFT window size of the chromagram.
+    """
+
+    sample_rate: int = 11025
+    excerpt_seconds: float = 60.0
+    hop_length: int = 256
+    n_fft: int = 4096
+
+
+def load_excerpt(filepath: str | Path, config: AnalysisConfig) -> np.ndarray:
+    """Decodes the middle ``config.excerpt_seconds`` of a track to mono."""
+    windows = decoding.select_windows(
+        decoding.get_duration(filepath), config.excerpt_seconds, n_windows=1
+    )
+    offset, duration = (
+        (windows[0].offset, windows[0].duration) if windows else (0, None)
+    )
+    chunks = list(decoding.decode(filepath, config.sample_rate, offset, duration))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+def estimate_tempo(signal: np.ndarray, config: AnalysisConfig) -> float | None:
+    """Estimates the tempo of a mono signal in beats per minute, None if no beats are found."""
+    onset_envelope = librosa.onset.onset_strength(
+        y=signal, sr=config.sample_rate, hop_length=config.hop_length
+    )
+    tempo, beats = librosa.beat.beat_track(
+        onset_envelope=onset_envelope,
+        sr=config.sample_rate,
+        hop_length=config.hop_length,
+    )
+    if len(beats) < 2:
+        return None
+    return round(float(np.atleast_1d(tempo)[0]), 2)
+
+
+def chroma_profile(signal: np.ndarray, config: AnalysisConfig) -> np.ndarray:
+    """Averages the chromagram of a mono signal into one energy per pitch class."""
+    chroma = librosa.feature.chroma_stft(
+        y=signal,
+        sr=config.sample_rate,
+        n_fft=config.n_fft,
+        hop_length=config.hop_length,
+    )
+    return chroma.mean(axis=1)
+
+
+def estimate_keys(profiles: np.ndarray) -> list[str | None]:
+    """Matches chroma profiles, one per row, against every key at once.
+
+    Returns:
+        list[str | None]: The best correlated key of each profile, None for
+            profiles without any pitch content.
+    """
+    profiles = np.atleast_2d(profiles)
+    std = profiles.std(axis=1, keepdims=True)
+    standardized = (profiles - profiles.mean(axis=1, keepdims=True)) / np.where(
+        std > 0, std, 1
+    )
+    best = np.argmax(standardized @ KEY_PROFILES.T, axis=1)
+    return [KEYS[i] if s > 0 else None for i, s in zip(best, std[:, 0])]
+
+
+def _analyze_chunk(
+    filepaths: list[str], config: AnalysisConfig
+) -> list[tuple[float | None, str | None]]:
+    """Estimates tempo and key for a chunk of tracks, (None, None) for tracks that fail to decode."""
+    tempos = []
+    profiles = np.zeros((len(filepaths), 12))
+    decoded = np.zeros(len(filepaths), dtype=bool)
+    for i, filepath in enumerate(filepaths):
+        try:
+            signal = load_excerpt(filepath, config)
+        except decoding.DECODE_ERRORS:
+            tempos.append(None)
+            continue
+        if len(signal) < config.n_fft:
+            tempos.append(None)
+            continue
+        tempos.append(estimate_tempo(signal, config))
+        profiles[i] = chroma_profile(signal, config)
+        decoded[i] = True
+
+    keys = estimate_keys(profiles)
+    return [
+        (tempo, key if ok else None) for tempo, key, ok in zip(tempos, keys, decoded)
+    ]
+
+
+def analyze_library(
+    tracks: Iterable[audio.Audio],
+    config: AnalysisConfig = AnalysisConfig(),
+    workers: int = 4,
+    chunk_size: int = 16,
+    analysis_cache: cache.AnalysisCache | None = None,
+) -> list[audio.Audio]:
+    """Estimates the tempo and key of many tracks across a process pool.
+
+    Args:
+        tracks (Iterable[audio.Audio]): Tracks to analyze.
+        config (AnalysisConfig): Analysis parameters.
+        workers (int): Number of processes, analyzes serially when 1.
+        chunk_size (int): Number of tracks handed to a process at a time.
+        analysis_cache (cache.AnalysisCache, Optional): Cache of results from previous
+            runs, tracks found in it aren't analyzed again.
+
+    Returns:
+        list[audio.Audio]: Copies of the tracks with ``bpm`` and ``key`` filled in,
+            in input order.
+    """
+    tracks = list(tracks)
+    results: dict[int, tuple[float | None, str | None]] = {}
+    stats = {}
+    to_analyze = []
+    for i, track in enumerate(tracks):
+        if analysis_cache is not None:
+            try:
+                stats[i] = os.stat(track._filepath)
+            except OSError:
+                results[i] = (None, None)
+                continue
+            cached = analysis_cache.get(track._filepath, stats[i])
+            if cached is not None:
+                results[i] = cached
+                continue
+        to_analyze.append(i)
+
+    chunks = [
+        [tracks[i]._filepath for i in to_analyze[start : start + chunk_size]]
+        for start in range(0, len(to_analyze), chunk_size)
+    ]
+    if workers <= 1:
+        analyzed = map(_analyze_chunk, chunks, repeat(config))
+        estimates = [estimate for chunk in analyzed for estimate in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            analyzed = pool.map(_analyze_chunk, chunks, repeat(config))
+            estimates = [estimate for chunk in analyzed for estimate in chunk]
+    results.update(zip(to_analyze, estimates))
+
+    if analysis_cache is not None:
+        analysis_cache.put_many(
+            (tracks[i]._filepath, stats[i], *results[i]) for i in to_analyze
+        )
+
+    return [
+        replace(track, bpm=results[i][0], key=results[i][1])
+        for i, track in enumerate(tracks)
+    ]
@@ -0,0 +1,281 @@
+"""Album artwork extraction and a deduplicated artwork store.
+
+Every track of an album usually embeds the same cover, so artwork is stored
+once per distinct image: files are named by the SHA-256 digest of their
+contents, and a SQLite index beside them maps each album, identified by its
+album artist and title, to its image. Only
+one track of an album is read to find its cover, from its attached pictures
+(``id3.read_pictures``) or failing that an image file next to it, i.e
+``cover.jpg``.
+
+Thumbnails are generated on first request, kept on disk beside the images and
+in an in-memory LRU cache. Generating them needs Pillow, which is optional and
+imported on first use.
+"""
+
+import hashlib
+import io
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from audiopyle import audio, cache, core, id3
+from audiopyle.exceptions import MetadataError
+
+IMAGE_EXTENSIONS: dict[str, str] = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+MIME_EXTENSIONS: dict[str, str] = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+# Names of sidecar images preferred as an album's cover, in order
+SIDECAR_NAMES: tuple[str, ...] = ("cover", "folder", "front", "album")
+
+THUMBNAIL_SIZE: int = 256
+THUMBNAIL_CACHE_SIZE: int = 256
+
+# An album's artist and title, albums of different artists often share a title
+AlbumKey = tuple[str, str]
+
+
+@dataclass
+class Artwork:
+    """An image found for a track.
+
+    Args:
+        data (bytes): The image file.
+        mime (str): MIME type of the image, i.e ``"image/jpeg"``.
+        source (str): Path of the track it was embedded in, or of the sidecar image.
+    """
+
+    data: bytes
+    mime: str
+    source: str
+
+
+def find_sidecar(directory: str | Path) -> Path | None:
+    """Finds the image in a directory most likely to be its album's cover.
+
+    Images named like ``SIDECAR_NAMES`` are preferred, otherwise the first image
+    by name is taken.
+    """
+    try:
+        with os.scandir(directory) as it:
+            images = sorted(
+                entry.name
+                for entry in it
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
+    except FileNotFoundError:
+        return None
+    if not images:
+        return None
+    ranks = {name: rank for rank, name in enumerate(SIDECAR_NAMES)}
+    best = min(
+        images,
+        key=lambda name: ranks.get(os.path.splitext(name)[0].lower(), len(ranks)),
+    )
+    return Path(directory, best)
+
+
+def album_key(track: audio.Audio) -> AlbumKey:
+    """The album a track belongs to, ``(album_artist, album)``."""
+    return str(track.album_artist), str(track.album)
+
+
+def extract_artwork(filepath: str | Path) -> Artwork | None:
+    """Finds a track's artwork: its front cover, any attached picture, or a sidecar image.
+
+    Returns:
+        Artwork | None: The artwork, None if the track has none.
+    """
+    try:
+        pictures = id3.read_pictures(filepath)
+    except (MetadataError, OSError):
+        pictures = []
+    pictures = [picture for picture in pictures if picture.data]
+    if pictures:
+        picture = next(
+            (p for p in pictures if p.picture_type == id3.FRONT_COVER), pictures[0]
+        )
+        return Artwork(picture.data, picture.mime, str(filepath))
+
+    sidecar = find_sidecar(Path(filepath).parent)
+    if sidecar is None:
+        return None
+    mime = IMAGE_EXTENSIONS[sidecar.suffix.lower()]
+    return Artwork(sidecar.read_bytes(), mime, str(sidecar))
+
+
+class ArtworkStore(cache.SQLiteTable):
+    """Images stored once by content, with the image of each album.
+
+    Args:
+        directory (str | Path): Directory holding the images and their index,
+            created if it doesn't exist.
+        thumbnail_cache_size (int): Number of thumbnails kept in memory.
+    """
+
+    table = "albums"
+    schema = """
+        album_artist TEXT NOT NULL,
+        album TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        mime TEXT NOT NULL,
+        source TEXT NOT NULL,
+        PRIMARY KEY (album_artist, album)
+    """
+
+    def __init__(
+        self, directory: str | Path, thumbnail_cache_size: int = THUMBNAIL_CACHE_SIZE
+    ):
+        self.directory = Path(directory)
+        self.images_directory = self.directory / "images"
+        self.thumbnails_directory = self.directory / "thumbnails"
+        self.images_directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(self.directory / "index.sqlite")
+        self._thumbnails = lru_cache(maxsize=thumbnail_cache_size)(self._thumbnail)
+
+    def __contains__(self, album: AlbumKey) -> bool:
+        query = "SELECT 1 FROM albums WHERE album_artist = ? AND album = ?"
+        return self._connection.execute(query, album).fetchone() is not None
+
+    def _image_path(self, digest: str, mime: str) -> Path:
+        extension = MIME_EXTENSIONS.get(mime, ".img")
+        return self.images_directory / digest[:2] / f"{digest}{extension}"
+
+    def put(self, data: bytes, mime: str) -> str:
+        """Stores an image unless an identical one is already stored.
+
+        Returns:
+            str: The image's digest.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._image_path(digest, mime)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            staging = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            staging.write_bytes(data)
+            os.replace(staging, path)
+        return digest
+
+    def assign(self, album: AlbumKey, artwork: Artwork) -> str:
+        """Stores an image as an album's artwork, replacing any it had.
+
+        Args:
+            album (AlbumKey): The album's ``(album_artist, album)``.
+            artwork (Artwork): Its image.
+
+        Returns:
+            str: The image's digest.
+        """
+        digest = self.put(artwork.data, artwork.mime)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO albums VALUES (?, ?, ?, ?, ?)",
+                (*album, digest, artwork.mime, artwork.source),
+            )
+        return digest
+
+    def albums(self) -> dict[AlbumKey, str]:
+        """Maps every album with artwork, ``(album_artist, album)``, to its image's digest."""
+        rows = self._connection.execute(
+            "SELECT album_artist, album, digest FROM albums"
+        )
+        return {(album_artist, album): digest for album_artist, album, digest in rows}
+
+    def get(self, album: AlbumKey) -> Path | None:
+        """Returns the path of an album's image, None if it has none."""
+        row = self._connection.execute(
+            "SELECT digest, mime FROM albums WHERE album_artist = ? AND album = ?",
+            album,
+        ).fetchone()
+        return self._image_path(*row) if row is not None else None
+
+    def add_tracks(self, tracks: Iterable[core.File], workers: int = 8) -> int:
+        """Finds artwork for the albums of tracks that don't have any yet.
+
+        Tracks of an album, see ``album_key``, are tried in turn until one has
+        artwork, so usually a single track is read per album. Tracks without an
+        album are skipped.
+
+        Args:
+            tracks (Iterable[core.File]): Tracks to find artwork in, files that
+                aren't ``audio.Audio`` are skipped.
+            workers (int): Number of threads reading tracks.
+
+        Returns:
+            int: Number of albums artwork was found for.
+        """
+        albums: dict[AlbumKey, list[str]] = defaultdict(list)
+        for track in tracks:
+            if isinstance(track, audio.Audio) and track.album:
+                albums[album_key(track)].append(str(track._filepath))
+        missing = [album for album in albums if album not in self]
+
+        def _find(album: AlbumKey) -> Artwork | None:
+            for filepath in albums[album]:
+                artwork = extract_artwork(filepath)
+                if artwork is not None:
+                    return artwork
+            return None
+
+        found = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for album, artwork in zip(missing, pool.map(_find, missing)):
+                if artwork is not None:
+                    self.assign(album, artwork)
+                    found += 1
+        return found
+
+    def thumbnail(self, album: AlbumKey, size: int = THUMBNAIL_SIZE) -> bytes | None:
+        """Returns a JPEG thumbnail of an album's image, generating it on first request.
+
+        Args:
+            album (AlbumKey): ``(album_artist, album)`` of the album whose image to scale.
+            size (int): Maximum width and height of the thumbnail.
+
+        Returns:
+            bytes | None: The thumbnail, None if the album has no artwork.
+
+        Raises:
+            ImportError: If the thumbnail has to be generated and Pillow isn't installed.
+        """
+        path = self.get(album)
+        if path is None:
+            return None
+        return self._thumbnails(path, size)
+
+    def _thumbnail(self, image_path: Path, size: int) -> bytes:
+        digest = image_path.stem
+        path = self.thumbnails_directory / str(size) / f"{digest}.jpg"
+        if path.exists():
+            return path.read_bytes()
+
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            image.thumbnail((size, size))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=85)
+        data = buffer.getvalue()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        staging.write_bytes(data)
+        os.replace(staging, path)
+        return data
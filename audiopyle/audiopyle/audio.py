@@ -1,16 +1,59 @@
 import os
-import re
+import struct
 import time
-import urllib.parse
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Self
+from typing import Callable, Iterable, Self
 
 from pydub.utils import mediainfo
 
+from audiopyle import id3, normalize
 from audiopyle.core import DATE, File
+from audiopyle.exceptions import MetadataError
 
-CURRENT_ALBUMS: dict = {}
+# A metadata backend takes a filepath and returns a ``pydub.utils.mediainfo`` shaped dict
+MetadataBackend = Callable[[str], dict]
+
+
+def ffprobe_backend(filepath: str) -> dict:
+    """Reads metadata by running ffprobe on the file."""
+    return mediainfo(filepath)
+
+
+def native_backend(filepath: str) -> dict:
+    """Reads metadata in-process, falling back to ffprobe for files it cannot parse."""
+    try:
+        return id3.read_mediainfo(filepath)
+    except (MetadataError, OSError, struct.error, UnicodeDecodeError):
+        return ffprobe_backend(filepath)
+
+
+METADATA_BACKENDS: dict[str, MetadataBackend] = {
+    "native": native_backend,
+    "ffprobe": ffprobe_backend,
+}
+
+DEFAULT_METADATA_BACKEND: str = "native"
+
+
+def get_metadata_backend(
+    backend: str | MetadataBackend | None = None,
+) -> MetadataBackend:
+    """Resolves a metadata backend by name, passing callables through unchanged.
+
+    Raises:
+        KeyError: If no backend is registered under the given name.
+    """
+    if backend is None:
+        backend = DEFAULT_METADATA_BACKEND
+    if callable(backend):
+        return backend
+    try:
+        return METADATA_BACKENDS[backend]
+    except KeyError:
+        raise KeyError(
+            f"Unknown metadata backend '{backend}', expected one of {list(METADATA_BACKENDS)}"
+        ) from None
 
 
 @dataclass
@@ -29,10 +72,20 @@ class Audio(File):
     _rekordbox_uri: str
 
     tags: list[str] = field(default_factory=list)
+    bpm: float | None = None
+    key: str | None = None
 
     @classmethod
-    def _from_filepath(cls, filepath: Path | str) -> Self:
-        """Creates an Audio object given a filepath."""
+    def _from_filepath(
+        cls, filepath: Path | str, backend: str | MetadataBackend | None = None
+    ) -> Self:
+        """Creates an Audio object given a filepath.
+
+        Args:
+            filepath (Path | str): Path to the audio file.
+            backend (str | MetadataBackend, Optional): Metadata backend name (see
+                ``METADATA_BACKENDS``) or callable. Defaults to ``DEFAULT_METADATA_BACKEND``.
+        """
         if isinstance(filepath, Path):
             filename = filepath.name
             filepath = str(filepath.resolve())
@@ -40,17 +93,15 @@ class Audio(File):
             filename = str(Path(filepath).name)
 
         try:
-            file_info = mediainfo(filepath)
+            file_info = get_metadata_backend(backend)(filepath)
             _rekordbox_uri = filepath_to_rekordbox_uri(filepath)
             tags = file_info.get("TAG", {})
             title = tags.get("title", "No Title")
             album = tags.get("album", title)
 
-            CURRENT_ALBUMS[album] = CURRENT_ALBUMS.get(album, {album: {}})
-
             artist = tags.get("artist", "Unknown Artist")
-            _album_artist = tags.get("album_artist", artist)
-            album_artist = handle_artist(album, _album_artist)
+            # Reconciled across the album afterwards, see ``reconcile_albums``
+            album_artist = tags.get("album_artist", artist)
 
             year = tags.get("date", "N/A")
             comment = tags.get("comment", "") or tags.get("ID3v1 Comment", "")
@@ -60,15 +111,11 @@ class Audio(File):
             length = file_info.get("duration", 0)
             bit_rate = file_info.get("bit_rate", 0)
 
-            # TODO: Assign single date per album, if this is part of an album
+            # Shared per album afterwards, see ``reconcile_albums``
             _download_date = time.strptime(time.ctime(os.path.getctime(filepath)))
             download_year = time.strftime("%Y", _download_date)
             download_month = DATE.get(time.strftime("%m", _download_date))
 
-            download_year, download_month = get_album_date_if_exists(
-                album, download_year, download_month
-            )
-
         except AttributeError as e:
             raise
 
@@ -93,40 +140,67 @@ class Audio(File):
 def get_audio_oirigin(comment: str) -> str:
     """Reads the comment metadata of a file to determine its origin i.e bandcamp, beatport, etc."""
     if "bandcamp.com" in comment:
-        bandcamp_regex = r"https?://[^\s]+"
-        origin = re.findall(bandcamp_regex, comment)[0]
-    else:
-        origin = "other"
-
-    return origin
+        return normalize.find_url(comment) or "other"
+    return "other"
 
 
-def get_album_date_if_exists(album: str, year: str, month: str):
-    CURRENT_ALBUMS[album]["year"] = CURRENT_ALBUMS[album].get("year", year)
-    CURRENT_ALBUMS[album]["month"] = CURRENT_ALBUMS[album].get("month", month)
-    return CURRENT_ALBUMS[album]["year"], CURRENT_ALBUMS[album]["month"]
+def get_album_date_if_exists(album: dict, year: str, month: str) -> tuple[str, str]:
+    """Keeps the earliest download date seen for an album."""
+    if "year" not in album or (year, month) < (album["year"], album["month"]):
+        album["year"], album["month"] = year, month
+    return album["year"], album["month"]
 
 
-def handle_artist(album: str, artist: str):
-    existing_artist = CURRENT_ALBUMS[album].get("artist")
+def handle_artist(album: dict, artist: str) -> str:
+    """Tracks the album artist, collapsing differing artists into 'Various Artists'."""
+    existing_artist = album.get("artist")
     if artist == existing_artist:
         pass
-    elif existing_artist == None:
-        CURRENT_ALBUMS[album]["artist"] = artist
+    elif existing_artist is None:
+        album["artist"] = artist
     else:
-        CURRENT_ALBUMS[album]["artist"] = "Various Artists"
+        album["artist"] = "Various Artists"
 
-    return CURRENT_ALBUMS[album]["artist"]
+    return album["artist"]
 
 
-def filepath_to_rekordbox_uri(filepath: str) -> str:
-    rekordbox_uri = "file://localhost/" + urllib.parse.quote(
-        filepath, safe=":\()!,+$#@"
-    ).replace("\\", "/")
+class AlbumIndex:
+    """Album-level metadata aggregated over every track of each album."""
 
-    # Convert percent-encoded sequences to lowercase
-    rekordbox_uri = re.sub(
-        r"%[0-9A-Fa-f]{2}", lambda x: x.group(0).lower(), rekordbox_uri
-    )
+    def __init__(self):
+        self.albums: dict = {}
+
+    def add(self, track: Audio) -> None:
+        """Folds a track into its album's aggregate."""
+        album = self.albums.setdefault(track.album, {})
+        handle_artist(album, track.album_artist)
+        get_album_date_if_exists(album, track._download_year, track._download_month)
+
+    def resolve(self, track: Audio) -> Audio:
+        """Returns a copy of the track carrying its album's shared artist and date."""
+        album = self.albums[track.album]
+        return replace(
+            track,
+            album_artist=album["artist"],
+            _download_year=album["year"],
+            _download_month=album["month"],
+        )
 
-    return rekordbox_uri
+
+def reconcile_albums(tracks: Iterable[Audio]) -> list[Audio]:
+    """Assigns a single album artist and download date to every track of an album.
+
+    The result does not depend on the order of ``tracks``: an album whose tracks
+    disagree on the artist becomes "Various Artists" and takes the earliest
+    download date of any of its tracks.
+    """
+    tracks = list(tracks)
+    index = AlbumIndex()
+    for track in tracks:
+        index.add(track)
+    return [index.resolve(track) for track in tracks]
+
+
+def filepath_to_rekordbox_uri(filepath: str) -> str:
+    """Converts a filepath to a Rekordbox uri, see ``normalize.filepath_to_rekordbox_uri``."""
+    return normalize.filepath_to_rekordbox_uri(filepath)
@@ -0,0 +1,282 @@
+"""Incremental snapshot backups.
+
+Each backup is a full copy of the directory in its own snapshot directory,
+but files that haven't changed since the previous snapshot are hard links to
+that snapshot's copy (like ``rsync --link-dest``), so they take no space and
+no time to back up. Changed files are copied with the cheapest method the
+filesystem supports: a reflink (copy-on-write clone), then
+``os.copy_file_range`` (an in-kernel copy), then a plain byte copy.
+
+Every snapshot has a manifest recording the size and modification time of the
+files it holds, which is what the next snapshot compares against, so the
+previous snapshot's files are never read. The manifest is written last: a
+snapshot without one was interrupted and isn't used. Only the newest ``keep``
+snapshots are kept.
+"""
+
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from audiopyle import builtins, timestamps
+
+FORMAT: str = "audiopyle-backup"
+VERSION: int = 1
+
+MANIFEST_SUFFIX: str = ".manifest.json"
+SNAPSHOT_NAME_FORMAT: str = "%Y%m%dT%H%M%S%fZ"
+
+# ioctl(2) request cloning a whole file on Linux (btrfs, XFS, bcachefs, ...)
+FICLONE: int = 0x40049409
+
+# Bytes copied per ``os.copy_file_range`` call
+COPY_RANGE_SIZE: int = 1 << 30
+
+# Size and modification time of a file, in nanoseconds
+Signature = tuple[int, int]
+
+
+@dataclass
+class BackupResult:
+    """Outcome of a snapshot backup.
+
+    Args:
+        snapshot (Path): Directory of the new snapshot.
+        linked (int): Number of unchanged files hard linked to the previous snapshot.
+        copied (dict[str, int]): Number of files copied by each method,
+            ``"reflink"``, ``"copy_file_range"`` or ``"bytes"``.
+        failed (list[tuple[str, str]]): Relative path and error of files that
+            couldn't be backed up, they are left out of the manifest.
+        removed (list[Path]): Older snapshots removed to keep the newest ``keep``.
+    """
+
+    snapshot: Path
+    linked: int = 0
+    copied: dict[str, int] = field(default_factory=dict)
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+
+
+def _reflink(source_fd: int, target_fd: int) -> None:
+    import fcntl
+
+    fcntl.ioctl(target_fd, FICLONE, source_fd)
+
+
+def _copy_range(source_fd: int, target_fd: int) -> None:
+    while os.copy_file_range(source_fd, target_fd, COPY_RANGE_SIZE):
+        pass
+
+
+def copy_file(source: str | Path, target: str | Path) -> str:
+    """Copies a file's contents and permissions with the cheapest method available.
+
+    Tries a reflink, then ``os.copy_file_range``, then a plain byte copy, each
+    falling back to the next when the platform or filesystem doesn't support it.
+
+    Returns:
+        str: The method used, ``"reflink"``, ``"copy_file_range"`` or ``"bytes"``.
+    """
+    if sys.platform.startswith("linux"):
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            for method, copy in [
+                ("reflink", _reflink),
+                ("copy_file_range", _copy_range),
+            ]:
+                try:
+                    copy(src.fileno(), dst.fileno())
+                except OSError:
+                    # A failed range copy may have written part of the file
+                    dst.truncate(0)
+                    os.lseek(dst.fileno(), 0, os.SEEK_SET)
+                    os.lseek(src.fileno(), 0, os.SEEK_SET)
+                    continue
+                shutil.copymode(source, target)
+                return method
+
+    shutil.copyfile(source, target)
+    shutil.copymode(source, target)
+    return "bytes"
+
+
+def _snapshot_name(now: datetime) -> str:
+    return now.astimezone(timezone.utc).strftime(SNAPSHOT_NAME_FORMAT)
+
+
+def list_snapshots(backup_root: str | Path) -> list[Path]:
+    """Returns the complete snapshots beneath a backup root, oldest first."""
+    backup_root = Path(backup_root)
+    if not backup_root.is_dir():
+        return []
+    return sorted(
+        path
+        for path in backup_root.iterdir()
+        if path.is_dir() and _manifest_path(path).is_file()
+    )
+
+
+def _manifest_path(snapshot: Path) -> Path:
+    return snapshot.with_name(snapshot.name + MANIFEST_SUFFIX)
+
+
+def read_manifest(snapshot: str | Path) -> dict[str, Signature]:
+    """Reads the size and modification time of each file in a snapshot, keyed by relative path."""
+    with open(_manifest_path(Path(snapshot)), encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    return {path: tuple(signature) for path, signature in manifest["files"].items()}
+
+
+def _write_manifest(snapshot: Path, source: Path, files: dict[str, Signature]):
+    manifest_path = _manifest_path(snapshot)
+    staging = manifest_path.with_name(f".{manifest_path.name}.tmp")
+    with open(staging, "w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "format": FORMAT,
+                "version": VERSION,
+                "source": str(source),
+                "files": files,
+            },
+            fh,
+            ensure_ascii=False,
+        )
+    os.replace(staging, manifest_path)
+
+
+def _backup_file(
+    source: Path, target: Path, previous: Path | None
+) -> tuple[str | None, timestamps.FileTimes | None]:
+    """Links a file to its copy in the previous snapshot if given, copies it otherwise.
+
+    Returns:
+        tuple[str | None, timestamps.FileTimes | None]: The copy method and the
+            timestamps to apply to the copy, both None when the file was linked.
+    """
+    if previous is not None:
+        try:
+            os.link(previous, target)
+            return None, None
+        except OSError:
+            # i.e the snapshots are on different filesystems or the link limit is hit
+            pass
+    times = timestamps.get_times(source)
+    return copy_file(source, target), times
+
+
+def create_snapshot(
+    directory: str | Path,
+    backup_root: str | Path,
+    keep: int | None = 7,
+    workers: int = 8,
+) -> BackupResult:
+    """Backs up a directory into a new snapshot beneath ``backup_root``.
+
+    Args:
+        directory (str | Path): Directory to back up.
+        backup_root (str | Path): Directory holding the snapshots, created if needed.
+            It must not lie beneath ``directory``.
+        keep (int, Optional): Number of snapshots to keep, including the new one,
+            older ones are removed. Keeps every snapshot if None.
+        workers (int): Number of threads linking and copying files.
+
+    Returns:
+        BackupResult: The new snapshot and what was done to create it.
+
+    Raises:
+        ValueError: If ``keep`` is less than 1.
+    """
+    if keep is not None and keep < 1:
+        raise ValueError("At least one snapshot must be kept")
+    directory = Path(directory)
+    backup_root = Path(backup_root)
+    backup_root.mkdir(parents=True, exist_ok=True)
+
+    snapshots = list_snapshots(backup_root)
+    previous = snapshots[-1] if snapshots else None
+    previous_files = read_manifest(previous) if previous is not None else {}
+
+    snapshot = backup_root / _snapshot_name(datetime.now(timezone.utc))
+    snapshot.mkdir()
+    result = BackupResult(snapshot)
+
+    files: dict[str, Signature] = {}
+    tasks = []
+    for entry in builtins.scan_tree(directory):
+        relative_path = Path(os.path.relpath(entry.path, directory)).as_posix()
+        try:
+            stat = entry.stat()
+        except OSError as e:
+            result.failed.append((relative_path, str(e)))
+            continue
+        files[relative_path] = (stat.st_size, stat.st_mtime_ns)
+        link_source = (
+            previous / relative_path
+            if previous_files.get(relative_path) == files[relative_path]
+            else None
+        )
+        tasks.append((relative_path, Path(entry.path), link_source))
+
+    for parent in sorted(
+        {(snapshot / relative_path).parent for relative_path, *_ in tasks}
+    ):
+        parent.mkdir(parents=True, exist_ok=True)
+
+    def _execute(task):
+        relative_path, source, link_source = task
+        try:
+            return _backup_file(source, snapshot / relative_path, link_source), None
+        except OSError as e:
+            return (None, None), str(e)
+
+    copied = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (relative_path, _, _), ((method, times), error) in zip(
+            tasks, pool.map(_execute, tasks)
+        ):
+            if error is not None:
+                result.failed.append((relative_path, error))
+                del files[relative_path]
+            elif method is None:
+                result.linked += 1
+            else:
+                result.copied[method] = result.copied.get(method, 0) + 1
+                copied.append((snapshot / relative_path, times))
+    timestamps.apply_times(copied)
+
+    _write_manifest(snapshot, directory, files)
+    result.removed = rotate_snapshots(backup_root, keep)
+    return result
+
+
+def rotate_snapshots(backup_root: str | Path, keep: int | None) -> list[Path]:
+    """Removes all but the newest ``keep`` snapshots, along with interrupted ones.
+
+    Returns:
+        list[Path]: The snapshots removed.
+
+    Raises:
+        ValueError: If ``keep`` is less than 1.
+    """
+    if keep is not None and keep < 1:
+        raise ValueError("At least one snapshot must be kept")
+    backup_root = Path(backup_root)
+    complete = list_snapshots(backup_root)
+    removed = complete[:-keep] if keep is not None else []
+
+    # Interrupted snapshots older than the newest complete one
+    if complete:
+        removed += [
+            path
+            for path in backup_root.iterdir()
+            if path.is_dir() and path not in complete and path.name < complete[-1].name
+        ]
+
+    for snapshot in removed:
+        _manifest_path(snapshot).unlink(missing_ok=True)
+        shutil.rmtree(snapshot)
+    return sorted(removed)
@@ -1,10 +1,22 @@
 """Methods and functions related to bandcamp scraping and parsing"""
 
+import codecs
+import json
+import queue
 import re
+import threading
+import time
 import unicodedata
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Iterable
+from urllib.parse import urlsplit
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from audiopyle import builtins, cache
 
 
 def _build_url_path(album: str | None = None, track: str | None = None) -> str:
@@ -45,21 +57,304 @@ def build_link(origin, url):
     return f"{origin}/{url}"
 
 
-def get_tags(url: str, recurse: bool = True) -> list:
-    """Gets tags from bandcamp given a url
+# Bytes of a response decoded and parsed at a time
+CHUNK_SIZE: int = 16384
+
+
+@dataclass
+class PageInfo:
+    """Information extracted from a bandcamp album or track page."""
+
+    tags: list[str] = field(default_factory=list)
+    title: str | None = None
+    artist: str | None = None
+    release_date: str | None = None
+
+
+class _PageParser(HTMLParser):
+    """Incrementally extracts tags and JSON-LD from a bandcamp page.
+
+    ``done`` is set once the tags block has been closed, nothing after it is
+    needed so feeding can stop there.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.info = PageInfo()
+        self.done = False
+        self._keywords: list = []
+        self._json_ld: list[str] | None = None
+        self._tag_text: list[str] | None = None
+        # Depth of nested divs within the tags block, None outside of it
+        self._tags_block_divs: int | None = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("type") == "application/ld+json":
+            self._json_ld = []
+        elif tag == "div":
+            if self._tags_block_divs is not None:
+                self._tags_block_divs += 1
+            elif "tralbum-tags" in (attrs.get("class") or "").split():
+                self._tags_block_divs = 1
+        elif tag == "a" and "tag" in (attrs.get("class") or "").split():
+            self._tag_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._json_ld is not None:
+            self._read_json_ld("".join(self._json_ld))
+            self._json_ld = None
+        elif tag == "div" and self._tags_block_divs is not None:
+            self._tags_block_divs -= 1
+            if self._tags_block_divs == 0:
+                self._tags_block_divs = None
+                self.done = True
+        elif tag == "a" and self._tag_text is not None:
+            self.info.tags.append("".join(self._tag_text).strip())
+            self._tag_text = None
+
+    def handle_data(self, data):
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+        elif self._tag_text is not None:
+            self._tag_text.append(data)
+
+    def _read_json_ld(self, text: str) -> None:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(data, dict):
+            return
+
+        self.info.title = data.get("name")
+        self.info.release_date = data.get("datePublished")
+        artist = data.get("byArtist")
+        if isinstance(artist, dict):
+            self.info.artist = artist.get("name")
+        keywords = data.get("keywords")
+        if isinstance(keywords, list):
+            self._keywords = keywords
+
+    def close(self):
+        super().close()
+        # Fall back to the JSON-LD keywords for pages without a tags block
+        if not self.info.tags:
+            self.info.tags = list(self._keywords)
+
+
+def parse_page(chunks: Iterable[bytes], encoding: str = "utf-8") -> PageInfo:
+    """Extracts page information from the chunks of a bandcamp page's HTML.
+
+    Parsing stops as soon as the tags block has been consumed, the remaining
+    chunks are not decoded or parsed.
+    """
+    parser = _PageParser()
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.done:
+            break
+    parser.close()
+    return parser.info
+
+
+def _extract_tags(content: bytes) -> list:
+    """Extracts tags from the HTML of a bandcamp page."""
+    chunks = (content[i : i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE))
+    return parse_page(chunks).tags
+
+
+def _extract_tags_soup(content: bytes) -> list:
+    """Extracts tags by building the full BeautifulSoup tree, kept as a reference."""
+    soup = BeautifulSoup(content, features="html.parser")
+    _tags = soup.findAll("a", class_="tag")
+    return [tag.get_text(strip=True) for tag in _tags]
+
+
+def get_page_info(url: str, session: requests.Session | None = None) -> PageInfo:
+    """Gets the tags, title, artist and release date of a bandcamp page.
+
+    The response is streamed and parsed until the tags block has been consumed.
+
+    Raises:
+        requests.exceptions.HTTPError: If the page couldn't be fetched.
+    """
+    with (session or requests).get(url, stream=True) as r:
+        r.raise_for_status()
+        chunks = r.iter_content(CHUNK_SIZE)
+        info = parse_page(chunks, encoding=r.encoding or "utf-8")
+        # Drain the rest unparsed so the connection can go back to the pool
+        for _ in chunks:
+            pass
+    return info
+
+
+# Status codes meaning a page doesn't exist, as opposed to a transient failure
+MISSING_STATUS_CODES: tuple = (404, 410)
+
+
+def _fetch_tags(
+    url: str, recurse: bool = True, session: requests.Session | None = None
+) -> tuple[list | None, bool]:
+    """Fetches tags from bandcamp.
 
     Returns:
-        list: List of tags
+        tuple[list | None, bool]: Tags, or None if the page (and its fallback)
+            couldn't be fetched, and whether the outcome is safe to cache.
     """
-    tags = []
-    r = requests.get(url)
     try:
-        r.raise_for_status()
-        soup = BeautifulSoup(r.content, features="html.parser")
-        _tags = soup.findAll("a", class_="tag")
-        tags = [tag.get_text(strip=True) for tag in _tags]
+        return get_page_info(url, session=session).tags, True
     except requests.exceptions.HTTPError as e:
+        missing = e.response.status_code in MISSING_STATUS_CODES
         if recurse:
-            tags = get_tags(url + "-2", recurse=False)
+            tags, cacheable = _fetch_tags(url + "-2", recurse=False, session=session)
+            return tags, cacheable and missing
+        return None, missing
+
+
+def get_tags(
+    url: str,
+    recurse: bool = True,
+    session: requests.Session | None = None,
+    tag_cache: cache.TagCache | None = None,
+) -> list:
+    """Gets tags from bandcamp given a url
+
+    Args:
+        url (str): Url of the album or track page.
+        recurse (bool): Retry with ``url + "-2"`` if the page doesn't exist.
+        session (requests.Session, Optional): Session to reuse connections from.
+        tag_cache (cache.TagCache, Optional): Cache consulted before any request is made.
+
+    Returns:
+        list: List of tags
+    """
+    if tag_cache is not None:
+        tags = tag_cache.get(url)
+        if tags is not None:
+            return tags
+
+    tags, cacheable = _fetch_tags(url, recurse=recurse, session=session)
+    if tag_cache is not None and cacheable:
+        tag_cache.put(url, tags)
+
+    return tags or []
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """Creates a session keeping up to ``pool_size`` connections alive per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Spaces out requests so no host receives more than a given rate.
+
+    Args:
+        requests_per_second (float): Maximum request rate per host.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """Blocks until a request to the url's host is allowed."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def fetch_tags(
+    pairs: Iterable[tuple[str, str]],
+    workers: int = 8,
+    requests_per_second: float = 4.0,
+    session: requests.Session | None = None,
+    tag_cache: cache.TagCache | None = None,
+) -> dict[str, list]:
+    """Gets tags for many bandcamp pages concurrently.
+
+    Pages are fetched by a bounded pool of threads sharing one keep-alive session
+    and a per-host rate limit. A page that doesn't exist is retried once at
+    ``url + "-2"``, queued behind the outstanding requests.
+
+    Args:
+        pairs (Iterable[tuple[str, str]]): (origin, url_path) pairs, i.e from
+            ``Audio.origin`` and ``_build_url_path``.
+        workers (int): Maximum number of concurrent requests.
+        requests_per_second (float): Maximum request rate per host.
+        session (requests.Session, Optional): Session to use, one is created if not given.
+        tag_cache (cache.TagCache, Optional): Cache consulted before any request is
+            made; pages that were found, or confirmed missing, are stored in it.
+
+    Returns:
+        dict[str, list]: Tags keyed by the link built from each pair, empty for
+            pages that couldn't be fetched.
+    """
+    session = session or create_session(pool_size=workers)
+    limiter = RateLimiter(requests_per_second)
+    work: queue.Queue = queue.Queue()
+    results: dict[str, list | None] = {}
+    cached: dict[str, list] = {}
+    failed: set[str] = set()
+
+    for origin, url_path in pairs:
+        link = build_link(origin, url_path)
+        if link in results or link in cached:
+            continue
+        tags = tag_cache.get(link) if tag_cache is not None else None
+        if tags is not None:
+            cached[link] = tags
+            continue
+        results[link] = None
+        work.put((link, link, True))
+
+    logger = builtins.get_or_configure_logger(__name__)
+
+    def _worker():
+        while (item := work.get()) is not None:
+            link, url, retry = item
+            try:
+                limiter.wait(url)
+                results[link] = get_page_info(url, session=session).tags
+                # The retry found the page after the first url failed
+                failed.discard(link)
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code not in MISSING_STATUS_CODES:
+                    failed.add(link)
+                if retry:
+                    work.put((link, url + "-2", False))
+            except requests.exceptions.RequestException:
+                failed.add(link)
+            except Exception as e:
+                # i.e an unknown page encoding, a worker must never die with work queued
+                logger.error(f"Error fetching {url}: {e!r}")
+                failed.add(link)
+            finally:
+                work.task_done()
+
+    threads = [threading.Thread(target=_worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    work.join()
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+
+    if tag_cache is not None:
+        # Transient errors say nothing about the page, so they aren't cached
+        tag_cache.put_many(
+            (link, tags) for link, tags in results.items() if link not in failed
+        )
 
-    return tags
+    return {link: tags or [] for link, tags in results.items()} | cached
@@ -1,10 +1,12 @@
 import logging
 import os
-import re
-from typing import Optional, Union
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
 
-import win32con
-import win32file
+from audiopyle import normalize, stats, timestamps
+
+# Files operating systems leave behind, a directory holding only these counts as empty
+JUNK_FILES: frozenset[str] = frozenset([".DS_Store", "Thumbs.db", "desktop.ini"])
 
 
 class CustomFormatter(logging.Formatter):
@@ -110,49 +112,135 @@ def ensure_directory(filepath: str, raise_on_not_exists: bool = True) -> bool:
 
 def is_audio(filepath: str) -> bool:
     """Checks if a file is an audio file."""
-    audio_regex = r"\.(mp3)$"
-    return re.search(audio_regex, filepath, re.IGNORECASE) is not None
+    return normalize.is_audio_path(filepath)
+
+
+def scan_tree(directory: str | Path) -> Iterator[os.DirEntry]:
+    """Recursively yields the file entries beneath a directory via ``os.scandir``.
+
+    Files are yielded in name order, each directory's files before those of its
+    subdirectories. Symbolic links to directories are not followed.
+    """
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+            elif entry.is_file():
+                yield entry
+        stack.extend(reversed(subdirectories))
 
 
 def count_files(directory: str) -> int:
     """Counts the number of files in a directory and its subdirectories."""
-    count = sum([len(files) for _, _, files in os.walk(directory)])
-    return count
-
-
-def get_creation_time(path):
-    return win32file.GetFileTime(
-        win32file.CreateFile(
-            path,
-            win32con.GENERIC_READ,
-            0,
-            None,
-            win32con.OPEN_EXISTING,
-            win32con.FILE_ATTRIBUTE_NORMAL,
-            None,
-        )
-    )[0]
-
-
-def set_creation_time(path, creation_time):
-    fh = win32file.CreateFile(
-        path,
-        win32con.GENERIC_WRITE,
-        0,
-        None,
-        win32con.OPEN_EXISTING,
-        win32con.FILE_ATTRIBUTE_NORMAL,
-        None,
-    )
-    win32file.SetFileTime(fh, creation_time, None, None)
-    fh.close()
-
-
-def sanitize_directory_name(name: str):
-    # Define the regex pattern for invalid characters
-    invalid_chars_pattern = r'[<>:"/\\|?*]'
-
-    # Replace invalid characters with an underscore
-    sanitized_name = re.sub(invalid_chars_pattern, "-", name)
-
-    return sanitized_name
+    return stats.collect_stats(directory).files
+
+
+def remove_if_empty(directory: str | Path, ignore: Iterable[str] = JUNK_FILES) -> bool:
+    """Removes a directory if it holds nothing but ignored files, removing those too.
+
+    Returns:
+        bool: Whether the directory was removed.
+    """
+    ignore = frozenset(ignore)
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    if any(entry.name not in ignore or not entry.is_file() for entry in entries):
+        return False
+    for entry in entries:
+        os.remove(entry.path)
+    os.rmdir(directory)
+    return True
+
+
+def prune_empty_directories(
+    root: str | Path,
+    directories: Iterable[str | Path] | None = None,
+    ignore: Iterable[str] = JUNK_FILES,
+) -> list[Path]:
+    """Removes empty directories beneath a root, including those only emptied by the pruning.
+
+    Without ``directories`` the whole tree is walked once, bottom-up, in the
+    manner of ``os.walk(topdown=False)``: a directory is removed once every
+    subdirectory has been removed and only ignored files remain. Given the
+    directories a batch of moves emptied out, i.e ``organizer.MoveResult.source_directories``,
+    only those and their ancestors are checked and the rest of the tree isn't read.
+    The root itself is never removed.
+
+    Args:
+        root (str | Path): Directory to prune beneath.
+        directories (Iterable[str | Path], Optional): Directories that may have been emptied.
+        ignore (Iterable[str]): Names of files that don't stop a directory being
+            empty, they are removed along with it.
+
+    Returns:
+        list[Path]: The directories removed, deepest first.
+    """
+    root = Path(os.path.abspath(root))
+    ignore = frozenset(ignore)
+    removed = []
+
+    if directories is not None:
+        # Deepest first, so a parent is only checked once its children are done
+        candidates = {Path(os.path.abspath(directory)) for directory in directories}
+        for directory in sorted(candidates, key=lambda path: -len(path.parts)):
+            while directory != root and root in directory.parents:
+                if not remove_if_empty(directory, ignore):
+                    break
+                removed.append(directory)
+                directory = directory.parent
+        return removed
+
+    # Post-order walk, each directory's [remaining entries, ignored files] are
+    # known once it has been listed and its subdirectories have been visited
+    contents: dict[str, list] = {}
+    stack = [(str(root), False)]
+    while stack:
+        directory, listed = stack.pop()
+        if not listed:
+            stack.append((directory, True))
+            remaining, junk = 0, []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, False))
+                        remaining += 1
+                    elif entry.name in ignore and entry.is_file():
+                        junk.append(entry.path)
+                    else:
+                        remaining += 1
+            contents[directory] = [remaining, junk]
+            continue
+
+        remaining, junk = contents.pop(directory)
+        if remaining or directory == str(root):
+            continue
+        for path in junk:
+            os.remove(path)
+        os.rmdir(directory)
+        removed.append(Path(directory))
+        contents[os.path.dirname(directory)][0] -= 1
+    return removed
+
+
+def get_creation_time(path) -> int | None:
+    """Gets the creation time of a file in nanoseconds, see ``timestamps.get_times``."""
+    return timestamps.get_times(path).created_ns
+
+
+def set_creation_time(path, creation_time: int | None) -> None:
+    """Sets the creation time (in nanoseconds) of a file, only supported on Windows."""
+    if timestamps.IS_WINDOWS and creation_time is not None:
+        timestamps._set_windows_creation_time(path, creation_time)
+
+
+def sanitize_directory_name(name: str) -> str:
+    """Replaces characters that are invalid in directory names with dashes."""
+    return normalize.sanitize_name(name)
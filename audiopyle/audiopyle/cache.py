@@ -0,0 +1,386 @@
+"""On-disk caches for parsed file metadata and bandcamp lookups."""
+
+import json
+import os
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Self
+from urllib.parse import urlsplit, urlunsplit
+
+from audiopyle import audio
+
+
+@dataclass
+class CacheStats:
+    """Counts of cache lookups and maintenance.
+
+    Args:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups for files the cache has never seen.
+        invalidated (int): Lookups for entries that are stale, i.e files whose size,
+            mtime or inode changed, or lookups that outlived their TTL.
+        removed (int): Entries dropped because their file no longer exists, or
+            evicted to keep a cache within its size limit.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidated: int = 0
+    removed: int = 0
+
+
+class SQLiteTable:
+    """A single table in a SQLite database, created if it doesn't exist.
+
+    Subclasses set ``table`` and the column definitions in ``schema``.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+    """
+
+    table: str = ""
+    schema: str = ""
+
+    def __init__(self, database_path: str | Path):
+        self.database_path = Path(database_path)
+        self._connection = sqlite3.connect(self.database_path)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ({self.schema})"
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        query = f"SELECT COUNT(*) FROM {self.table}"
+        return self._connection.execute(query).fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+
+class FileTable(SQLiteTable):
+    """A table keyed by absolute filepath, in a ``path`` column.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+    """
+
+    def __init__(self, database_path: str | Path):
+        super().__init__(database_path)
+        self.stats = CacheStats()
+
+    def remove(self, filepaths: Iterable[str]) -> int:
+        """Drops the entries of files.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._connection:
+            removed = self._connection.executemany(
+                f"DELETE FROM {self.table} WHERE path = ?",
+                ((filepath,) for filepath in set(filepaths)),
+            ).rowcount
+
+        self.stats.removed += removed
+        return removed
+
+    def prune(self, filepaths: Iterable[str], root: str | Path | None = None) -> int:
+        """Drops entries for files that are not in ``filepaths``.
+
+        Args:
+            filepaths (Iterable[str]): Files that currently exist.
+            root (str | Path, Optional): Only prune entries beneath this directory.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        existing = set(filepaths)
+        query, params = f"SELECT path FROM {self.table}", ()
+        if root is not None:
+            prefix = os.path.join(str(root), "")
+            query += " WHERE substr(path, 1, ?) = ?"
+            params = (len(prefix), prefix)
+
+        return self.remove(
+            [
+                path
+                for (path,) in self._connection.execute(query, params)
+                if path not in existing
+            ]
+        )
+
+
+class MetadataCache(FileTable):
+    """Persistent cache of parsed ``audio.Audio`` records keyed by filepath.
+
+    An entry is only valid while the file's size, modification time and inode
+    match the values stored alongside it.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+    """
+
+    table = "files"
+    schema = """
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        record TEXT NOT NULL
+    """
+
+    def get(self, filepath: str, stat: os.stat_result) -> audio.Audio | None:
+        """Returns the cached record for a file, or None if it is missing or stale."""
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, inode, record FROM files WHERE path = ?",
+            (filepath,),
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if tuple(row[:3]) != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            self.stats.invalidated += 1
+            return None
+
+        self.stats.hits += 1
+        return audio.Audio(**json.loads(row[3]))
+
+    def put_many(self, entries: Iterable[tuple[str, os.stat_result, audio.Audio]]):
+        """Stores records for many files in a single transaction."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        filepath,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        stat.st_ino,
+                        json.dumps(asdict(record), default=str),
+                    )
+                    for filepath, stat, record in entries
+                ),
+            )
+
+
+class HashCache(FileTable):
+    """Persistent cache of content digests keyed by filepath and modification time.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+    """
+
+    table = "hashes"
+    schema = """
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        digest TEXT NOT NULL
+    """
+
+    def get(self, filepath: str, stat: os.stat_result) -> str | None:
+        """Returns the cached digest of a file, or None if it is missing or stale."""
+        row = self._connection.execute(
+            "SELECT mtime_ns, digest FROM hashes WHERE path = ?", (filepath,)
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if row[0] != stat.st_mtime_ns:
+            self.stats.invalidated += 1
+            return None
+
+        self.stats.hits += 1
+        return row[1]
+
+    def put_many(self, entries: Iterable[tuple[str, os.stat_result, str]]):
+        """Stores digests for many files in a single transaction."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)",
+                (
+                    (filepath, stat.st_mtime_ns, digest)
+                    for filepath, stat, digest in entries
+                ),
+            )
+
+
+class AnalysisCache(FileTable):
+    """Persistent cache of estimated tempo and key keyed by filepath and modification time.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+    """
+
+    table = "analysis"
+    schema = """
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        bpm REAL,
+        key TEXT
+    """
+
+    def get(
+        self, filepath: str, stat: os.stat_result
+    ) -> tuple[float | None, str | None] | None:
+        """Returns the cached tempo and key of a file, or None if it is missing or stale.
+
+        A cached tempo or key is itself None when it couldn't be estimated.
+        """
+        row = self._connection.execute(
+            "SELECT mtime_ns, bpm, key FROM analysis WHERE path = ?", (filepath,)
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if row[0] != stat.st_mtime_ns:
+            self.stats.invalidated += 1
+            return None
+
+        self.stats.hits += 1
+        return row[1], row[2]
+
+    def put_many(
+        self,
+        entries: Iterable[tuple[str, os.stat_result, float | None, str | None]],
+    ):
+        """Stores the tempo and key of many files in a single transaction."""
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?)",
+                (
+                    (filepath, stat.st_mtime_ns, bpm, key)
+                    for filepath, stat, bpm, key in entries
+                ),
+            )
+
+
+def normalize_url(url: str) -> str:
+    """Normalizes a url for use as a cache key.
+
+    The scheme and host are lowercased, and the query, fragment and any trailing
+    slash are dropped.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+class TagCache(SQLiteTable):
+    """Persistent cache of bandcamp tag lookups keyed by normalized url.
+
+    Lookups for pages that don't exist are cached too, with their own (usually
+    shorter) TTL. Once the cache holds more than ``max_entries`` entries the
+    least recently used ones are evicted.
+
+    Args:
+        database_path (str | Path): Path to the SQLite database, created if it doesn't exist.
+        ttl (float): Seconds a found page's tags stay valid.
+        negative_ttl (float): Seconds a page that wasn't found stays cached as missing.
+        max_entries (int): Maximum number of cached urls.
+    """
+
+    table = "tags"
+    schema = """
+        url TEXT PRIMARY KEY,
+        tags TEXT,
+        fetched_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    """
+
+    def __init__(
+        self,
+        database_path: str | Path,
+        ttl: float = 30 * 24 * 60 * 60,
+        negative_ttl: float = 24 * 60 * 60,
+        max_entries: int = 100_000,
+    ):
+        super().__init__(database_path)
+        self.stats = CacheStats()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS tags_accessed_at ON tags (accessed_at)"
+        )
+
+    def get(self, url: str) -> list | None:
+        """Returns the cached tags of a url, or None if it isn't cached or has expired.
+
+        Urls cached as missing return an empty list.
+        """
+        url = normalize_url(url)
+        row = self._connection.execute(
+            "SELECT tags, fetched_at FROM tags WHERE url = ?", (url,)
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+
+        tags, fetched_at = row
+        now = time.time()
+        ttl = self.ttl if tags is not None else self.negative_ttl
+        if now - fetched_at > ttl:
+            self.stats.invalidated += 1
+            return None
+
+        self.stats.hits += 1
+        with self._connection:
+            self._connection.execute(
+                "UPDATE tags SET accessed_at = ? WHERE url = ?", (now, url)
+            )
+        return json.loads(tags) if tags is not None else []
+
+    def put_many(self, entries: Iterable[tuple[str, list | None]]) -> None:
+        """Stores lookups in a single transaction, None marking a page that wasn't found."""
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        normalize_url(url),
+                        json.dumps(tags) if tags is not None else None,
+                        now,
+                        now,
+                    )
+                    for url, tags in entries
+                ),
+            )
+        self.evict()
+
+    def put(self, url: str, tags: list | None) -> None:
+        """Stores a single lookup, None marking a page that wasn't found."""
+        self.put_many([(url, tags)])
+
+    def evict(self) -> int:
+        """Evicts the least recently used entries beyond ``max_entries``.
+
+        Returns:
+            int: Number of entries evicted.
+        """
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return 0
+        with self._connection:
+            self._connection.execute(
+                """
+                DELETE FROM tags WHERE url IN (
+                    SELECT url FROM tags ORDER BY accessed_at LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+        self.stats.removed += excess
+        return excess
@@ -5,7 +5,7 @@ from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Self
 
-from audiopyle.builtins import get_creation_time, set_creation_time
+from audiopyle import builtins, timestamps
 
 DATE: dict = {
     "01": "01 - January",
@@ -43,13 +43,24 @@ class File(ABC):
         """Dictionary representation of the File object."""
         return asdict(self)
 
+    def __setstate__(self, state: dict) -> None:
+        """Restores a pickled File, ``__dict__`` is a copy so it can't be updated in place."""
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
     @property
     def json(self) -> str:
         """JSON Representation of File object."""
-        return json.dumps(self.__dict__)
+        # ``_filepath`` is a Path once the file has been moved
+        return json.dumps(self.__dict__, default=str)
 
     def move(self, target_directory: str | Path) -> None:
-        """Moves the file to a new filepath."""
+        """Moves the file to a new filepath.
+
+        Images (i.e an album's ``cover.jpg``) are moved like any other file rather
+        than deleted. ``organizer.plan_moves`` targets them at the directory of
+        their album's tracks, see ``artwork`` for collecting them.
+        """
         if isinstance(target_directory, str):
             target_directory = Path(target_directory)
 
@@ -58,22 +69,13 @@ class File(ABC):
             print(f"{source.name} does not exist!")
             return
 
-        # TODO: Handle Images (Move them with the album)
-        if source.suffix in [".jpg", ".png"]:
-            source.unlink()
-            # Remove the source directory if it's empty
-            if not any(source.parent.iterdir()):
-                source.parent.rmdir()
-
-            return
-
         target = target_directory / source.name
 
         if source.resolve() == target.resolve():
             return
 
-        # Get the creation time of the source file
-        creation_time = get_creation_time(str(source))
+        # Get the timestamps of the source file
+        times = timestamps.get_times(source)
 
         target.parent.mkdir(parents=True, exist_ok=True)
 
@@ -83,14 +85,13 @@ class File(ABC):
             print(f"Error moving {source.name}")
             return
 
-        # Set the creation time on the destination file
-        set_creation_time(str(target), creation_time)
+        # Set the timestamps on the destination file
+        timestamps.set_times(target, times)
 
         source.unlink()
 
         # Remove the source directory if it's empty
-        if not any(source.parent.iterdir()):
-            source.parent.rmdir()
+        builtins.remove_if_empty(source.parent)
 
         self._filepath = target.resolve()
 
@@ -0,0 +1,208 @@
+"""Streaming audio decoding in fixed-size blocks.
+
+Tracks are decoded to mono float32 at a target sample rate a block at a time,
+so memory use depends on the block size rather than the length of the track.
+Formats libsndfile can read are decoded with ``soundfile`` and resampled with
+a streaming ``soxr`` resampler; anything else is piped through ffmpeg.
+"""
+
+import shutil
+import subprocess
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Iterator
+
+import audioread.exceptions
+import numpy as np
+import soundfile
+import soxr
+
+from audiopyle import audio
+from audiopyle.exceptions import DecodeError, MetadataError
+
+# Errors meaning a track can't be decoded, as opposed to a bug in the analysis
+DECODE_ERRORS: tuple[type[Exception], ...] = (
+    DecodeError,
+    MetadataError,
+    OSError,
+    EOFError,
+    soundfile.SoundFileError,
+    audioread.exceptions.DecodeError,
+)
+
+# Samples decoded from the source at a time
+READ_SIZE: int = 65536
+
+
+@dataclass(frozen=True)
+class Window:
+    """A section of a track, in seconds."""
+
+    offset: float
+    duration: float
+
+
+def get_duration(filepath: str | Path) -> float:
+    """Gets the duration of a track in seconds without decoding it."""
+    try:
+        return soundfile.info(str(filepath)).duration
+    except (soundfile.LibsndfileError, RuntimeError):
+        return float(audio.native_backend(str(filepath)).get("duration", 0))
+
+
+def select_windows(
+    duration: float,
+    window_seconds: float,
+    skip_intro_seconds: float = 0.0,
+    skip_outro_seconds: float = 0.0,
+    n_windows: int | None = None,
+) -> list[Window]:
+    """Selects the sections of a track to analyze.
+
+    Without ``n_windows`` the whole track (minus the intro and outro) is a single
+    window. Otherwise ``n_windows`` windows of ``window_seconds`` are spread
+    evenly over it, fewer if the track is too short to fit them apart.
+    """
+    start = min(skip_intro_seconds, duration)
+    end = max(duration - skip_outro_seconds, start)
+    if n_windows is None:
+        return [Window(start, end - start)] if end > start else []
+
+    length = min(window_seconds, end - start)
+    if length <= 0:
+        return []
+    n_windows = max(min(n_windows, int((end - start) // length)), 1)
+    if n_windows == 1:
+        return [Window(start + (end - start - length) / 2, length)]
+
+    step = (end - start - length) / (n_windows - 1)
+    return [Window(start + i * step, length) for i in range(n_windows)]
+
+
+def _decode_soundfile(
+    filepath: str, sample_rate: int, offset: float, duration: float | None
+) -> Iterator[np.ndarray]:
+    with soundfile.SoundFile(filepath) as sf:
+        source_rate = sf.samplerate
+        sf.seek(min(int(offset * source_rate), sf.frames))
+        frames = -1 if duration is None else int(duration * source_rate)
+
+        resampler = None
+        if source_rate != sample_rate:
+            resampler = soxr.ResampleStream(
+                source_rate, sample_rate, 1, dtype="float32"
+            )
+
+        for block in sf.blocks(
+            blocksize=READ_SIZE, frames=frames, dtype="float32", always_2d=True
+        ):
+            mono = block.mean(axis=1)
+            yield mono if resampler is None else resampler.resample_chunk(mono)
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def _decode_ffmpeg(
+    filepath: str, sample_rate: int, offset: float, duration: float | None
+) -> Iterator[np.ndarray]:
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise FileNotFoundError("ffmpeg is required to decode this file")
+
+    command = [ffmpeg, "-v", "error", "-ss", str(offset), "-i", filepath]
+    if duration is not None:
+        command += ["-t", str(duration)]
+    command += ["-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    try:
+        while data := process.stdout.read(READ_SIZE * 4):
+            # Keep whole samples, a short read may split one
+            while len(data) % 4:
+                more = process.stdout.read(4 - len(data) % 4)
+                if not more:
+                    data = data[: len(data) - len(data) % 4]
+                    break
+                data += more
+            yield np.frombuffer(data, dtype=np.float32)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def decode(
+    filepath: str | Path,
+    sample_rate: int = 22050,
+    offset: float = 0.0,
+    duration: float | None = None,
+) -> Iterator[np.ndarray]:
+    """Decodes a track to mono float32 samples, yielding chunks of arbitrary size.
+
+    Args:
+        filepath (str | Path): Path to the track.
+        sample_rate (int): Rate the samples are resampled to.
+        offset (float): Seconds into the track decoding starts at.
+        duration (float, Optional): Seconds to decode, until the end if not given.
+    """
+    filepath = str(filepath)
+    try:
+        soundfile.info(filepath)
+    except (soundfile.LibsndfileError, RuntimeError):
+        yield from _decode_ffmpeg(filepath, sample_rate, offset, duration)
+        return
+    yield from _decode_soundfile(filepath, sample_rate, offset, duration)
+
+
+def stream_blocks(
+    filepath: str | Path,
+    sample_rate: int = 22050,
+    block_size: int = 22050 * 10,
+    overlap: int = 0,
+    offset: float = 0.0,
+    duration: float | None = None,
+    pad: int = 0,
+) -> Iterator[np.ndarray]:
+    """Decodes a track into fixed-size, overlapping blocks of mono samples.
+
+    Each block starts ``block_size - overlap`` samples after the previous one, so
+    the last ``overlap`` samples of a block are carried over into the next. The
+    final block may be shorter than ``block_size``.
+
+    Args:
+        filepath (str | Path): Path to the track.
+        sample_rate (int): Rate the samples are resampled to.
+        block_size (int): Number of samples per block.
+        overlap (int): Number of samples shared by consecutive blocks.
+        offset (float): Seconds into the track decoding starts at.
+        duration (float, Optional): Seconds to decode, until the end if not given.
+        pad (int): Number of zeros added before the first and after the last
+            sample, as a centered STFT of the whole signal would.
+
+    Raises:
+        ValueError: If the overlap isn't smaller than the block size.
+    """
+    if not 0 <= overlap < block_size:
+        raise ValueError("overlap must be at least 0 and smaller than block_size")
+
+    buffer = np.empty(block_size, dtype=np.float32)
+    filled = 0
+    emitted = False
+    padding = np.zeros(pad, dtype=np.float32)
+    chunks = decode(filepath, sample_rate, offset, duration)
+    for chunk in chain([padding], chunks, [padding]):
+        while len(chunk):
+            taken = min(block_size - filled, len(chunk))
+            buffer[filled : filled + taken] = chunk[:taken]
+            filled += taken
+            chunk = chunk[taken:]
+            if filled == block_size:
+                yield buffer.copy()
+                emitted = True
+                buffer[:overlap] = buffer[block_size - overlap :]
+                filled = overlap
+
+    # Emit the remainder unless it's only the overlap of an emitted block
+    if filled > (overlap if emitted else 0):
+        yield buffer[:filled].copy()
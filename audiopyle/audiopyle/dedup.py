@@ -0,0 +1,170 @@
+"""Duplicate detection by audio content.
+
+Files are compared by their audio payload only, with ID3 and APE tags
+excluded, so copies that were retagged or renamed are still found. The first
+pass groups files by payload size using nothing but tag headers; only files
+sharing a payload size with another file are hashed in the second pass.
+"""
+
+import hashlib
+import mmap
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from audiopyle import cache, id3, organizer
+
+# Bytes hashed per update, large enough for hashlib to release the GIL
+HASH_BLOCK_SIZE: int = 1 << 20
+
+
+@dataclass
+class DuplicateGroup:
+    """Files sharing the same audio payload.
+
+    Args:
+        digest (str): BLAKE2b digest of the payload.
+        payload_size (int): Size of the payload in bytes.
+        files (list[Path]): Files with this payload, sorted by path.
+    """
+
+    digest: str
+    payload_size: int
+    files: list[Path] = field(default_factory=list)
+
+    @property
+    def original(self) -> Path:
+        """The copy that is kept, the first by path."""
+        return self.files[0]
+
+    @property
+    def duplicates(self) -> list[Path]:
+        """Every copy but the original."""
+        return self.files[1:]
+
+    @property
+    def wasted_bytes(self) -> int:
+        """Payload bytes stored more than once."""
+        return self.payload_size * len(self.duplicates)
+
+
+def hash_payload(filepath: str | Path, start: int, end: int) -> str:
+    """Hashes the byte range ``[start, end)`` of a file through a memory map."""
+    digest = hashlib.blake2b(digest_size=20)
+    if end > start:
+        with open(filepath, "rb") as fh, mmap.mmap(
+            fh.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(start, end, HASH_BLOCK_SIZE):
+                    digest.update(view[offset : min(offset + HASH_BLOCK_SIZE, end)])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def find_duplicates(
+    filepaths: Iterable[str | Path],
+    workers: int = 8,
+    hash_cache: cache.HashCache | None = None,
+) -> list[DuplicateGroup]:
+    """Finds groups of files with identical audio payloads.
+
+    Files that can't be read in either pass are skipped.
+
+    Args:
+        filepaths (Iterable[str | Path]): Files to compare.
+        workers (int): Number of threads hashing files.
+        hash_cache (cache.HashCache, Optional): Cache of digests from previous runs.
+
+    Returns:
+        list[DuplicateGroup]: Groups of two or more files, largest waste first.
+    """
+    by_size: dict[int, list[tuple[Path, int, int]]] = defaultdict(list)
+    for filepath in filepaths:
+        filepath = Path(filepath)
+        try:
+            start, end = id3.audio_bounds(filepath)
+        except OSError:
+            continue
+        by_size[end - start].append((filepath, start, end))
+
+    candidates = [
+        entry for entries in by_size.values() if len(entries) > 1 for entry in entries
+    ]
+
+    digests: dict[Path, str] = {}
+    to_hash = []
+    stats = {}
+    for filepath, start, end in candidates:
+        if hash_cache is not None:
+            try:
+                stats[filepath] = filepath.stat()
+            except OSError:
+                continue
+            digest = hash_cache.get(os.path.abspath(filepath), stats[filepath])
+            if digest is not None:
+                digests[filepath] = digest
+                continue
+        to_hash.append((filepath, start, end))
+
+    def _hash(entry):
+        try:
+            return hash_payload(*entry)
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for (filepath, _, _), digest in zip(to_hash, pool.map(_hash, to_hash)):
+            if digest is not None:
+                digests[filepath] = digest
+
+    if hash_cache is not None:
+        hash_cache.put_many(
+            (os.path.abspath(filepath), stats[filepath], digests[filepath])
+            for filepath, _, _ in to_hash
+            if filepath in digests
+        )
+
+    groups: dict[tuple[int, str], DuplicateGroup] = {}
+    for filepath, start, end in candidates:
+        if filepath not in digests:
+            continue
+        key = (end - start, digests[filepath])
+        group = groups.setdefault(
+            key, DuplicateGroup(digest=key[1], payload_size=key[0])
+        )
+        group.files.append(filepath)
+
+    duplicates = [group for group in groups.values() if len(group.files) > 1]
+    for group in duplicates:
+        group.files.sort()
+    return sorted(duplicates, key=lambda group: (-group.wasted_bytes, group.original))
+
+
+def plan_duplicate_moves(
+    groups: Iterable[DuplicateGroup], quarantine_directory: str | Path
+) -> organizer.MovePlan:
+    """Plans moving every duplicate (but not the original) into a quarantine directory.
+
+    Each group's duplicates are placed in a subdirectory named after the group's
+    digest, so copies sharing a filename don't collide. Execute the plan with
+    ``organizer.execute_plan``.
+    """
+    quarantine_directory = Path(quarantine_directory).resolve()
+    plan = organizer.MovePlan()
+    for group in groups:
+        directory = quarantine_directory / group.digest[:16]
+        claimed = set()
+        for i, source in enumerate(group.duplicates):
+            name = source.name if source.name not in claimed else f"{i} - {source.name}"
+            claimed.add(name)
+            plan.moves.append(
+                organizer.Move(source=source.resolve(), target=directory / name)
+            )
+        plan.directories.add(directory)
+    return plan
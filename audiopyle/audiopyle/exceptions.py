@@ -1 +1,13 @@
 """Exceptions for audiopyle module"""
+
+
+class MetadataError(Exception):
+    """Raised when a file's metadata cannot be parsed natively."""
+
+
+class DecodeError(Exception):
+    """Raised when a track's audio cannot be decoded or holds nothing to analyze."""
+
+
+class SnapshotError(Exception):
+    """Raised when a file is not an audiopyle library snapshot."""
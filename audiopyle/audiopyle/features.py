@@ -0,0 +1,295 @@
+"""Library-wide audio feature extraction.
+
+Tracks are decoded to mono at a fixed analysis rate and split into fixed-length
+segments. For each segment the mean MFCCs, delta MFCCs, spectral centroid,
+spectral roll-off and tempo are computed, then the segments are pooled into a
+single vector per track (the mean and standard deviation of every feature over
+the segments, see "Aggregate Features" in dev.md).
+
+With ``FeatureConfig.streaming`` tracks are instead decoded a segment at a time
+and pooled with running statistics, so memory use doesn't grow with the length
+of the track. Selecting windows (skipping the intro/outro, sampling a number of
+segments) always streams, decoding only the selected parts.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable
+
+import librosa
+import numpy as np
+
+from audiopyle import builtins, core, decoding
+from audiopyle.exceptions import DecodeError
+
+
+@dataclass(frozen=True)
+class FeatureConfig:
+    """Parameters of the feature extraction.
+
+    Args:
+        sample_rate (int): Rate tracks are resampled to before analysis.
+        segment_seconds (float): Length of the segments features are computed over.
+        n_mfcc (int): Number of MFCCs per frame.
+        n_fft (int): FFT window size.
+        hop_length (int): Number of samples between frames.
+        streaming (bool): Decode and analyze tracks a segment at a time.
+        skip_intro_seconds (float): Seconds skipped at the start of a track.
+        skip_outro_seconds (float): Seconds skipped at the end of a track.
+        n_segments (int, Optional): Analyze only this many segments, spread evenly
+            over the track, rather than all of it.
+    """
+
+    sample_rate: int = 22050
+    segment_seconds: float = 10.0
+    n_mfcc: int = 13
+    n_fft: int = 2048
+    hop_length: int = 512
+    streaming: bool = False
+    skip_intro_seconds: float = 0.0
+    skip_outro_seconds: float = 0.0
+    n_segments: int | None = None
+
+    @property
+    def windowed(self) -> bool:
+        """Whether only parts of a track are analyzed."""
+        return bool(
+            self.skip_intro_seconds or self.skip_outro_seconds or self.n_segments
+        )
+
+    @property
+    def frames_per_segment(self) -> int:
+        """Number of spectrogram frames in a segment."""
+        return max(int(self.segment_seconds * self.sample_rate / self.hop_length), 1)
+
+    @property
+    def segment_feature_names(self) -> list[str]:
+        """Names of the features computed for each segment."""
+        return (
+            [f"mfcc_{i}" for i in range(self.n_mfcc)]
+            + [f"delta_mfcc_{i}" for i in range(self.n_mfcc)]
+            + ["spectral_centroid", "spectral_rolloff", "tempo"]
+        )
+
+    @property
+    def feature_names(self) -> list[str]:
+        """Names of the pooled features, in the order of a track's feature vector."""
+        names = self.segment_feature_names
+        return [f"{name}_mean" for name in names] + [f"{name}_std" for name in names]
+
+
+def _frame_features(
+    signal: np.ndarray, config: FeatureConfig, center: bool = True
+) -> tuple[np.ndarray, np.ndarray]:
+    """Computes per-frame features and the onset envelope of a mono signal.
+
+    With ``center`` the signal is zero-padded so frames are centered on multiples
+    of the hop length, otherwise the first frame starts at the first sample.
+    """
+    sr, hop = config.sample_rate, config.hop_length
+    if len(signal) < config.n_fft:
+        signal = np.pad(signal, (0, config.n_fft - len(signal)))
+
+    magnitude = np.abs(
+        librosa.stft(signal, n_fft=config.n_fft, hop_length=hop, center=center)
+    )
+    mel_db = librosa.power_to_db(
+        librosa.feature.melspectrogram(S=magnitude**2, sr=sr)
+    )
+    mfcc = librosa.feature.mfcc(S=mel_db, n_mfcc=config.n_mfcc)
+    if mfcc.shape[1] >= 3:
+        delta = librosa.feature.delta(mfcc, width=min(9, _odd_floor(mfcc.shape[1])))
+    else:
+        # Too few frames for a difference, e.g. the tail of a streamed track
+        delta = np.zeros_like(mfcc)
+    centroid = librosa.feature.spectral_centroid(S=magnitude, sr=sr)
+    rolloff = librosa.feature.spectral_rolloff(S=magnitude, sr=sr)
+    onset_envelope = librosa.onset.onset_strength(S=mel_db, sr=sr)
+
+    return np.vstack([mfcc, delta, centroid, rolloff]), onset_envelope
+
+
+def _segment_row(
+    frames: np.ndarray, onset_envelope: np.ndarray, config: FeatureConfig
+) -> np.ndarray:
+    """Summarizes the frames of one segment as their means and the segment's tempo."""
+    tempo = librosa.feature.tempo(
+        onset_envelope=onset_envelope,
+        sr=config.sample_rate,
+        hop_length=config.hop_length,
+    )[0]
+    return np.append(frames.mean(axis=1), tempo)
+
+
+def segment_features(signal: np.ndarray, config: FeatureConfig) -> np.ndarray:
+    """Computes features for each segment of a mono signal.
+
+    The spectrogram is computed once for the whole signal and its frames are
+    split into segments, a trailing partial segment is kept.
+
+    Returns:
+        np.ndarray: Array of shape (segments, len(config.segment_feature_names)).
+    """
+    frames, onset_envelope = _frame_features(signal, config)
+    n_frames, step = frames.shape[1], config.frames_per_segment
+
+    segments = [
+        _segment_row(
+            frames[:, start : start + step],
+            onset_envelope[start : start + step],
+            config,
+        )
+        for start in range(0, n_frames, step)
+    ]
+    return np.asarray(segments, dtype=np.float32)
+
+
+def _odd_floor(n: int) -> int:
+    """Largest odd number <= n, at least 3 (the smallest delta width)."""
+    return max(n - (1 - n % 2), 3)
+
+
+def pool_segments(segments: np.ndarray) -> np.ndarray:
+    """Pools per-segment features into one vector of their means followed by their standard deviations."""
+    return np.concatenate([segments.mean(axis=0), segments.std(axis=0)]).astype(
+        np.float32
+    )
+
+
+class RunningPool:
+    """Pools segment features as they arrive, keeping only running statistics.
+
+    Uses Welford's algorithm, so ``vector`` matches ``pool_segments`` over all
+    the segments added without holding on to them.
+    """
+
+    def __init__(self, n_features: int):
+        self.count = 0
+        self._mean = np.zeros(n_features, dtype=np.float64)
+        self._m2 = np.zeros(n_features, dtype=np.float64)
+
+    def add(self, row: np.ndarray) -> None:
+        """Adds one segment's features."""
+        self.count += 1
+        delta = row - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (row - self._mean)
+
+    @property
+    def vector(self) -> np.ndarray:
+        """The means followed by the standard deviations of the segments so far."""
+        std = np.sqrt(self._m2 / max(self.count, 1))
+        return np.concatenate([self._mean, std]).astype(np.float32)
+
+
+def stream_features(
+    filepath: str | Path, config: FeatureConfig = FeatureConfig()
+) -> np.ndarray:
+    """Decodes a track a segment at a time and returns its pooled feature vector.
+
+    Consecutive blocks overlap by ``n_fft - hop_length`` samples carried over from
+    one to the next and are analyzed uncentered, so every block covers exactly the
+    spectrogram frames of its segment in the whole signal. The result approximates,
+    rather than reproduces, the whole-file path: ``power_to_db`` clips to ``top_db``
+    below each block's own peak rather than the track's, and the MFCC deltas and
+    onset envelope (and so the tempo) differ near block boundaries. Only the
+    selected windows of the track are decoded, see ``FeatureConfig.windowed``.
+
+    Raises:
+        DecodeError: If no part of the track is left to analyze.
+    """
+    sr = config.sample_rate
+    segment_samples = config.frames_per_segment * config.hop_length
+    overlap = config.n_fft - config.hop_length
+
+    windows: list[tuple[float, float | None]] = [(0.0, None)]
+    if config.windowed:
+        windows = [
+            (window.offset, window.duration)
+            for window in decoding.select_windows(
+                decoding.get_duration(filepath),
+                config.segment_seconds,
+                config.skip_intro_seconds,
+                config.skip_outro_seconds,
+                config.n_segments,
+            )
+        ]
+
+    pool = RunningPool(len(config.segment_feature_names))
+    for offset, duration in windows:
+        for block in decoding.stream_blocks(
+            filepath,
+            sample_rate=sr,
+            block_size=segment_samples + overlap,
+            overlap=overlap,
+            offset=offset,
+            duration=duration,
+            pad=config.n_fft // 2,
+        ):
+            frames, onset_envelope = _frame_features(block, config, center=False)
+            pool.add(_segment_row(frames, onset_envelope, config))
+
+    if not pool.count:
+        raise DecodeError(f"Nothing to analyze in {filepath}")
+    return pool.vector
+
+
+def extract_features(
+    filepath: str | Path, config: FeatureConfig = FeatureConfig()
+) -> np.ndarray:
+    """Decodes a track at the analysis rate and returns its pooled feature vector."""
+    if config.streaming or config.windowed:
+        return stream_features(filepath, config)
+    signal, _ = librosa.load(filepath, sr=config.sample_rate, mono=True)
+    return pool_segments(segment_features(signal, config))
+
+
+def _extract_or_none(filepath: str, config: FeatureConfig) -> np.ndarray | None:
+    """Extracts features, returning None for tracks that can't be decoded.
+
+    Only ``decoding.DECODE_ERRORS`` mean a track is undecodable, anything else is
+    logged and raised.
+    """
+    try:
+        return extract_features(filepath, config)
+    except decoding.DECODE_ERRORS:
+        return None
+    except Exception:
+        logger = builtins.get_or_configure_logger(__name__)
+        logger.exception(f"Unexpected error extracting features from {filepath}")
+        raise
+
+
+def extract_library(
+    files: Iterable[core.File | str | Path],
+    config: FeatureConfig = FeatureConfig(),
+    workers: int = 4,
+    chunk_size: int = 8,
+) -> dict[str, np.ndarray | None]:
+    """Extracts pooled feature vectors for many tracks across a process pool.
+
+    Args:
+        files (Iterable[core.File | str | Path]): Tracks, as file objects or paths.
+        config (FeatureConfig): Feature extraction parameters.
+        workers (int): Number of processes, extracts serially when 1.
+        chunk_size (int): Number of tracks handed to a process at a time.
+
+    Returns:
+        dict[str, np.ndarray | None]: Feature vectors keyed by filepath, in input
+            order. None for tracks that couldn't be decoded.
+    """
+    filepaths = [
+        str(file._filepath) if isinstance(file, core.File) else str(file)
+        for file in files
+    ]
+    if workers <= 1:
+        vectors = map(_extract_or_none, filepaths, repeat(config))
+        return dict(zip(filepaths, vectors))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        vectors = pool.map(
+            _extract_or_none, filepaths, repeat(config), chunksize=chunk_size
+        )
+        return dict(zip(filepaths, vectors))
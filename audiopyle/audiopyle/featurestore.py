@@ -0,0 +1,362 @@
+"""On-disk store of the library's feature vectors.
+
+Vectors are kept as the rows of a single float32 matrix in ``features.npy``,
+which is memory-mapped rather than read, so loading the matrix for the whole
+library costs the same no matter how many tracks it holds. A SQLite index
+beside it maps each row to its track: the track's path, the digest of its
+audio payload (see ``dedup.hash_payload``) and optionally its ``audio.Audio``
+record. The size and modification time of the file the digest was taken from
+are stored too, so files that haven't changed aren't read again.
+
+The matrix is allocated with spare rows and doubled when full, so appending a
+few tracks after an incremental run doesn't rewrite it. Rows stay contiguous:
+removing a track moves the last row into its place.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from audiopyle import audio, cache, core, dedup, features, id3
+
+# Rows allocated when the matrix is created
+INITIAL_CAPACITY: int = 1024
+
+
+@dataclass
+class FeatureEntry:
+    """A track's row in the feature matrix.
+
+    Args:
+        row (int): Index of the track's vector in the matrix.
+        path (str): Absolute path to the track.
+        digest (str): Digest of the track's audio payload.
+        record (audio.Audio, Optional): Metadata of the track.
+    """
+
+    row: int
+    path: str
+    digest: str
+    record: audio.Audio | None = None
+
+
+def content_digest(filepath: str | Path) -> str:
+    """Digests the audio payload of a track, ignoring its tags."""
+    return dedup.hash_payload(filepath, *id3.audio_bounds(filepath))
+
+
+class FeatureStore(cache.FileTable):
+    """Feature vectors of a library in a memory-mapped matrix, keyed by track.
+
+    A track is identified by its path and the digest of its audio payload, a
+    vector stored for a path whose audio has since changed is considered stale.
+
+    Args:
+        directory (str | Path): Directory holding the matrix and its index, created
+            if it doesn't exist.
+    """
+
+    table = "features"
+    schema = """
+        path TEXT PRIMARY KEY,
+        row INTEGER UNIQUE NOT NULL,
+        digest TEXT NOT NULL,
+        size INTEGER,
+        mtime_ns INTEGER,
+        record TEXT
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.matrix_path = self.directory / "features.npy"
+        super().__init__(self.directory / "index.sqlite")
+
+    @property
+    def dimensions(self) -> int | None:
+        """Length of the stored vectors, None while the store is empty."""
+        if not self.matrix_path.exists():
+            return None
+        return np.load(self.matrix_path, mmap_mode="r").shape[1]
+
+    def __contains__(self, filepath: str | Path) -> bool:
+        query = "SELECT 1 FROM features WHERE path = ?"
+        return self._connection.execute(query, (str(filepath),)).fetchone() is not None
+
+    def entries(self) -> list[FeatureEntry]:
+        """Returns the index, ordered by row."""
+        rows = self._connection.execute(
+            "SELECT row, path, digest, record FROM features ORDER BY row"
+        )
+        return [
+            FeatureEntry(
+                row, path, digest, audio.Audio(**json.loads(record)) if record else None
+            )
+            for row, path, digest, record in rows
+        ]
+
+    def load(self) -> tuple[np.ndarray, list[FeatureEntry]]:
+        """Maps the feature matrix into memory without reading it.
+
+        Returns:
+            tuple[np.ndarray, list[FeatureEntry]]: A read-only view of the matrix,
+                one row per track, and the index entry of every row.
+        """
+        entries = self.entries()
+        if not self.matrix_path.exists():
+            return np.empty((0, 0), dtype=np.float32), entries
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        return matrix[: len(entries)], entries
+
+    def get(self, filepath: str | Path, digest: str | None = None) -> np.ndarray | None:
+        """Returns a copy of a track's vector.
+
+        Args:
+            filepath (str | Path): Absolute path to the track.
+            digest (str, Optional): Current digest of the track's audio payload, the
+                stored vector is only returned if it matches.
+
+        Returns:
+            np.ndarray | None: The vector, or None if it is missing or stale.
+        """
+        row = self._connection.execute(
+            "SELECT row, digest FROM features WHERE path = ?", (str(filepath),)
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+        if digest is not None and row[1] != digest:
+            self.stats.invalidated += 1
+            return None
+
+        self.stats.hits += 1
+        return np.array(np.load(self.matrix_path, mmap_mode="r")[row[0]])
+
+    def pending(
+        self, filepaths: Iterable[str | Path], workers: int = 8
+    ) -> dict[str, tuple[os.stat_result, str]]:
+        """Finds tracks that have no vector yet, or whose audio has changed since.
+
+        Only files whose size or modification time differ from the stored ones
+        are digested. Those whose audio turns out unchanged, i.e after a tag edit,
+        have their stored size and modification time refreshed.
+
+        Args:
+            filepaths (Iterable[str | Path]): Absolute paths to the tracks.
+            workers (int): Number of threads digesting tracks.
+
+        Returns:
+            dict[str, tuple[os.stat_result, str]]: Current stat and payload digest
+                of the tracks that need their features extracted, keyed by path.
+        """
+        stored = {
+            path: (digest, (size, mtime_ns))
+            for path, digest, size, mtime_ns in self._connection.execute(
+                "SELECT path, digest, size, mtime_ns FROM features"
+            )
+        }
+        file_stats = {str(filepath): os.stat(filepath) for filepath in filepaths}
+        changed = [
+            filepath
+            for filepath, stat in file_stats.items()
+            if filepath not in stored
+            or stored[filepath][1] != (stat.st_size, stat.st_mtime_ns)
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            digests = dict(zip(changed, pool.map(content_digest, changed)))
+
+        pending, touched = {}, []
+        for filepath, digest in digests.items():
+            stat = file_stats[filepath]
+            if filepath in stored and stored[filepath][0] == digest:
+                touched.append((stat.st_size, stat.st_mtime_ns, filepath))
+            else:
+                pending[filepath] = (stat, digest)
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE features SET size = ?, mtime_ns = ? WHERE path = ?", touched
+            )
+        return pending
+
+    def put_many(
+        self,
+        entries: Iterable[
+            tuple[str, os.stat_result | None, str, np.ndarray, audio.Audio | None]
+        ],
+    ) -> None:
+        """Inserts or replaces the vectors of many tracks.
+
+        Tracks already in the store are updated in place, new ones are appended.
+
+        Args:
+            entries (Iterable[tuple[str, os.stat_result | None, str, np.ndarray, audio.Audio | None]]):
+                The path, stat, payload digest, feature vector and metadata of each
+                track. Without a stat the track is digested again by ``pending``.
+
+        Raises:
+            ValueError: If a vector's length doesn't match the stored vectors.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+
+        # Checked before any row is written so a bad batch leaves the store untouched
+        dimensions = self.dimensions or len(entries[0][3])
+        for filepath, _, _, vector, _ in entries:
+            if len(vector) != dimensions:
+                raise ValueError(
+                    f"Vector of {filepath} has {len(vector)} features, "
+                    f"the store holds {dimensions}"
+                )
+
+        rows = dict(self._connection.execute("SELECT path, row FROM features"))
+        n_rows = len(rows)
+        for filepath, *_ in entries:
+            if filepath not in rows:
+                rows[filepath] = n_rows
+                n_rows += 1
+
+        matrix = self._reserve(n_rows, dimensions)
+        for filepath, _, _, vector, _ in entries:
+            matrix[rows[filepath]] = vector
+        matrix.flush()
+        del matrix
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        filepath,
+                        rows[filepath],
+                        digest,
+                        stat.st_size if stat else None,
+                        stat.st_mtime_ns if stat else None,
+                        json.dumps(asdict(record), default=str) if record else None,
+                    )
+                    for filepath, stat, digest, _, record in entries
+                ),
+            )
+
+    def put(
+        self,
+        filepath: str,
+        digest: str,
+        vector: np.ndarray,
+        record: audio.Audio | None = None,
+        stat: os.stat_result | None = None,
+    ) -> None:
+        """Inserts or replaces the vector of a single track."""
+        self.put_many([(filepath, stat, digest, vector, record)])
+
+    def remove(self, filepaths: Iterable[str]) -> int:
+        """Removes tracks, moving the last rows into the rows they free.
+
+        Returns:
+            int: Number of tracks removed.
+        """
+        rows = dict(self._connection.execute("SELECT path, row FROM features"))
+        removed = [path for path in set(filepaths) if path in rows]
+        freed = sorted(rows.pop(path) for path in removed)
+        if not freed:
+            return 0
+
+        by_row = {row: path for path, row in rows.items()}
+        n_rows = len(rows)
+        moves = []
+        tail = sorted((row for row in by_row if row >= n_rows), reverse=True)
+        for target in (row for row in freed if row < n_rows):
+            source = tail.pop()
+            moves.append((by_row[source], source, target))
+
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM features WHERE path = ?", ((path,) for path in removed)
+            )
+            if moves:
+                matrix = np.load(self.matrix_path, mmap_mode="r+")
+                for _, source, target in moves:
+                    matrix[target] = matrix[source]
+                matrix.flush()
+                del matrix
+                self._connection.executemany(
+                    "UPDATE features SET row = ? WHERE path = ?",
+                    ((target, path) for path, _, target in moves),
+                )
+
+        self.stats.removed += len(freed)
+        return len(freed)
+
+    def _reserve(self, n_rows: int, dimensions: int) -> np.memmap:
+        """Opens the matrix for writing with room for at least ``n_rows`` rows.
+
+        When the matrix is full it is copied into one twice its size, which then
+        replaces it.
+        """
+        if not self.matrix_path.exists():
+            return np.lib.format.open_memmap(
+                self.matrix_path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(max(n_rows, INITIAL_CAPACITY), dimensions),
+            )
+
+        matrix = np.load(self.matrix_path, mmap_mode="r+")
+        if n_rows <= matrix.shape[0]:
+            return matrix
+
+        capacity = matrix.shape[0]
+        while capacity < n_rows:
+            capacity *= 2
+        staging = self.matrix_path.with_suffix(".npy.tmp")
+        grown = np.lib.format.open_memmap(
+            staging, mode="w+", dtype=np.float32, shape=(capacity, matrix.shape[1])
+        )
+        grown[: matrix.shape[0]] = matrix
+        grown.flush()
+        del grown, matrix
+        os.replace(staging, self.matrix_path)
+        return np.load(self.matrix_path, mmap_mode="r+")
+
+
+def update_store(
+    store: FeatureStore,
+    files: Iterable[core.File | str | Path],
+    config: features.FeatureConfig = features.FeatureConfig(),
+    workers: int = 4,
+) -> int:
+    """Extracts features for the tracks that are new or changed since the last run.
+
+    Args:
+        store (FeatureStore): Store the vectors are written to.
+        files (Iterable[core.File | str | Path]): Tracks, as file objects or paths.
+            Metadata is stored alongside the vectors of ``audio.Audio`` objects.
+        config (features.FeatureConfig): Feature extraction parameters.
+        workers (int): Number of processes extracting features.
+
+    Returns:
+        int: Number of vectors written. Tracks that can't be decoded are skipped.
+    """
+    records = {}
+    for file in files:
+        if isinstance(file, core.File):
+            record = file if isinstance(file, audio.Audio) else None
+            records[str(file._filepath)] = record
+        else:
+            records[str(Path(file).resolve())] = None
+
+    pending = store.pending(records)
+    vectors = features.extract_library(list(pending), config, workers=workers)
+    entries = [
+        (filepath, *pending[filepath], vector, records[filepath])
+        for filepath, vector in vectors.items()
+        if vector is not None
+    ]
+    store.put_many(entries)
+    return len(entries)
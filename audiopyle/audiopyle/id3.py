@@ -0,0 +1,492 @@
+"""Native ID3 tag and MPEG header parsing.
+
+Reads ID3v1 and ID3v2.3/2.4 tags along with the MPEG audio header (including
+Xing/Info and VBRI headers) directly from the file, returning a dictionary
+shaped like ``pydub.utils.mediainfo`` so it can be used as a drop-in metadata
+backend. Only the tag header, the wanted text frames, the first audio frame
+and the trailing ID3v1 block are read; large frames such as attached pictures
+are skipped with a seek. Attached pictures are only read by ``read_pictures``.
+"""
+
+import io
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Container, Iterator
+
+from audiopyle.exceptions import MetadataError
+
+# Number of bytes scanned after the ID3v2 tag when looking for the first MPEG frame
+FRAME_SEARCH_WINDOW: int = 8192
+
+ID3V1_SIZE: int = 128
+
+APE_FOOTER_SIZE: int = 32
+
+# ID3v2 frame id -> mediainfo tag name
+FRAME_TAGS: dict = {
+    "TIT2": "title",
+    "TALB": "album",
+    "TPE1": "artist",
+    "TPE2": "album_artist",
+    "TDRC": "date",
+    "TYER": "date",
+    "TCON": "genre",
+    "TRCK": "track",
+    "TPOS": "disc",
+    "TPUB": "publisher",
+    "TBPM": "TBPM",
+    "TKEY": "TKEY",
+    "TENC": "encoded_by",
+    "TSSE": "encoder",
+}
+
+TEXT_ENCODINGS: dict = {
+    0: "latin-1",
+    1: "utf-16",
+    2: "utf-16-be",
+    3: "utf-8",
+}
+
+# (MPEG version, layer) -> bitrates in kbps, indexed by the header's bitrate index
+BITRATES: dict = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+SAMPLE_RATES: dict = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+# Header version bits -> MPEG version
+MPEG_VERSIONS: dict = {0: 2.5, 2: 2, 3: 1}
+
+
+# APIC picture type of the front cover
+FRONT_COVER: int = 3
+
+
+@dataclass
+class Picture:
+    """An attached picture (APIC frame).
+
+    Args:
+        mime (str): MIME type of the image, i.e ``"image/jpeg"``.
+        picture_type (int): What the picture shows, 3 (``FRONT_COVER``) for a front cover.
+        description (str): Description of the picture.
+        data (bytes): The image file.
+    """
+
+    mime: str
+    picture_type: int
+    description: str
+    data: bytes
+
+
+@dataclass
+class MPEGHeader:
+    """Representation of a single MPEG audio frame header."""
+
+    offset: int
+    version: float
+    layer: int
+    bit_rate: int
+    sample_rate: int
+    channels: int
+    frame_length: int
+    samples_per_frame: int
+
+    @property
+    def side_info_size(self) -> int:
+        """Size of the Layer III side information following the header."""
+        if self.version == 1:
+            return 17 if self.channels == 1 else 32
+        return 9 if self.channels == 1 else 17
+
+
+def _syncsafe(data: bytes) -> int:
+    """Decodes a 28-bit syncsafe integer."""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _unsynchronise(data: bytes) -> bytes:
+    """Reverses ID3v2 unsynchronisation."""
+    return data.replace(b"\xff\x00", b"\xff")
+
+
+def _decode_text(data: bytes) -> str:
+    """Decodes an ID3v2 text frame payload (encoding byte followed by text)."""
+    if not data:
+        return ""
+    encoding = TEXT_ENCODINGS.get(data[0])
+    if encoding is None:
+        raise MetadataError(f"Unknown text encoding: {data[0]}")
+    text = data[1:].decode(encoding, errors="replace")
+    # ID3v2.4 allows multiple null separated values
+    values = [value for value in text.split("\x00") if value]
+    return ";".join(values)
+
+
+def _decode_comment(data: bytes) -> tuple[str, str]:
+    """Decodes a COMM frame into its (description, text) pair."""
+    if len(data) < 4:
+        raise MetadataError("COMM frame is too short")
+    encoding = TEXT_ENCODINGS.get(data[0])
+    if encoding is None:
+        raise MetadataError(f"Unknown text encoding: {data[0]}")
+
+    body = data[4:]
+    terminator = b"\x00\x00" if data[0] in (1, 2) else b"\x00"
+    index = body.find(terminator)
+    # UTF-16 terminators must be aligned to a code unit
+    while len(terminator) == 2 and index != -1 and index % 2:
+        index = body.find(terminator, index + 1)
+    if index == -1:
+        return "", body.decode(encoding, errors="replace").strip("\x00")
+
+    description = body[:index].decode(encoding, errors="replace")
+    text = body[index + len(terminator) :].decode(encoding, errors="replace")
+    return description, text.strip("\x00")
+
+
+def _iter_frames(
+    fh: BinaryIO, wanted: Container[str]
+) -> tuple[Iterator[tuple[str, bytes]], int]:
+    """Reads the frames of the ID3v2 tag at the start of a file.
+
+    Frames that aren't wanted, and compressed or encrypted ones, are skipped with
+    a seek rather than read.
+
+    Returns:
+        tuple[Iterator[tuple[str, bytes]], int]: The id and decoded payload of
+            each wanted frame, and the offset where the tag ends (0 if there is none).
+    """
+    fh.seek(0)
+    header = fh.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return iter(()), 0
+
+    major, flags = header[3], header[5]
+    if major not in (3, 4):
+        raise MetadataError(f"Unsupported ID3v2 version: 2.{major}")
+    if any(byte & 0x80 for byte in header[6:10]):
+        raise MetadataError("Invalid ID3v2 tag size")
+
+    tag_size = _syncsafe(header[6:10])
+    tag_end = 10 + tag_size + (10 if major == 4 and flags & 0x10 else 0)
+
+    reader: BinaryIO = fh
+    position, end = 10, 10 + tag_size
+    if major == 3 and flags & 0x80:
+        # Tag-wide unsynchronisation, the whole tag has to be decoded up front
+        reader = io.BytesIO(b"\x00" * 10 + _unsynchronise(fh.read(tag_size)))
+        end = len(reader.getvalue())
+
+    if flags & 0x40:
+        reader.seek(position)
+        raw_size = reader.read(4)
+        if len(raw_size) < 4:
+            raise MetadataError("Truncated ID3v2 extended header")
+        if major == 4:
+            position += _syncsafe(raw_size)
+        else:
+            position += struct.unpack(">I", raw_size)[0] + 4
+
+    def frames(position: int) -> Iterator[tuple[str, bytes]]:
+        while position + 10 <= end:
+            reader.seek(position)
+            frame_header = reader.read(10)
+            frame_id = frame_header[:4]
+            if len(frame_header) < 10 or frame_id[0] == 0:
+                # Reached the padding
+                break
+            if major == 4:
+                frame_size = _syncsafe(frame_header[4:8])
+            else:
+                frame_size = struct.unpack(">I", frame_header[4:8])[0]
+            position += 10 + frame_size
+            if position > end:
+                raise MetadataError(f"Frame {frame_id!r} overruns the ID3v2 tag")
+
+            frame_id = frame_id.decode("latin-1")
+            if frame_id not in wanted:
+                continue
+
+            format_flags = frame_header[9]
+            if major == 4:
+                compressed, encrypted = format_flags & 0x08, format_flags & 0x04
+            else:
+                compressed, encrypted = format_flags & 0x80, format_flags & 0x40
+            if compressed or encrypted:
+                continue
+
+            data = reader.read(frame_size)
+            if major == 4:
+                if format_flags & 0x02:
+                    data = _unsynchronise(data)
+                if format_flags & 0x01:
+                    # Skip the data length indicator
+                    data = data[4:]
+            yield frame_id, data
+
+    return frames(position), tag_end
+
+
+def _decode_picture(data: bytes) -> Picture:
+    """Decodes an APIC frame payload."""
+    encoding = TEXT_ENCODINGS.get(data[0]) if data else None
+    if encoding is None:
+        raise MetadataError("Invalid APIC frame")
+    mime_end = data.find(b"\x00", 1)
+    if mime_end == -1 or mime_end + 1 >= len(data):
+        raise MetadataError("APIC frame is too short")
+    mime = data[1:mime_end].decode("latin-1").lower()
+    picture_type = data[mime_end + 1]
+
+    body = data[mime_end + 2 :]
+    terminator = b"\x00\x00" if data[0] in (1, 2) else b"\x00"
+    index = body.find(terminator)
+    # UTF-16 terminators must be aligned to a code unit
+    while len(terminator) == 2 and index != -1 and index % 2:
+        index = body.find(terminator, index + 1)
+    if index == -1:
+        raise MetadataError("APIC frame has no picture data")
+
+    description = body[:index].decode(encoding, errors="replace")
+    if "/" not in mime:
+        # ID3v2.2 style image format, i.e "JPG"
+        mime = "image/jpeg" if mime in ("jpg", "jpeg") else f"image/{mime}"
+    return Picture(mime, picture_type, description, body[index + len(terminator) :])
+
+
+def _read_id3v2(fh: BinaryIO) -> tuple[dict, int]:
+    """Reads the ID3v2 tag at the start of a file.
+
+    Returns:
+        tuple[dict, int]: Tags by mediainfo name, and the offset where the tag ends.
+    """
+    frames, tag_end = _iter_frames(fh, FRAME_TAGS.keys() | {"COMM"})
+    tags: dict = {}
+    for frame_id, data in frames:
+        if frame_id == "COMM":
+            description, text = _decode_comment(data)
+            tags.setdefault(description or "comment", text)
+        else:
+            tags.setdefault(FRAME_TAGS[frame_id], _decode_text(data))
+
+    return tags, tag_end
+
+
+def _read_id3v1(fh: BinaryIO, file_size: int) -> dict | None:
+    """Reads the ID3v1 tag at the end of a file, returns None if there is none."""
+    if file_size < ID3V1_SIZE:
+        return None
+    fh.seek(file_size - ID3V1_SIZE)
+    data = fh.read(ID3V1_SIZE)
+    if data[:3] != b"TAG":
+        return None
+
+    def _field(raw: bytes) -> str:
+        return raw.split(b"\x00", 1)[0].decode("latin-1").strip()
+
+    tags = {
+        "title": _field(data[3:33]),
+        "artist": _field(data[33:63]),
+        "album": _field(data[63:93]),
+        "date": _field(data[93:97]),
+        "comment": _field(data[97:127]),
+    }
+    # ID3v1.1 stores the track number in the last byte of the comment
+    if data[125] == 0 and data[126] != 0:
+        tags["track"] = str(data[126])
+
+    return {key: value for key, value in tags.items() if value}
+
+
+def _parse_mpeg_header(data: bytes, offset: int) -> MPEGHeader | None:
+    """Parses the four bytes at ``offset`` as an MPEG frame header."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset : offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = MPEG_VERSIONS.get((b1 >> 3) & 0x03)
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version is None or layer == 4 or bitrate_index in (0, 15):
+        return None
+    if sample_rate_index == 3:
+        return None
+
+    bit_rate = BITRATES[(min(int(version), 2), layer)][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bit_rate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bit_rate // sample_rate + padding
+
+    return MPEGHeader(
+        offset=offset,
+        version=version,
+        layer=layer,
+        bit_rate=bit_rate,
+        sample_rate=sample_rate,
+        channels=channels,
+        frame_length=frame_length,
+        samples_per_frame=samples_per_frame,
+    )
+
+
+def _find_first_frame(fh: BinaryIO, data: bytes, base_offset: int) -> MPEGHeader:
+    """Finds the first MPEG frame in ``data``, confirmed by the frame following it.
+
+    The following frame header is read from ``fh`` when it lies past the end of
+    ``data``, so a candidate is never accepted on its own.
+    """
+    index = data.find(b"\xff")
+    while index != -1:
+        header = _parse_mpeg_header(data, index)
+        if header is not None:
+            following_offset = index + header.frame_length
+            if following_offset + 4 <= len(data):
+                following = _parse_mpeg_header(data, following_offset)
+            else:
+                fh.seek(base_offset + following_offset)
+                following = _parse_mpeg_header(fh.read(4), 0)
+            if following is not None:
+                header.offset += base_offset
+                return header
+        index = data.find(b"\xff", index + 1)
+    raise MetadataError("No MPEG audio frame found")
+
+
+def _read_vbr_header(data: bytes, header: MPEGHeader) -> tuple[int, int] | None:
+    """Reads the (frames, bytes) counts from a Xing/Info or VBRI header, if present."""
+    xing = 4 + header.side_info_size
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4 : xing + 8])[0]
+        position = xing + 8
+        frames = num_bytes = 0
+        if flags & 0x01:
+            frames = struct.unpack(">I", data[position : position + 4])[0]
+            position += 4
+        if flags & 0x02:
+            num_bytes = struct.unpack(">I", data[position : position + 4])[0]
+        return (frames, num_bytes) if frames else None
+
+    if data[36:40] == b"VBRI":
+        num_bytes, frames = struct.unpack(">II", data[46:54])
+        return (frames, num_bytes) if frames else None
+
+    return None
+
+
+def read_mediainfo(filepath: str | Path) -> dict:
+    """Reads the tags and stream information of an MP3 file.
+
+    Args:
+        filepath (str | Path): Path to the file.
+
+    Raises:
+        MetadataError: If the file has no parsable MPEG audio stream.
+
+    Returns:
+        dict: Metadata in the same shape as ``pydub.utils.mediainfo``.
+    """
+    file_size = os.path.getsize(filepath)
+    with open(filepath, "rb") as fh:
+        tags, audio_start = _read_id3v2(fh)
+        id3v1 = _read_id3v1(fh, file_size)
+
+        fh.seek(audio_start)
+        window = fh.read(FRAME_SEARCH_WINDOW)
+        header = _find_first_frame(fh, window, audio_start)
+
+    audio_end = file_size - (ID3V1_SIZE if id3v1 is not None else 0)
+    audio_size = max(audio_end - header.offset, 0)
+
+    frame = window[header.offset - audio_start :]
+    vbr = _read_vbr_header(frame, header)
+    if vbr is not None:
+        frames, num_bytes = vbr
+        duration = frames * header.samples_per_frame / header.sample_rate
+        bit_rate = int((num_bytes or audio_size) * 8 / duration) if duration else 0
+    else:
+        bit_rate = header.bit_rate
+        duration = audio_size * 8 / bit_rate
+
+    for key, value in (id3v1 or {}).items():
+        tags.setdefault(key, value)
+
+    return {
+        "format_name": "mp3",
+        "size": str(file_size),
+        "duration": f"{duration:.6f}",
+        "bit_rate": str(bit_rate),
+        "sample_rate": str(header.sample_rate),
+        "channels": str(header.channels),
+        "TAG": tags,
+    }
+
+
+def audio_bounds(filepath: str | Path) -> tuple[int, int]:
+    """Finds the byte range of a file's audio payload, excluding ID3v2, APEv2 and ID3v1 tags.
+
+    Only the tag headers and footers are read, so retagged copies of the same audio
+    share a payload without the file being read in full.
+
+    Returns:
+        tuple[int, int]: Start (inclusive) and end (exclusive) offsets of the payload.
+    """
+    file_size = os.path.getsize(filepath)
+    with open(filepath, "rb") as fh:
+        start = 0
+        header = fh.read(10)
+        if len(header) == 10 and header[:3] == b"ID3":
+            if not any(byte & 0x80 for byte in header[6:10]):
+                footer = 10 if header[3] == 4 and header[5] & 0x10 else 0
+                start = min(10 + _syncsafe(header[6:10]) + footer, file_size)
+
+        end = file_size
+        if end - start >= ID3V1_SIZE:
+            fh.seek(end - ID3V1_SIZE)
+            if fh.read(3) == b"TAG":
+                end -= ID3V1_SIZE
+
+        if end - start >= APE_FOOTER_SIZE:
+            fh.seek(end - APE_FOOTER_SIZE)
+            footer = fh.read(APE_FOOTER_SIZE)
+            if footer[:8] == b"APETAGEX":
+                # The size covers the items and footer, flags bit 31 marks a header
+                ape_size, flags = struct.unpack("<4xII", footer[8:20])
+                ape_size += APE_FOOTER_SIZE if flags & 0x80000000 else 0
+                end = max(end - ape_size, start)
+
+    return start, end
+
+
+def read_pictures(filepath: str | Path) -> list[Picture]:
+    """Reads the pictures attached to a file's ID3v2 tag, in tag order.
+
+    Only the APIC frames are read, every other frame is skipped with a seek.
+
+    Raises:
+        MetadataError: If the tag or a picture frame is malformed.
+    """
+    with open(filepath, "rb") as fh:
+        frames, _ = _iter_frames(fh, {"APIC"})
+        return [_decode_picture(data) for _, data in frames]
@@ -0,0 +1,237 @@
+"""Crash-safe journal of bulk file moves.
+
+The journal is an append-only file of JSON lines. Every move of a plan is
+written (and fsynced) before any file is touched, and a completion marker is
+appended as each move finishes. Completion markers are fsynced in groups rather
+than one at a time, so a crash may lose the last few markers; those moves are
+recognised on replay because their source is gone and their target exists.
+
+A crash in the middle of a move can also leave both files on disk: a source
+hard linked to its target but not yet unlinked, or a partial copy on another
+filesystem. Opening the journal finishes the former and removes the latter so
+the move is redone.
+"""
+
+import filecmp
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
+
+from audiopyle import organizer
+
+
+@dataclass
+class JournalState:
+    """Moves recorded in a journal.
+
+    Args:
+        planned (dict[int, organizer.Move]): Every planned move by id.
+        done (set[int]): Ids of moves with a completion marker.
+        rolled_back (bool): Whether the journal's moves have been rolled back.
+    """
+
+    planned: dict[int, organizer.Move] = field(default_factory=dict)
+    done: set[int] = field(default_factory=set)
+    rolled_back: bool = False
+
+    @property
+    def pending(self) -> list[organizer.Move]:
+        """Planned moves without a completion marker, in plan order."""
+        return [move for i, move in self.planned.items() if i not in self.done]
+
+
+class MoveJournal:
+    """Append-only, group committed journal of planned and completed moves.
+
+    Args:
+        journal_path (str | Path): Path to the journal, appended to if it exists.
+        group_size (int): Number of completion markers buffered between fsyncs.
+    """
+
+    def __init__(self, journal_path: str | Path, group_size: int = 256):
+        self.journal_path = Path(journal_path)
+        self.group_size = group_size
+        self.state = self.replay(self.journal_path)
+        self._recover_interrupted()
+        self._ids: dict[tuple[Path, Path], int] = {
+            (move.source, move.target): i for i, move in self.state.planned.items()
+        }
+        self._truncate_torn_entry()
+        self._fh = open(self.journal_path, "a", encoding="utf-8")
+        self._uncommitted = 0
+
+    def _recover_interrupted(self) -> None:
+        """Settles moves a crash left with both their source and target on disk.
+
+        A completed move with both files is an interrupted rollback, moving the
+        target back to the source. When both are links to the same file the move
+        is finished by unlinking the file it came from. Otherwise the file it went
+        to is a copy, removed when it is partial or identical so the move is redone
+        (restoring its timestamps), and kept when it differs as it isn't ours.
+        """
+        for i, move in self.state.planned.items():
+            rolling_back = i in self.state.done
+            origin, destination = (
+                (move.target, move.source)
+                if rolling_back
+                else (move.source, move.target)
+            )
+            if not (origin.is_file() and destination.is_file()):
+                continue
+
+            if os.path.samefile(origin, destination):
+                origin.unlink()
+                if not rolling_back:
+                    self.state.done.add(i)
+            elif origin.stat().st_size != destination.stat().st_size or filecmp.cmp(
+                origin, destination, shallow=False
+            ):
+                destination.unlink()
+
+    def _truncate_torn_entry(self) -> None:
+        """Drops a partially written final line, so new entries start on a fresh line."""
+        if not self.journal_path.exists():
+            return
+        with open(self.journal_path, "rb+") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            fh.seek(size - 1)
+            if fh.read(1) == b"\n":
+                return
+            fh.seek(0)
+            fh.truncate(fh.read().rfind(b"\n") + 1)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, entry: dict) -> None:
+        self._fh.write(json.dumps(entry) + "\n")
+
+    def commit(self) -> None:
+        """Flushes buffered entries and fsyncs the journal."""
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        """Commits outstanding entries and closes the journal."""
+        if not self._fh.closed:
+            self.commit()
+            self._fh.close()
+
+    def record_plan(self, plan: organizer.MovePlan) -> None:
+        """Durably records every move of a plan before it is executed.
+
+        A plan recorded after a rollback starts a new run, the rolled back moves
+        are forgotten.
+        """
+        if self.state.rolled_back:
+            self.state = JournalState()
+            self._ids = {}
+        for move in plan.moves:
+            key = (move.source, move.target)
+            if key in self._ids:
+                continue
+            i = len(self.state.planned)
+            self._ids[key] = i
+            self.state.planned[i] = move
+            self._write(
+                {
+                    "op": "plan",
+                    "id": i,
+                    "source": str(move.source),
+                    "target": str(move.target),
+                }
+            )
+        self.commit()
+
+    def record_done(self, move: organizer.Move) -> None:
+        """Appends a completion marker, committing once a group has accumulated."""
+        i = self._ids[(move.source, move.target)]
+        self.state.done.add(i)
+        self._write({"op": "done", "id": i})
+        self._uncommitted += 1
+        if self._uncommitted >= self.group_size:
+            self.commit()
+
+    def record_rollback(self) -> None:
+        """Marks the journal's moves as rolled back."""
+        self.state.rolled_back = True
+        self._write({"op": "rollback"})
+        self.commit()
+
+    @staticmethod
+    def replay(journal_path: str | Path) -> JournalState:
+        """Reads the state recorded in a journal.
+
+        Moves without a completion marker whose source is gone and whose target
+        exists are treated as done, since their markers may not have been
+        committed before a crash. A torn final line is ignored, and a plan recorded
+        after a rollback starts over with a fresh state.
+        """
+        state = JournalState()
+        if not os.path.exists(journal_path):
+            return state
+
+        with open(journal_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry["op"] == "plan":
+                    if state.rolled_back:
+                        state = JournalState()
+                    state.planned[entry["id"]] = organizer.Move(
+                        source=Path(entry["source"]), target=Path(entry["target"])
+                    )
+                elif entry["op"] == "done":
+                    state.done.add(entry["id"])
+                elif entry["op"] == "rollback":
+                    state.rolled_back = True
+
+        for i, move in state.planned.items():
+            if i not in state.done and move.target.exists():
+                if not move.source.exists():
+                    state.done.add(i)
+
+        return state
+
+
+def resume(
+    journal_path: str | Path, workers: int = 8, group_size: int = 256
+) -> organizer.MoveResult:
+    """Executes the moves of an interrupted run that have not completed yet."""
+    with MoveJournal(journal_path, group_size=group_size) as journal:
+        if journal.state.rolled_back:
+            return organizer.MoveResult()
+        plan = organizer.MovePlan(moves=journal.state.pending)
+        plan.directories = {move.target.parent for move in plan.moves}
+        return organizer.execute_plan(plan, workers=workers, journal=journal)
+
+
+def rollback(journal_path: str | Path, workers: int = 8) -> organizer.MoveResult:
+    """Moves every completed move of a journal back to its source.
+
+    Rolling back is idempotent, moves that are already back in place are skipped.
+    """
+    with MoveJournal(journal_path) as journal:
+        plan = organizer.MovePlan()
+        for i in sorted(journal.state.done, reverse=True):
+            move = journal.state.planned[i]
+            if move.target.exists() and not move.source.exists():
+                plan.moves.append(
+                    organizer.Move(source=move.target, target=move.source)
+                )
+                plan.directories.add(move.source.parent)
+
+        result = organizer.execute_plan(plan, workers=workers)
+        if not result.failed:
+            journal.record_rollback()
+        return result
@@ -1,54 +1,320 @@
 """File and Directory management."""
 
+import fnmatch
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 from functools import cached_property
+from itertools import chain, repeat
 from pathlib import Path
-from typing import Self
+from typing import Iterable, Iterator, Self
 
-from audiopyle import audio, builtins, core
+from audiopyle import (
+    artwork,
+    audio,
+    backups,
+    builtins,
+    cache,
+    core,
+    dedup,
+    journal,
+    organizer,
+    records,
+    snapshot,
+    stats,
+)
+
+
+def _parse_chunk(
+    filepaths: list[Path], backend: str | audio.MetadataBackend | None = None
+) -> list[core.File]:
+    """Parses a chunk of files, executed by the scan's worker pool."""
+    return [audio.Audio._from_filepath(filepath, backend) for filepath in filepaths]
 
 
 class Directory:
-    """Class for managing a directory of files."""
+    """Class for managing a directory of files.
 
-    def __init__(self, directory_path: Path):
+    Args:
+        directory_path (Path): Root of the directory.
+        workers (int): Number of workers used to scan files, scans serially when 1.
+        chunk_size (int): Number of files handed to a worker at a time.
+        use_processes (bool): Scan with a process pool rather than a thread pool.
+        backend (str | audio.MetadataBackend, Optional): Metadata backend used to parse files.
+        metadata_cache (cache.MetadataCache, Optional): Cache of previously parsed
+            files, only files that changed since they were cached are parsed again.
+    """
+
+    def __init__(
+        self,
+        directory_path: Path,
+        workers: int = 1,
+        chunk_size: int = 64,
+        use_processes: bool = False,
+        backend: str | audio.MetadataBackend | None = None,
+        metadata_cache: cache.MetadataCache | None = None,
+    ):
         self.logger = builtins.get_or_configure_logger(__name__)
         self.directory_path: Path = directory_path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.use_processes = use_processes
+        self.backend = backend
+        self.metadata_cache = metadata_cache
         self._directory_path_str = str(self.directory_path)
-        self._directory_size: int = os.path.getsize(self.directory_path)
-        self._num_files: int = builtins.count_files(self.directory_path)
 
     @classmethod
-    def _from_filepath(cls, directory_path: str) -> Self:
+    def _from_filepath(cls, directory_path: str, **kwargs) -> Self:
         """Creates a Directory object given a filepath."""
         builtins.ensure_exists(directory_path)
         builtins.ensure_directory(directory_path)
-        return cls(directory_path)
+        return cls(directory_path, **kwargs)
 
     @cached_property
     def files(self) -> list[core.File]:
         """Recursively walk directories for a list of file objects"""
-        all_files = []
-        for root, _, files in os.walk(self.directory_path):
-            for _file in files:
-                # TODO: Create file based on file extension
-                all_files.append(audio.Audio._from_filepath(Path(root, _file)))
-        return all_files
+        return self.scan(
+            workers=self.workers,
+            chunk_size=self.chunk_size,
+            use_processes=self.use_processes,
+        )
 
     @cached_property
-    def _empty_directories(self) -> list[Path]:
-        """Returns a list of empty subdirectories."""
-        dirs = []
-        for subdir in self.directory_path.rglob("*"):
-            if subdir.is_dir() and not any(subdir.iterdir()):
-                dirs.append(subdir)
-        return dirs
-
-    def _delete_empty_directories(self):
-        """Deletes empty subdirectories via ``pathlib.Path.rmdir()``."""
-        for directory in self._empty_directories:
-            directory.rmdir()
+    def statistics(self) -> stats.DirectoryStats:
+        """File count, size and extensions of the directory, collected on first use.
+
+        Top-level subdirectories are walked by ``workers`` threads, and the paths
+        found are kept so a later ``scan`` doesn't walk the directory again.
+        """
+        return stats.collect_stats(
+            self.directory_path, workers=self.workers, keep_paths=True
+        )
+
+    @property
+    def _num_files(self) -> int:
+        return self.statistics.files
+
+    @property
+    def _directory_size(self) -> int:
+        return self.statistics.bytes
+
+    def _filepaths(self) -> list[Path]:
+        """Sorted paths of every file beneath the directory."""
+        if "statistics" in self.__dict__:
+            return sorted(map(Path, self.statistics.paths))
+        return sorted(Path(entry.path) for entry in self._iter_entries())
+
+    def _iter_entries(
+        self,
+        extensions: Iterable[str] | None = None,
+        pattern: str | None = None,
+        modified_since: datetime | float | None = None,
+    ) -> Iterator[os.DirEntry]:
+        """Yields the entries of files beneath the directory that pass every filter."""
+        if extensions is not None:
+            extensions = tuple(extension.lower() for extension in extensions)
+        if isinstance(modified_since, datetime):
+            modified_since = modified_since.timestamp()
+
+        for entry in builtins.scan_tree(self.directory_path):
+            if extensions is not None and not entry.name.lower().endswith(extensions):
+                continue
+            if pattern is not None:
+                relative_path = os.path.relpath(entry.path, self.directory_path)
+                if not fnmatch.fnmatch(Path(relative_path).as_posix(), pattern):
+                    continue
+            if modified_since is not None and entry.stat().st_mtime < modified_since:
+                continue
+            yield entry
+
+    def iter_files(
+        self,
+        extensions: Iterable[str] | None = None,
+        pattern: str | None = None,
+        modified_since: datetime | float | None = None,
+    ) -> Iterator[core.File]:
+        """Lazily yields file objects as they are parsed.
+
+        Filters are applied to directory entries before any file is opened. Unlike
+        ``scan``, album-level metadata is not reconciled since that requires every
+        track of an album; pass the results through ``audio.reconcile_albums`` (or an
+        ``audio.AlbumIndex``) when it is needed.
+
+        Args:
+            extensions (Iterable[str], Optional): Only yield files with these extensions, i.e ``[".mp3"]``.
+            pattern (str, Optional): Glob the file's path relative to the directory must match, i.e ``"2023/*"``.
+            modified_since (datetime | float, Optional): Only yield files modified at or after this time.
+
+        Yields:
+            core.File: Parsed files, in directory order.
+        """
+        pending = []
+        try:
+            for entry in self._iter_entries(extensions, pattern, modified_since):
+                filepath = Path(entry.path)
+                record = None
+                if self.metadata_cache is not None:
+                    stat = entry.stat()
+                    record = self.metadata_cache.get(os.path.abspath(filepath), stat)
+
+                if record is None:
+                    record = audio.Audio._from_filepath(filepath, self.backend)
+                    if self.metadata_cache is not None:
+                        pending.append((os.path.abspath(filepath), stat, record))
+                        if len(pending) >= self.chunk_size:
+                            self.metadata_cache.put_many(pending)
+                            pending.clear()
+
+                yield record
+        finally:
+            if pending:
+                self.metadata_cache.put_many(pending)
+
+    def scan(
+        self, workers: int = 1, chunk_size: int = 64, use_processes: bool = False
+    ) -> list[core.File]:
+        """Parses every file in the directory, optionally in parallel.
+
+        Files are parsed independently (the map step) and album-level metadata is
+        reconciled once every file has been parsed (the reduce step), so the result
+        is ordered by filepath and identical for any number of workers. Images
+        (i.e an album's ``cover.jpg``) have no audio metadata and are left out.
+
+        Args:
+            workers (int): Number of workers, scans serially when 1.
+            chunk_size (int): Number of files handed to a worker at a time.
+            use_processes (bool): Use a process pool rather than a thread pool.
+
+        Returns:
+            list[core.File]: Parsed files, sorted by filepath.
+        """
+        filepaths = [
+            filepath
+            for filepath in self._filepaths()
+            if filepath.suffix.lower() not in artwork.IMAGE_EXTENSIONS
+        ]
+
+        cached: dict[Path, core.File] = {}
+        file_stats: dict[Path, os.stat_result] = {}
+        if self.metadata_cache is not None:
+            for filepath in filepaths:
+                file_stats[filepath] = filepath.stat()
+                record = self.metadata_cache.get(
+                    os.path.abspath(filepath), file_stats[filepath]
+                )
+                if record is not None:
+                    cached[filepath] = record
+
+        missing = [filepath for filepath in filepaths if filepath not in cached]
+        chunks = [
+            missing[i : i + chunk_size] for i in range(0, len(missing), chunk_size)
+        ]
+
+        # TODO: Create file based on file extension
+        if workers <= 1:
+            parsed = [_parse_chunk(chunk, self.backend) for chunk in chunks]
+        else:
+            executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with executor(max_workers=workers) as pool:
+                parsed = list(pool.map(_parse_chunk, chunks, repeat(self.backend)))
+
+        parsed_files = dict(zip(missing, chain.from_iterable(parsed)))
+        self.logger.debug(f"Parsed {len(missing)} files with {workers} worker(s)")
+
+        if self.metadata_cache is not None:
+            self.metadata_cache.put_many(
+                (os.path.abspath(filepath), file_stats[filepath], record)
+                for filepath, record in parsed_files.items()
+            )
+            self.metadata_cache.prune(
+                (os.path.abspath(filepath) for filepath in filepaths),
+                root=os.path.abspath(self.directory_path),
+            )
+            self.logger.debug(f"Metadata cache: {self.metadata_cache.stats}")
+
+        parsed_files.update(cached)
+        return audio.reconcile_albums(parsed_files[filepath] for filepath in filepaths)
+
+    def table(self) -> records.TrackTable:
+        """Parses every file in the directory into a columnar ``records.TrackTable``.
+
+        Files are streamed from ``iter_files`` straight into the table, so the
+        library is never held as a list of ``audio.Audio`` objects. Album-level
+        metadata is reconciled as in ``scan``. Uses the result of ``files`` if it
+        has already been computed.
+        """
+        if "files" in self.__dict__:
+            return records.TrackTable.from_tracks(self.files)
+
+        index = audio.AlbumIndex()
+        table = records.TrackTable()
+        for track in self.iter_files():
+            index.add(track)
+            table.append(track)
+        table.resolve_albums(index)
+        return table
+
+    def snapshot(self, snapshot_path: str | Path) -> int:
+        """Writes every track in the directory to an NDJSON snapshot, see ``snapshot``.
+
+        Returns:
+            int: Number of tracks written.
+        """
+        return snapshot.export_snapshot(self.table(), snapshot_path)
+
+    def collect_artwork(self, store: artwork.ArtworkStore, workers: int = 8) -> int:
+        """Stores the artwork of every album in the directory, see ``artwork``.
+
+        Returns:
+            int: Number of albums artwork was found for.
+        """
+        found = store.add_tracks(self.files, workers=workers)
+        self.logger.debug(f"Found artwork for {found} albums")
+        return found
+
+    def duplicates(
+        self, workers: int = 8, hash_cache: cache.HashCache | None = None
+    ) -> list[dedup.DuplicateGroup]:
+        """Finds audio files in the directory with identical audio payloads.
+
+        Tags are excluded from the comparison, so retagged or renamed copies are
+        found too. Act on the result with ``dedup.plan_duplicate_moves``.
+
+        Args:
+            workers (int): Number of threads hashing files.
+            hash_cache (cache.HashCache, Optional): Cache of digests from previous runs.
+
+        Returns:
+            list[dedup.DuplicateGroup]: Groups of duplicate files.
+        """
+        filepaths = [
+            filepath
+            for filepath in self._filepaths()
+            if builtins.is_audio(str(filepath))
+        ]
+        groups = dedup.find_duplicates(
+            filepaths, workers=workers, hash_cache=hash_cache
+        )
+        self.logger.debug(
+            f"Found {len(groups)} duplicate groups wasting "
+            f"{sum(group.wasted_bytes for group in groups)} bytes"
+        )
+        return groups
+
+    def _delete_empty_directories(
+        self, directories: Iterable[Path] | None = None
+    ) -> list[Path]:
+        """Deletes empty subdirectories, including those left empty by deleting others.
+
+        Args:
+            directories (Iterable[Path], Optional): Only check these directories and
+                their parents, i.e those a move emptied out, rather than the whole tree.
+
+        Returns:
+            list[Path]: The directories deleted, see ``builtins.prune_empty_directories``.
+        """
+        return builtins.prune_empty_directories(self.directory_path, directories)
 
     def _create_directory(self, *subdirectories: str) -> Path:
         """Creates a new subdirectory."""
@@ -56,22 +322,102 @@ class Directory:
         _new_path.mkdir(parents=True, exist_ok=True)
         return _new_path
 
-    def backup(self):
-        """Creates a backup of a directory"""
+    def backup(
+        self,
+        incremental: bool = False,
+        keep: int | None = 7,
+        backup_root: str | Path | None = None,
+        workers: int = 8,
+    ) -> backups.BackupResult | None:
+        """Creates a backup of a directory
+
+        By default the directory is copied to '<directory>_bak'. An incremental
+        backup instead creates a new snapshot in '<directory>_snapshots', hard
+        linking files unchanged since the previous snapshot, see ``backups``.
+
+        Args:
+            incremental (bool): Create a snapshot rather than a full copy.
+            keep (int, Optional): Number of snapshots to keep, all if None.
+            backup_root (str | Path, Optional): Directory holding the snapshots.
+            workers (int): Number of threads linking and copying files.
+
+        Returns:
+            backups.BackupResult | None: The snapshot created, if incremental.
+        """
+        # Only report totals already collected, walking the tree just to log them is too slow
+        if "statistics" in self.__dict__:
+            self.logger.debug(
+                f"Creating backup of {self.directory_path} ({self._num_files} totaling {self._directory_size} bytes)..."
+            )
+        else:
+            self.logger.debug(f"Creating backup of {self.directory_path}...")
+        if not incremental:
+            backup_filepath = self._directory_path_str + "_bak"
+            shutil.copytree(self.directory_path, backup_filepath)
+            self.logger.debug(f"Backup created at {backup_filepath}")
+            return None
+
+        if backup_root is None:
+            backup_root = self._directory_path_str + "_snapshots"
+        result = backups.create_snapshot(
+            self.directory_path, backup_root, keep=keep, workers=workers
+        )
+        for relative_path, error in result.failed:
+            self.logger.error(f"Error backing up {relative_path}: {error}")
+        self.logger.debug(
+            f"Snapshot created at {result.snapshot}: {result.linked} files linked, "
+            f"{sum(result.copied.values())} copied, {len(result.removed)} old snapshots removed"
+        )
+        return result
+
+    def move_files(
+        self,
+        template: organizer.PathTemplate | str = organizer.DEFAULT_TEMPLATE,
+        workers: int = 8,
+        journal_path: str | Path | None = None,
+    ) -> organizer.MoveResult:
+        """Moves files into subdirectories given by a template, i.e 'Root / Year / Album /'.
+
+        Every move is planned before any file is touched, colliding targets are
+        left in place, and directories the moves left empty are removed afterwards.
+        Images move along with the tracks of their directory, see
+        ``organizer.plan_moves``.
+
+        Args:
+            template (organizer.PathTemplate | str): Template for each file's target
+                directory relative to the root, missing fields fall back to "Unknown".
+            workers (int): Number of threads moving files.
+            journal_path (str | Path, Optional): Journal recording every move (old ->
+                new filepath), see ``journal.resume`` and ``journal.rollback``.
+
+        Returns:
+            organizer.MoveResult: Moves that succeeded and failed.
+        """
+        sidecars = [
+            filepath
+            for filepath in self._filepaths()
+            if filepath.suffix.lower() in artwork.IMAGE_EXTENSIONS
+        ]
+        plan = organizer.plan_moves(
+            self.files, self.directory_path, template, sidecars=sidecars
+        )
+        for target, sources in plan.collisions.items():
+            self.logger.warning(f"Not moving {len(sources)} file(s) onto {target}")
+
+        if journal_path is None:
+            result = organizer.execute_plan(plan, workers=workers)
+        else:
+            with journal.MoveJournal(journal_path) as move_journal:
+                result = organizer.execute_plan(
+                    plan, workers=workers, journal=move_journal
+                )
+        for move, error in result.failed:
+            self.logger.error(f"Error moving {move.source}: {error}")
         self.logger.debug(
-            f"Creating backup of {self.directory_path} ({self._num_files} totaling {self._directory_size} bytes)..."
+            f"Moved {len(result.moved)} files, {len(result.failed)} failed, "
+            f"created {result.directories_created} directories"
         )
-        backup_filepath = self._directory_path_str + "_bak"
-        shutil.copytree(self.directory_path, backup_filepath)
-        self.logger.debug(f"Backup created at {backup_filepath}")
-
-    def move_files(self):
-        """Move files in a directory"""
-        # For each file in directory
-        # use some criteria to move it to a new directory, i.e 'Root / Year / Album /' or 'Root / Genre / Album /'
-        # Handle one or more of the criteria not existing
-        # target_directory = self._create_directory(file.year, file.album)
-        # file.move(target_directory)
-        # Remove empty directories afterwards
-        # Should be able to do this multithreaded...
-        raise NotImplementedError
+
+        self.__dict__.pop("statistics", None)
+        self._delete_empty_directories(result.source_directories)
+        return result
@@ -0,0 +1,274 @@
+"""Planning and executing bulk file moves."""
+
+import os
+import shutil
+import string
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from audiopyle import artwork, builtins, core, timestamps
+
+if TYPE_CHECKING:
+    from audiopyle.journal import MoveJournal
+
+DEFAULT_TEMPLATE: str = "{_download_year}/{_download_month}/{album}"
+
+# Field values treated as missing when rendering a template
+MISSING_VALUES: tuple = (None, "", "N/A")
+
+# Bytes copied at a time when a file is copied across filesystems
+COPY_BUFFER_SIZE: int = 1 << 20
+
+
+@dataclass
+class PathTemplate:
+    """Template for the directory a file is moved into, relative to a root directory.
+
+    Fields are attribute names of the file, i.e ``"{_download_year}/{album}"`` or
+    ``"{genre}/{album}"``. Values are sanitized so they never introduce new
+    subdirectories or refer to a parent directory, and missing values (or values
+    such as ``".."``) are replaced by ``fallback``.
+
+    Args:
+        template (str): ``str.format`` style template, components separated by ``/``.
+        fallback (str): Value used for fields that are missing or empty.
+    """
+
+    template: str = DEFAULT_TEMPLATE
+    fallback: str = "Unknown"
+
+    def __post_init__(self):
+        self.fields = [
+            name
+            for _, name, _, _ in string.Formatter().parse(self.template)
+            if name is not None
+        ]
+
+    def render(self, file: core.File) -> Path:
+        """Renders the relative target directory of a file."""
+        values = {}
+        for name in self.fields:
+            value = getattr(file, name, None)
+            if value in MISSING_VALUES:
+                value = self.fallback
+            value = builtins.sanitize_directory_name(str(value)).strip()
+            if value.strip(".") == "":
+                # "", "." and ".." would escape the directory the template builds
+                value = self.fallback
+            values[name] = value
+        return Path(*self.template.format(**values).split("/"))
+
+
+@dataclass
+class Move:
+    """A single planned move of a file to a target path."""
+
+    source: Path
+    target: Path
+    file: core.File | None = None
+
+
+@dataclass
+class MovePlan:
+    """A complete set of moves, computed before any file is touched.
+
+    Args:
+        moves (list[Move]): Moves that can be executed safely.
+        collisions (dict[Path, list[Path]]): Targets claimed by more than one source,
+            or that already exist, mapped to the sources which were left in place.
+        directories (set[Path]): Target directories the plan's moves require.
+    """
+
+    moves: list[Move] = field(default_factory=list)
+    collisions: dict[Path, list[Path]] = field(default_factory=dict)
+    directories: set[Path] = field(default_factory=set)
+
+
+@dataclass
+class MoveResult:
+    """Outcome of executing a move plan."""
+
+    moved: list[Move] = field(default_factory=list)
+    failed: list[tuple[Move, str]] = field(default_factory=list)
+    directories_created: int = 0
+
+    @property
+    def source_directories(self) -> set[Path]:
+        """Directories files were moved out of, which may now be empty."""
+        return {Path(move.source).parent for move in self.moved}
+
+
+def plan_moves(
+    files: Iterable[core.File],
+    root: str | Path,
+    template: PathTemplate | str = DEFAULT_TEMPLATE,
+    sidecars: Iterable[str | Path] = (),
+) -> MovePlan:
+    """Computes where every file should be moved to.
+
+    Files that are already in place are left out of the plan. Targets claimed by
+    several files, or already occupied by a file (even one the plan moves away,
+    since moves run in parallel), are reported as collisions and none of their
+    sources are moved.
+
+    Sidecar images (i.e an album's ``cover.jpg``) have no metadata of their own to
+    render the template with, they follow the files of their source directory
+    instead. A sidecar is left in place when those files go to several
+    directories, or when none are moved. Files with an image extension are
+    treated as sidecars as well.
+
+    Args:
+        files (Iterable[core.File]): Files to move.
+        root (str | Path): Directory the template is rendered under.
+        template (PathTemplate | str): Template for each file's target directory.
+        sidecars (Iterable[str | Path]): Paths of sidecar images.
+
+    Returns:
+        MovePlan: The moves to execute.
+    """
+    if isinstance(template, str):
+        template = PathTemplate(template)
+    root = Path(root).resolve()
+
+    claims: dict[Path, list[Move]] = defaultdict(list)
+    # Target directories of the files in each source directory
+    album_directories: dict[Path, set[Path]] = defaultdict(set)
+    images: dict[Path, core.File | None] = {
+        Path(sidecar).resolve(): None for sidecar in sidecars
+    }
+    for file in files:
+        source = Path(file._filepath).resolve()
+        if source.suffix.lower() in artwork.IMAGE_EXTENSIONS:
+            images[source] = file
+            continue
+        target = root / template.render(file) / source.name
+        album_directories[source.parent].add(target.parent)
+        if source != target:
+            claims[target].append(Move(source=source, target=target, file=file))
+
+    for source, file in images.items():
+        directories = album_directories.get(source.parent, set())
+        if len(directories) != 1:
+            continue
+        target = next(iter(directories)) / source.name
+        if source != target:
+            claims[target].append(Move(source=source, target=target, file=file))
+
+    plan = MovePlan()
+    for target, moves in claims.items():
+        if len(moves) > 1 or os.path.lexists(target):
+            plan.collisions[target] = [move.source for move in moves]
+            continue
+        plan.moves.append(moves[0])
+        plan.directories.add(target.parent)
+
+    return plan
+
+
+def _copy_exclusive(source: Path, target: Path) -> None:
+    """Copies a file to a target that must not exist yet, removing a partial copy on failure.
+
+    Raises:
+        FileExistsError: If the target exists.
+    """
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        try:
+            shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        except BaseException:
+            dst.close()
+            target.unlink(missing_ok=True)
+            raise
+    shutil.copymode(source, target)
+
+
+def _move(move: Move, target_device: int) -> timestamps.FileTimes | None:
+    """Moves a single file without ever overwriting its target.
+
+    On the same filesystem the file is hard linked to its target and then
+    unlinked, which fails if the target exists, unlike a rename. Elsewhere, or
+    where hard links aren't supported, it is copied to a newly created target.
+
+    Returns:
+        timestamps.FileTimes | None: Timestamps to apply to the target when the file
+            was copied, None when it was linked and kept its timestamps.
+
+    Raises:
+        FileExistsError: If the target exists.
+    """
+    if os.stat(move.source).st_dev == target_device:
+        try:
+            os.link(move.source, move.target)
+        except FileExistsError:
+            raise
+        except OSError:
+            # i.e FAT and exFAT drives have no hard links, copy instead
+            pass
+        else:
+            move.source.unlink()
+            return None
+
+    times = timestamps.get_times(move.source)
+    _copy_exclusive(move.source, move.target)
+    move.source.unlink()
+    return times
+
+
+def execute_plan(
+    plan: MovePlan, workers: int = 8, journal: "MoveJournal | None" = None
+) -> MoveResult:
+    """Executes a move plan on a thread pool.
+
+    Every target directory is created once up front, then files are linked into
+    place where source and target share a filesystem and copied otherwise, with
+    the timestamps of copied files restored after the batch. The ``_filepath`` of
+    each moved file object is updated.
+
+    Args:
+        plan (MovePlan): Plan computed by ``plan_moves``.
+        workers (int): Number of threads moving files.
+        journal (MoveJournal, Optional): Journal the plan and each completed move
+            are recorded in, so an interrupted run can be resumed or rolled back.
+
+    Returns:
+        MoveResult: Moves that succeeded and failed.
+    """
+    result = MoveResult()
+    if journal is not None:
+        journal.record_plan(plan)
+
+    devices = {}
+    for directory in sorted(plan.directories):
+        if not directory.is_dir():
+            directory.mkdir(parents=True, exist_ok=True)
+            result.directories_created += 1
+        devices[directory] = os.stat(directory).st_dev
+
+    def _execute(move: Move) -> tuple[timestamps.FileTimes | None, str | None]:
+        try:
+            return _move(move, devices[move.target.parent]), None
+        except OSError as e:
+            return None, str(e)
+
+    copied = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for move, (times, error) in zip(plan.moves, pool.map(_execute, plan.moves)):
+            if error is not None:
+                result.failed.append((move, error))
+                continue
+            if times is not None:
+                copied.append((move.target, times))
+            if journal is not None:
+                journal.record_done(move)
+            if move.file is not None:
+                move.file._filepath = str(move.target)
+            result.moved.append(move)
+
+    # Copied files get their timestamps back in one pass once the batch is done
+    timestamps.apply_times(copied)
+
+    if journal is not None:
+        journal.commit()
+    return result
@@ -0,0 +1,228 @@
+"""Compact in-memory representations of large libraries.
+
+``audio.Audio`` objects each carry an instance ``__dict__`` and their own copy
+of every string, even though most of them (album, artist, download month,
+comment, ...) repeat across the tracks of an album. Two leaner forms are
+provided:
+
+- ``TrackRecord``, a slotted record whose repeated strings are interned so
+  every track of an album shares one copy.
+- ``TrackTable``, one column per field (struct-of-arrays). Columns with few
+  distinct values are dictionary-encoded: each row stores an integer code into
+  a list of the distinct values, so grouping or filtering by album or artist
+  compares integers. Rows are turned back into ``audio.Audio`` objects on
+  demand.
+"""
+
+import sys
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, Hashable, Iterable, Iterator, Self
+
+import numpy as np
+
+from audiopyle import audio
+
+# Fields of ``audio.Audio`` in declaration order
+FIELDS: tuple[str, ...] = tuple(f.name for f in fields(audio.Audio))
+
+# Fields whose values repeat across the tracks of an album
+DICTIONARY_FIELDS: frozenset[str] = frozenset(
+    [
+        "_download_year",
+        "_download_month",
+        "album",
+        "artist",
+        "album_artist",
+        "year",
+        "comment",
+        "origin",
+        "bit_rate",
+        "tags",
+        "key",
+    ]
+)
+
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(_intern(item) for item in value)
+    return value
+
+
+@dataclass(slots=True)
+class TrackRecord:
+    """Slotted counterpart of ``audio.Audio`` with interned strings.
+
+    Tags are stored as a tuple so records can share them too.
+    """
+
+    _filename: str
+    _filepath: str
+    _download_year: str
+    _download_month: str
+    title: str
+    album: str
+    artist: str
+    album_artist: str
+    year: int
+    length: int
+    comment: str
+    origin: str
+    bit_rate: int
+    _rekordbox_uri: str
+    tags: tuple[str, ...] = ()
+    bpm: float | None = None
+    key: str | None = None
+
+    @classmethod
+    def from_audio(cls, track: audio.Audio) -> Self:
+        """Creates a record from a track, interning its strings."""
+        return cls(**{name: _intern(getattr(track, name)) for name in FIELDS})
+
+    def to_audio(self) -> audio.Audio:
+        """Creates an ``audio.Audio`` object from the record."""
+        values = {name: getattr(self, name) for name in FIELDS}
+        values["tags"] = list(self.tags)
+        return audio.Audio(**values)
+
+
+# The record mirrors ``audio.Audio`` field for field, checked even under -O
+if tuple(f.name for f in fields(TrackRecord)) != FIELDS:
+    raise TypeError("TrackRecord fields are out of sync with audio.Audio")
+
+
+class _DictionaryColumn:
+    """Column storing an integer code per row into a list of distinct values."""
+
+    def __init__(self):
+        self.values: list = []
+        self.index: dict[Hashable, int] = {}
+        self.codes = array("i")
+
+    def append(self, value: Any) -> None:
+        value = _intern(value)
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, row: int) -> Any:
+        return self.values[self.codes[row]]
+
+    def __setitem__(self, row: int, value: Any) -> None:
+        value = _intern(value)
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes[row] = code
+
+
+class TrackTable:
+    """Columnar table of tracks with dictionary-encoded repeated fields.
+
+    Rows keep insertion order. ``table[i]`` and iteration produce ``audio.Audio``
+    objects built on demand, the table itself holds no per-track objects.
+    """
+
+    def __init__(self):
+        self._columns: dict[str, _DictionaryColumn | list] = {
+            name: _DictionaryColumn() if name in DICTIONARY_FIELDS else []
+            for name in FIELDS
+        }
+
+    @classmethod
+    def from_tracks(cls, tracks: Iterable[audio.Audio]) -> Self:
+        """Builds a table from tracks, i.e the result of ``Directory.scan``."""
+        table = cls()
+        table.extend(tracks)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._columns["_filepath"])
+
+    def append(self, track: audio.Audio) -> None:
+        """Appends a track as a new row."""
+        for name, column in self._columns.items():
+            column.append(_intern(getattr(track, name)))
+
+    def extend(self, tracks: Iterable[audio.Audio]) -> None:
+        """Appends many tracks."""
+        for track in tracks:
+            self.append(track)
+
+    def __getitem__(self, row: int) -> audio.Audio:
+        if row < 0:
+            row += len(self)
+        values = {name: column[row] for name, column in self._columns.items()}
+        values["tags"] = list(values["tags"])
+        return audio.Audio(**values)
+
+    def __iter__(self) -> Iterator[audio.Audio]:
+        return (self[row] for row in range(len(self)))
+
+    def record(self, row: int) -> TrackRecord:
+        """Returns a row as a slotted record, sharing the table's strings."""
+        return TrackRecord(*(column[row] for column in self._columns.values()))
+
+    def column(self, name: str) -> list:
+        """Decodes a column into a list of values, one per row."""
+        column = self._columns[name]
+        if isinstance(column, _DictionaryColumn):
+            return [column.values[code] for code in column.codes]
+        return list(column)
+
+    def codes(self, name: str) -> tuple[np.ndarray, list]:
+        """Returns a dictionary-encoded column without decoding it.
+
+        Returns:
+            tuple[np.ndarray, list]: The code of each row and the distinct values
+                the codes index into.
+
+        Raises:
+            KeyError: If the column isn't dictionary-encoded.
+        """
+        column = self._columns[name]
+        if not isinstance(column, _DictionaryColumn):
+            raise KeyError(f"Column '{name}' is not dictionary-encoded")
+        # Copied (a single memcpy) since a live view would stop the column growing
+        return np.frombuffer(column.codes, dtype=np.int32).copy(), column.values
+
+    def where(self, name: str, value: Any) -> np.ndarray:
+        """Finds the rows whose value in a dictionary-encoded column equals ``value``."""
+        codes, _ = self.codes(name)
+        code = self._columns[name].index.get(_intern(value))
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(codes == code)
+
+    def group_by(self, name: str) -> dict[Any, np.ndarray]:
+        """Groups row numbers by the value of a dictionary-encoded column."""
+        codes, values = self.codes(name)
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        return {
+            values[codes[rows[0]]]: rows
+            for rows in np.split(order, boundaries)
+            if len(rows)
+        }
+
+    def resolve_albums(self, index: audio.AlbumIndex) -> None:
+        """Applies each album's shared artist and download date, see ``audio.AlbumIndex``.
+
+        Rows are updated in place, a single lookup per album.
+        """
+        for album, rows in self.group_by("album").items():
+            aggregate = index.albums[album]
+            for name, value in [
+                ("album_artist", aggregate["artist"]),
+                ("_download_year", aggregate["year"]),
+                ("_download_month", aggregate["month"]),
+            ]:
+                column = self._columns[name]
+                for row in rows:
+                    column[row] = value
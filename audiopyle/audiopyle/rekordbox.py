@@ -0,0 +1,251 @@
+"""Streaming Rekordbox XML collection export, import and patching.
+
+A collection is written a TRACK at a time, so tracks can come straight from a
+generator such as ``management.Directory.iter_files``. The number of tracks
+isn't known until the end, so COLLECTION is written with a blank-padded
+``Entries`` attribute that is patched in place once every track is written.
+
+Reading uses ``iterparse`` and drops every element as soon as it ends, and
+patching rewrites only the start tags of the TRACK entries that changed,
+copying everything else through untouched. All three run in constant memory.
+"""
+
+import html
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+from xml.sax.saxutils import escape
+
+from audiopyle import audio, core
+
+PRODUCT: dict[str, str] = {
+    "Name": "audiopyle",
+    "Version": "0.1.0",
+    "Company": "audiopyle",
+}
+
+# Characters reserved for the track count in ``<COLLECTION Entries="...">``
+ENTRIES_WIDTH: int = 12
+
+# Characters read at a time when patching a collection
+READ_SIZE: int = 1 << 16
+
+# Characters escaped in attribute values on top of ``&``, ``<`` and ``>``, values
+# are always written in double quotes
+ATTRIBUTE_ENTITIES: dict[str, str] = {
+    '"': "&quot;",
+    "\n": "&#10;",
+    "\r": "&#13;",
+    "\t": "&#9;",
+}
+
+# Characters XML 1.0 doesn't allow, even escaped, dropped from written values
+INVALID_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+# Quote-aware, so a ``>`` inside an attribute value doesn't end the tag
+TRACK_TAG = re.compile(r"""<TRACK(?:\s+[\w:.-]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*/?>""")
+# Attribute values may be in single or double quotes when read
+ATTRIBUTE = re.compile(r"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+# Matched from the start of a TRACK tag, stepping over the values before it
+LOCATION = re.compile(
+    r"""<TRACK(?:\s+(?!Location\s*=)[\w:.-]+\s*=\s*(?:"[^"]*"|'[^']*'))*"""
+    r"""\s+Location\s*=\s*(?:"([^"]*)"|'([^']*)')"""
+)
+
+
+def _int_or_empty(value) -> str:
+    try:
+        return str(int(float(value)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def track_attributes(track: audio.Audio, track_id: int) -> dict[str, str]:
+    """Maps a track to the attributes of its Rekordbox TRACK element."""
+    bit_rate = _int_or_empty(track.bit_rate)
+    attributes = {
+        "TrackID": str(track_id),
+        "Name": str(track.title),
+        "Artist": str(track.artist),
+        "Album": str(track.album),
+        "Genre": ", ".join(track.tags),
+        "Kind": f"{Path(track._filename).suffix.lstrip('.').upper()} File",
+        "TotalTime": _int_or_empty(track.length),
+        "Year": str(track.year) if str(track.year).isdigit() else "",
+        "BitRate": str(int(bit_rate) // 1000) if bit_rate else "",
+        "Comments": str(track.comment),
+        "Location": track._rekordbox_uri,
+    }
+    if track.bpm is not None:
+        attributes["AverageBpm"] = f"{track.bpm:.2f}"
+    if track.key is not None:
+        attributes["Tonality"] = track.key
+    return attributes
+
+
+def _start_tag(name: str, attributes: dict[str, str], empty: bool = False) -> str:
+    rendered = "".join(
+        f' {key}="{escape(INVALID_CHARACTERS.sub("", value), ATTRIBUTE_ENTITIES)}"'
+        for key, value in attributes.items()
+    )
+    return f"<{name}{rendered}{' /' if empty else ''}>"
+
+
+def _entries_attribute(count: int) -> str:
+    """The Entries attribute, padded with spaces to a fixed width so it can be patched."""
+    return f'Entries="{count}"'.ljust(len('Entries=""') + ENTRIES_WIDTH)
+
+
+def write_collection(tracks: Iterable[core.File], xml_path: str | Path) -> int:
+    """Writes tracks as a Rekordbox collection, one TRACK at a time.
+
+    Args:
+        tracks (Iterable[core.File]): Tracks to write, files that aren't
+            ``audio.Audio`` are skipped.
+        xml_path (str | Path): Path of the collection, overwritten if it exists.
+
+    Returns:
+        int: Number of tracks written.
+    """
+    count = 0
+    with open(xml_path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<DJ_PLAYLISTS Version="1.0.0">\n')
+        fh.write(f"  {_start_tag('PRODUCT', PRODUCT, empty=True)}\n")
+        fh.write("  <COLLECTION ")
+        entries_offset = fh.tell()
+        fh.write(_entries_attribute(0) + ">\n")
+
+        for track in tracks:
+            if not isinstance(track, audio.Audio):
+                continue
+            count += 1
+            attributes = track_attributes(track, count)
+            fh.write(f"    {_start_tag('TRACK', attributes, empty=True)}\n")
+
+        fh.write("  </COLLECTION>\n")
+        fh.write("  <PLAYLISTS>\n")
+        fh.write('    <NODE Type="0" Name="ROOT" Count="0" />\n')
+        fh.write("  </PLAYLISTS>\n")
+        fh.write("</DJ_PLAYLISTS>\n")
+
+        fh.seek(entries_offset)
+        fh.write(_entries_attribute(count))
+    return count
+
+
+def read_collection(xml_path: str | Path) -> Iterator[dict[str, str]]:
+    """Yields the attributes of every TRACK in a collection's COLLECTION element.
+
+    Elements are dropped as soon as they have been read, playlist entries (which
+    are TRACK elements as well) are skipped.
+    """
+    # Open elements, from the root down
+    path = []
+    for event, element in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            path.append(element)
+            continue
+
+        path.pop()
+        if element.tag == "TRACK" and len(path) == 2 and path[1].tag == "COLLECTION":
+            yield dict(element.attrib)
+        if path:
+            # Detach every finished element, playlist NODE and TRACK entries
+            # included, so no part of the tree outlives its end tag
+            path[-1].remove(element)
+
+
+def _unquote(match: re.Match, group: int = 1) -> str:
+    """The unescaped value of an attribute matched in single or double quotes."""
+    value = match.group(group)
+    return html.unescape(value if value is not None else match.group(group + 1))
+
+
+def _patch_tag(tag: str, updates: dict[str, str]) -> str:
+    attributes = {
+        match.group(1): _unquote(match, 2) for match in ATTRIBUTE.finditer(tag)
+    }
+    updates = {key: INVALID_CHARACTERS.sub("", value) for key, value in updates.items()}
+    changed = {
+        key: value for key, value in updates.items() if attributes.get(key) != value
+    }
+    if not changed:
+        return tag
+    attributes.update(changed)
+    return _start_tag("TRACK", attributes, empty=tag.endswith("/>"))
+
+
+def _patch_stream(
+    source: TextIO, target: TextIO, updates: dict[str, dict[str, str]]
+) -> int:
+    patched = 0
+    buffer = ""
+    while chunk := source.read(READ_SIZE):
+        buffer += chunk
+        position = 0
+        for match in TRACK_TAG.finditer(buffer):
+            target.write(buffer[position : match.start()])
+            tag = match.group()
+            location = LOCATION.match(tag)
+            location = _unquote(location) if location else None
+            if location in updates:
+                new_tag = _patch_tag(tag, updates[location])
+                patched += new_tag != tag
+                tag = new_tag
+            target.write(tag)
+            position = match.end()
+
+        # Hold back a tag that may continue in the next chunk
+        tail = buffer.rfind("<", position)
+        tail = len(buffer) if tail == -1 else tail
+        target.write(buffer[position:tail])
+        buffer = buffer[tail:]
+    target.write(buffer)
+    return patched
+
+
+def patch_collection(
+    xml_path: str | Path,
+    updates: dict[str, dict[str, str]],
+    output_path: str | Path | None = None,
+) -> int:
+    """Updates the attributes of TRACK entries, leaving the rest of the file as is.
+
+    Only the start tags of tracks whose attributes actually change are rewritten,
+    child elements (beat grids, cue points) are kept.
+
+    Args:
+        xml_path (str | Path): Collection to patch.
+        updates (dict[str, dict[str, str]]): New attribute values keyed by the
+            track's ``Location``.
+        output_path (str | Path, Optional): Where to write the patched collection,
+            replaces ``xml_path`` if not given.
+
+    Returns:
+        int: Number of tracks changed.
+    """
+    xml_path = Path(xml_path)
+    output_path = Path(output_path) if output_path is not None else xml_path
+    staging = output_path.with_name(f".{output_path.name}.tmp")
+    with open(xml_path, encoding="utf-8", newline="") as source, open(
+        staging, "w", encoding="utf-8", newline=""
+    ) as target:
+        patched = _patch_stream(source, target, updates)
+    os.replace(staging, output_path)
+    return patched
+
+
+def track_updates(tracks: Iterable[audio.Audio]) -> dict[str, dict[str, str]]:
+    """Builds ``patch_collection`` updates from tracks, keyed by their Rekordbox uri.
+
+    The TrackID is left out, so patched entries keep the ID they already have.
+    """
+    updates = {}
+    for track in tracks:
+        attributes = track_attributes(track, 0)
+        del attributes["TrackID"]
+        updates[track._rekordbox_uri] = attributes
+    return updates
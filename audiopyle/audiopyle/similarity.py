@@ -0,0 +1,245 @@
+"""Nearest-neighbour search over pooled feature vectors.
+
+Vectors are standardized per feature (the raw features have very different
+scales, a spectral centroid is in the thousands while MFCC deltas are near
+zero), optionally reduced with PCA, and L2-normalized so the cosine similarity
+of two tracks is the dot product of their rows.
+
+Small libraries are searched exhaustively with a single matrix product. For
+large ones the index can be partitioned into ``n_lists`` clusters with
+spherical k-means (an inverted file, or IVF, index): a query then only scores
+the tracks in the ``n_probe`` clusters closest to it.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Self
+
+import numpy as np
+
+from audiopyle import featurestore
+
+# Iterations of k-means when partitioning the index
+KMEANS_ITERATIONS: int = 20
+
+# Tracks k-means is trained on, the rest are only assigned to the clusters
+KMEANS_SAMPLE_SIZE: int = 50_000
+
+
+@dataclass
+class Match:
+    """A track similar to a query.
+
+    Args:
+        path (str): Path to the track.
+        score (float): Cosine similarity to the query, 1 for identical features.
+    """
+
+    path: str
+    score: float
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores of each row, best first."""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, seed: int) -> np.ndarray:
+    """Trains ``n_lists`` unit-length centroids with spherical k-means."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE_SIZE:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE_SIZE, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        # Empty clusters keep their previous centroid
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class SimilarityIndex:
+    """Cosine similarity index over the feature vectors of a library.
+
+    Args:
+        vectors (np.ndarray): Feature vectors, one row per track.
+        paths (Iterable[str]): Path to the track of each row.
+        n_components (int, Optional): Reduce vectors to this many principal
+            components, keeps every feature if not given.
+        n_lists (int, Optional): Partition the index into this many clusters for
+            approximate search, searches exhaustively if not given. Around the
+            square root of the number of tracks is a good start.
+        seed (int): Seed of the k-means initialization.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        paths: Iterable[str],
+        n_components: int | None = None,
+        n_lists: int | None = None,
+        seed: int = 0,
+    ):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.paths = [str(path) for path in paths]
+        if len(self.paths) != len(vectors):
+            raise ValueError("Expected one path per vector")
+
+        self.mean = vectors.mean(axis=0)
+        std = vectors.std(axis=0)
+        self.scale = np.where(std > 0, std, 1).astype(np.float32)
+        self.components = None
+        if n_components is not None:
+            standardized = (vectors - self.mean) / self.scale
+            _, _, vt = np.linalg.svd(standardized, full_matrices=False)
+            self.components = np.ascontiguousarray(vt[:n_components].T)
+
+        self.vectors = self.transform(vectors)
+        self.centroids = None
+        self.ids = np.arange(len(self.paths))
+        self.offsets = np.array([0, len(self.paths)])
+        if n_lists is not None and n_lists < len(self.paths):
+            self._partition(n_lists, seed)
+        self._index_rows()
+
+    @classmethod
+    def from_store(cls, store: featurestore.FeatureStore, **kwargs) -> Self:
+        """Builds an index over every vector in a feature store."""
+        matrix, entries = store.load()
+        return cls(matrix, [entry.path for entry in entries], **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _index_rows(self) -> None:
+        """Maps each path to its row, and each row to its position in ``vectors``."""
+        self._rows = {path: row for row, path in enumerate(self.paths)}
+        self._positions = np.empty(len(self.ids), dtype=np.int64)
+        self._positions[self.ids] = np.arange(len(self.ids))
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Maps raw feature vectors into the index's normalized space."""
+        vectors = (np.atleast_2d(vectors).astype(np.float32) - self.mean) / self.scale
+        if self.components is not None:
+            vectors = vectors @ self.components
+        return _normalize(vectors).astype(np.float32)
+
+    def _partition(self, n_lists: int, seed: int) -> None:
+        """Clusters the rows and stores them grouped by cluster."""
+        self.centroids = _kmeans(self.vectors, n_lists, seed)
+        assignments = np.argmax(self.vectors @ self.centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        self.vectors = np.ascontiguousarray(self.vectors[order])
+        self.ids = order
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def search(
+        self, queries: np.ndarray, k: int = 10, n_probe: int = 8
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Finds the ``k`` rows most similar to each of a batch of raw feature vectors.
+
+        Args:
+            queries (np.ndarray): Raw feature vectors, one per row.
+            k (int): Number of matches per query.
+            n_probe (int): Clusters searched per query when the index is
+                partitioned. Higher is slower but misses fewer matches.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and cosine similarities of
+                the matches, each of shape (queries, k) and best first. Queries with
+                fewer than ``k`` candidates are padded with index -1 and score -inf.
+        """
+        return self._search(self.transform(queries), k, n_probe)
+
+    def _search(
+        self, queries: np.ndarray, k: int, n_probe: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Searches with queries already in the index's normalized space."""
+        indices = np.full((len(queries), k), -1)
+        similarities = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if self.centroids is None:
+            scores = queries @ self.vectors.T
+            top = _top_k(scores, k)
+            indices[:, : top.shape[1]] = self.ids[top]
+            similarities[:, : top.shape[1]] = np.take_along_axis(scores, top, axis=1)
+            return indices, similarities
+
+        probes = _top_k(queries @ self.centroids.T, n_probe)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[j], self.offsets[j + 1]) for j in lists]
+            )
+            if not len(candidates):
+                continue
+            scores = self.vectors[candidates] @ query
+            top = _top_k(scores[np.newaxis], k)[0]
+            indices[i, : len(top)] = self.ids[candidates[top]]
+            similarities[i, : len(top)] = scores[top]
+        return indices, similarities
+
+    def similar(self, path: str, k: int = 10, n_probe: int = 8) -> list[Match]:
+        """Finds the tracks that sound most like a track in the index.
+
+        Args:
+            path (str): Path to a track in the index.
+            k (int): Number of matches, not counting the track itself.
+            n_probe (int): Clusters searched when the index is partitioned.
+
+        Raises:
+            KeyError: If the track isn't in the index.
+        """
+        row = self._rows[str(path)]
+        position = self._positions[row]
+        query = self.vectors[position : position + 1]
+        indices, scores = self._search(query, k + 1, n_probe)
+        return [
+            Match(self.paths[index], float(score))
+            for index, score in zip(indices[0], scores[0])
+            if index >= 0 and index != row
+        ][:k]
+
+    def save(self, path: str | Path) -> None:
+        """Saves the index to a ``.npz`` archive."""
+        arrays = {
+            "paths": np.array(self.paths),
+            "mean": self.mean,
+            "scale": self.scale,
+            "vectors": self.vectors,
+            "ids": self.ids,
+            "offsets": self.offsets,
+        }
+        if self.components is not None:
+            arrays["components"] = self.components
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Self:
+        """Loads an index saved with ``save``."""
+        index = cls.__new__(cls)
+        with np.load(path) as archive:
+            index.paths = archive["paths"].tolist()
+            index.mean = archive["mean"]
+            index.scale = archive["scale"]
+            index.vectors = archive["vectors"]
+            index.ids = archive["ids"]
+            index.offsets = archive["offsets"]
+            index.components = archive.get("components")
+            index.centroids = archive.get("centroids")
+        index._index_rows()
+        return index
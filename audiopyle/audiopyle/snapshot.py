@@ -0,0 +1,178 @@
+"""Library snapshots as newline-delimited JSON.
+
+A snapshot starts with a header line naming the fields, followed by one JSON
+array of field values per track:
+
+    {"format": "audiopyle-snapshot", "version": 1, "fields": ["_filename", ...]}
+    ["01 - Intro.mp3", "/music/Album/01 - Intro.mp3", ...]
+
+Values are read straight off each track with ``operator.attrgetter`` and
+encoded as an array, without building a dict per track. Snapshots are read
+back into ``audio.Audio`` objects without touching the files, and two
+snapshots can be compared to see which tracks were added, removed or changed.
+Paths ending in ``.gz`` are compressed.
+"""
+
+import gzip
+import json
+import os
+from dataclasses import dataclass, field, fields
+from itertools import islice
+from operator import attrgetter
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from audiopyle import audio, records
+from audiopyle.exceptions import SnapshotError
+
+FORMAT: str = "audiopyle-snapshot"
+VERSION: int = 1
+
+FIELDS: tuple[str, ...] = tuple(f.name for f in fields(audio.Audio))
+_get_values = attrgetter(*FIELDS)
+
+# Tracks encoded per write
+BATCH_SIZE: int = 1024
+
+
+def _open(path: str | Path, mode: str) -> IO[str]:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=1)
+    return open(path, mode, encoding="utf-8")
+
+
+def _iter_values(tracks: Iterable[audio.Audio] | records.TrackTable) -> Iterator[tuple]:
+    """Yields each track's field values in ``FIELDS`` order."""
+    if isinstance(tracks, records.TrackTable):
+        yield from zip(*(tracks.column(name) for name in FIELDS))
+    else:
+        for track in tracks:
+            if isinstance(track, audio.Audio):
+                yield _get_values(track)
+
+
+def export_snapshot(
+    tracks: Iterable[audio.Audio] | records.TrackTable, snapshot_path: str | Path
+) -> int:
+    """Writes tracks to a snapshot, streaming them from any iterable.
+
+    Args:
+        tracks (Iterable[audio.Audio] | records.TrackTable): Tracks to write, i.e the
+            result of ``Directory.scan`` or ``Directory.table``. Files that aren't
+            ``audio.Audio`` are skipped.
+        snapshot_path (str | Path): Path of the snapshot, overwritten if it exists.
+
+    Returns:
+        int: Number of tracks written.
+    """
+    # ``_filepath`` may hold a Path after ``File.move``
+    encode = json.JSONEncoder(ensure_ascii=False, default=os.fspath).encode
+    count = 0
+    with _open(snapshot_path, "w") as fh:
+        fh.write(json.dumps({"format": FORMAT, "version": VERSION, "fields": FIELDS}))
+        fh.write("\n")
+        batch = []
+        for values in _iter_values(tracks):
+            batch.append(encode(values))
+            if len(batch) >= BATCH_SIZE:
+                fh.write("\n".join(batch) + "\n")
+                count += len(batch)
+                batch.clear()
+        if batch:
+            fh.write("\n".join(batch) + "\n")
+            count += len(batch)
+    return count
+
+
+def _read_values(snapshot_path: str | Path) -> tuple[list[str], Iterator[list]]:
+    """Reads a snapshot's field names and lazily its tracks' field values.
+
+    Lines are decoded ``BATCH_SIZE`` at a time as a single JSON array.
+
+    Raises:
+        SnapshotError: If the file isn't a snapshot.
+    """
+    fh = _open(snapshot_path, "r")
+    try:
+        header = json.loads(fh.readline())
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        header = None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        fh.close()
+        raise SnapshotError(f"{snapshot_path} is not an audiopyle snapshot")
+
+    def values() -> Iterator[list]:
+        with fh:
+            while lines := [line for line in islice(fh, BATCH_SIZE) if line.strip()]:
+                yield from json.loads(f"[{','.join(lines)}]")
+
+    return header["fields"], values()
+
+
+def import_snapshot(snapshot_path: str | Path) -> Iterator[audio.Audio]:
+    """Lazily rebuilds the tracks of a snapshot, without reading the audio files.
+
+    Fields the snapshot doesn't have (i.e it was written before a field was added
+    to ``audio.Audio``) take their default, fields ``audio.Audio`` no longer has
+    are ignored.
+
+    Raises:
+        SnapshotError: If the file isn't a snapshot.
+    """
+    names, rows = _read_values(snapshot_path)
+    if tuple(names) == FIELDS:
+        return (audio.Audio(*values) for values in rows)
+
+    known = [(i, name) for i, name in enumerate(names) if name in FIELDS]
+    return (audio.Audio(**{name: values[i] for i, name in known}) for values in rows)
+
+
+@dataclass
+class SnapshotDiff:
+    """Differences between two snapshots, tracks are identified by filepath.
+
+    Args:
+        added (list[str]): Filepaths only in the new snapshot.
+        removed (list[str]): Filepaths only in the old snapshot.
+        changed (dict[str, dict[str, tuple]]): For tracks in both whose fields
+            differ, the old and new value of each differing field.
+    """
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: dict[str, dict[str, tuple]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_snapshots(old_path: str | Path, new_path: str | Path) -> SnapshotDiff:
+    """Compares two snapshots.
+
+    Only the old snapshot is held in memory, the new one is streamed.
+    """
+    old_names, old_rows = _read_values(old_path)
+    new_names, new_rows = _read_values(new_path)
+    old_key, new_key = old_names.index("_filepath"), new_names.index("_filepath")
+    same_fields = old_names == new_names
+
+    old = {values[old_key]: values for values in old_rows}
+    result = SnapshotDiff()
+    for values in new_rows:
+        filepath = values[new_key]
+        previous = old.pop(filepath, None)
+        if previous is None:
+            result.added.append(filepath)
+        elif not same_fields or previous != values:
+            before = dict(zip(old_names, previous))
+            after = dict(zip(new_names, values))
+            changes = {
+                name: (before.get(name), after.get(name))
+                for name in before.keys() | after.keys()
+                if before.get(name) != after.get(name)
+            }
+            if changes:
+                result.changed[filepath] = changes
+    result.removed = sorted(old)
+    result.added.sort()
+    return result
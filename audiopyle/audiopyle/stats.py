@@ -0,0 +1,130 @@
+"""Single-pass directory statistics.
+
+The tree is walked once with ``os.scandir``, which hands back each entry's
+type without a separate ``stat`` call, and every file is counted, measured
+and sorted by extension in that same pass. Top-level subdirectories can be
+walked on a thread pool and their results merged, since ``scandir`` and
+``stat`` release the GIL. The paths found can be kept so a scan of the same
+directory doesn't have to walk it again.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
+
+
+@dataclass
+class DirectoryStats:
+    """Statistics of the files beneath a directory.
+
+    Args:
+        files (int): Number of files.
+        directories (int): Number of subdirectories.
+        bytes (int): Total size of the files' contents.
+        extensions (Counter[str]): Number of files per lowercase extension, i.e
+            ``".mp3"``, files without one are counted under ``""``.
+        deepest_path (str, Optional): Path of the most deeply nested file.
+        depth (int): Number of directories between the root and ``deepest_path``,
+            0 for files directly beneath the root.
+        paths (list[str], Optional): Path of every file in no particular order,
+            only kept when asked for.
+    """
+
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    extensions: Counter[str] = field(default_factory=Counter)
+    deepest_path: str | None = None
+    depth: int = 0
+    paths: list[str] | None = None
+
+    def merge(self, other: "DirectoryStats") -> Self:
+        """Adds another walk's statistics to these, i.e those of a sibling subdirectory."""
+        self.files += other.files
+        self.directories += other.directories
+        self.bytes += other.bytes
+        self.extensions.update(other.extensions)
+        if other.deepest_path is not None and (
+            self.deepest_path is None or other.depth > self.depth
+        ):
+            self.deepest_path, self.depth = other.deepest_path, other.depth
+        if other.paths is not None:
+            if self.paths is None:
+                self.paths = []
+            self.paths.extend(other.paths)
+        return self
+
+
+def _walk(
+    directory: str,
+    depth: int,
+    keep_paths: bool,
+    subdirectories: list[str] | None = None,
+) -> DirectoryStats:
+    """Walks a directory whose files lie ``depth`` directories beneath the root.
+
+    Subdirectories are collected into ``subdirectories`` rather than walked when
+    it is given.
+    """
+    result = DirectoryStats(paths=[] if keep_paths else None)
+    stack = [(directory, depth)]
+    while stack:
+        current, current_depth = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    result.directories += 1
+                    if subdirectories is not None:
+                        subdirectories.append(entry.path)
+                    else:
+                        stack.append((entry.path, current_depth + 1))
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                result.files += 1
+                result.bytes += size
+                result.extensions[os.path.splitext(entry.name)[1].lower()] += 1
+                if result.deepest_path is None or current_depth > result.depth:
+                    result.deepest_path, result.depth = entry.path, current_depth
+                if keep_paths:
+                    result.paths.append(entry.path)
+    return result
+
+
+def collect_stats(
+    directory: str | Path, workers: int = 1, keep_paths: bool = False
+) -> DirectoryStats:
+    """Collects the statistics of every file beneath a directory in a single walk.
+
+    Symbolic links to directories are not followed, symbolic links to files are
+    counted with the size of their target.
+
+    Args:
+        directory (str | Path): Directory to walk.
+        workers (int): Number of threads, each walking top-level subdirectories,
+            walks serially when 1.
+        keep_paths (bool): Keep the path of every file in ``paths``.
+
+    Returns:
+        DirectoryStats: Statistics of the directory.
+    """
+    directory = os.fspath(directory)
+    if workers <= 1:
+        return _walk(directory, 0, keep_paths)
+
+    # Files directly beneath the root are counted here, subdirectories on the pool
+    subdirectories = []
+    result = _walk(directory, 0, keep_paths, subdirectories)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for subdirectory_stats in pool.map(
+            lambda path: _walk(path, 1, keep_paths), subdirectories
+        ):
+            result.merge(subdirectory_stats)
+    return result
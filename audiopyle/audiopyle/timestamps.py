@@ -0,0 +1,146 @@
+"""Cross-platform reading and preserving of file timestamps.
+
+Access and modification times are handled with ``os.stat``/``os.utime`` at
+nanosecond precision everywhere. Creation (birth) times are read from
+``os.stat`` where the platform reports them, via ``statx`` on Linux, and can
+only be written on Windows, where ``win32file`` is imported on first use.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cache
+from pathlib import Path
+from typing import Iterable
+
+IS_WINDOWS: bool = sys.platform == "win32"
+
+# statx(2) constants and the offset of stx_btime within struct statx
+AT_FDCWD: int = -100
+STATX_BTIME: int = 0x800
+STATX_BUFFER_SIZE: int = 256
+STATX_BTIME_OFFSET: int = 80
+
+
+@dataclass
+class FileTimes:
+    """Timestamps of a file in nanoseconds since the epoch.
+
+    Args:
+        accessed_ns (int): Last access time.
+        modified_ns (int): Last modification time.
+        created_ns (int, Optional): Creation time, None where the platform doesn't report it.
+    """
+
+    accessed_ns: int
+    modified_ns: int
+    created_ns: int | None = None
+
+
+@cache
+def _statx():
+    """Returns libc's ``statx`` function, or None if it isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        statx = libc.statx
+    except (OSError, AttributeError):
+        return None
+    statx.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_uint,
+        ctypes.c_char_p,
+    ]
+    statx.restype = ctypes.c_int
+    return statx
+
+
+def _linux_birth_time_ns(path: str | Path) -> int | None:
+    """Reads a file's birth time via ``statx``, if libc and the filesystem support it."""
+    statx = _statx()
+    if statx is None:
+        return None
+
+    buffer = ctypes.create_string_buffer(STATX_BUFFER_SIZE)
+    if statx(AT_FDCWD, os.fsencode(path), 0, STATX_BTIME, buffer) != 0:
+        return None
+
+    mask = struct.unpack_from("=I", buffer, 0)[0]
+    if not mask & STATX_BTIME:
+        return None
+    seconds, nanoseconds = struct.unpack_from("=qI", buffer, STATX_BTIME_OFFSET)
+    return seconds * 1_000_000_000 + nanoseconds
+
+
+def get_times(path: str | Path) -> FileTimes:
+    """Reads the access, modification and (where available) creation time of a file."""
+    stat = os.stat(path)
+    if hasattr(stat, "st_birthtime_ns"):
+        created_ns = stat.st_birthtime_ns
+    elif hasattr(stat, "st_birthtime"):
+        created_ns = int(stat.st_birthtime * 1_000_000_000)
+    elif IS_WINDOWS:
+        # Before Python 3.12 st_ctime is the creation time on Windows
+        created_ns = stat.st_ctime_ns
+    else:
+        created_ns = _linux_birth_time_ns(path)
+
+    return FileTimes(
+        accessed_ns=stat.st_atime_ns,
+        modified_ns=stat.st_mtime_ns,
+        created_ns=created_ns,
+    )
+
+
+def _set_windows_creation_time(path: str | Path, created_ns: int) -> None:
+    """Sets the creation time of a file on Windows."""
+    import win32con
+    import win32file
+
+    handle = win32file.CreateFile(
+        str(path),
+        win32con.GENERIC_WRITE,
+        0,
+        None,
+        win32con.OPEN_EXISTING,
+        win32con.FILE_ATTRIBUTE_NORMAL,
+        None,
+    )
+    try:
+        created = datetime.fromtimestamp(created_ns / 1_000_000_000, tz=timezone.utc)
+        win32file.SetFileTime(handle, created, None, None)
+    finally:
+        handle.close()
+
+
+def set_times(path: str | Path, times: FileTimes) -> None:
+    """Applies timestamps to a file.
+
+    Creation times are only applied on Windows, other platforms don't allow
+    setting them.
+    """
+    os.utime(path, ns=(times.accessed_ns, times.modified_ns))
+    if IS_WINDOWS and times.created_ns is not None:
+        _set_windows_creation_time(path, times.created_ns)
+
+
+def apply_times(entries: Iterable[tuple[str | Path, FileTimes]]) -> list[Path]:
+    """Applies timestamps to many files, i.e once a batch of moves has finished.
+
+    Returns:
+        list[Path]: Files whose timestamps could not be applied.
+    """
+    failed = []
+    for path, times in entries:
+        try:
+            set_times(path, times)
+        except OSError:
+            failed.append(Path(path))
+    return failed
@@ -0,0 +1,412 @@
+"""Watching a download folder and organizing new tracks as they arrive.
+
+On Linux the directory tree is watched with inotify (through ``ctypes``, no
+extra dependency), elsewhere, or when inotify is unavailable, it is polled
+with ``os.scandir`` and compared against the previous listing.
+
+A file isn't handed on as soon as it shows up: downloads are written in many
+steps, so a file is only reported once its size and modification time have
+stayed the same for ``settle_seconds``. Each settled file is parsed on its
+own, folded into a running ``audio.AlbumIndex`` and moved by the organizer,
+so ingesting a file costs the same however large the library is.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from audiopyle import audio, builtins, organizer
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK: int = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Signature of a file's contents, (size, mtime_ns)
+Signature = tuple[int, int]
+
+
+def _signature(path: str) -> Signature | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _InotifySource:
+    """Reports paths changed beneath a directory through inotify.
+
+    Raises:
+        OSError: If inotify isn't available.
+    """
+
+    def __init__(self, directory: str | Path):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Self-pipe that ``wake`` writes to, interrupting a blocked ``wait``
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._directories: dict[int, str] = {}
+        self.overflowed = False
+        self._add_tree(str(directory))
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._directories[wd] = directory
+
+    def _add_tree(self, directory: str) -> list[str]:
+        """Watches a directory and its subdirectories, returning the files found in them."""
+        self._add_watch(directory)
+        files = []
+        stack = [directory]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            self._add_watch(entry.path)
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            files.append(entry.path)
+            except OSError:
+                continue
+        return files
+
+    def wait(self, timeout: float) -> set[str]:
+        """Waits up to ``timeout`` seconds for events, returning the paths they concern."""
+        readable, _, _ = select.select(
+            [self._fd, self._wake_read], [], [], max(timeout, 0)
+        )
+        if self._wake_read in readable:
+            try:
+                while os.read(self._wake_read, 512):
+                    pass
+            except BlockingIOError:
+                pass
+        if self._fd not in readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_DELETE_SELF:
+                    del self._directories[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    # Files may land in a new directory before it is watched
+                    changed.update(self._add_tree(path))
+                else:
+                    changed.add(path)
+        return changed
+
+    def wake(self) -> None:
+        """Makes a ``wait`` in another thread return early."""
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            # The pipe is full, a wake up is already pending
+            pass
+
+    def close(self) -> None:
+        os.close(self._fd)
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+
+class _PollingSource:
+    """Reports paths changed beneath a directory by comparing ``os.scandir`` listings."""
+
+    def __init__(self, directory: str | Path, interval: float = 1.0):
+        self.directory = directory
+        self.interval = interval
+        self._woken = threading.Event()
+        self._listing = self._list()
+
+    def _list(self) -> dict[str, Signature]:
+        listing = {}
+        for entry in builtins.scan_tree(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            listing[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return listing
+
+    def wait(self, timeout: float) -> set[str]:
+        """Sleeps up to ``timeout`` seconds (at most one interval) and lists the tree again."""
+        if self._woken.wait(max(min(timeout, self.interval), 0)):
+            self._woken.clear()
+        listing = self._list()
+        changed = {
+            path
+            for path, signature in listing.items()
+            if self._listing.get(path) != signature
+        }
+        self._listing = listing
+        return changed
+
+    def wake(self) -> None:
+        """Makes a ``wait`` in another thread return early."""
+        self._woken.set()
+
+    def close(self) -> None:
+        pass
+
+
+class Watcher:
+    """Reports files beneath a directory once they have been created or changed and settled.
+
+    Args:
+        directory (str | Path): Directory to watch, including its subdirectories.
+        settle_seconds (float): Time a file's size and modification time must stay
+            the same before it is reported.
+        extensions (Iterable[str], Optional): Only report files with these
+            extensions, i.e ``[".mp3"]``.
+        use_inotify (bool, Optional): Force inotify on or off, by default it is used
+            wherever it is available.
+        poll_interval (float): Seconds between listings when polling.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        settle_seconds: float = 0.5,
+        extensions: Iterable[str] | None = (".mp3",),
+        use_inotify: bool | None = None,
+        poll_interval: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.settle_seconds = settle_seconds
+        self.extensions = (
+            tuple(extension.lower() for extension in extensions)
+            if extensions is not None
+            else None
+        )
+        self.logger = builtins.get_or_configure_logger(__name__)
+
+        self._source: _InotifySource | _PollingSource | None = None
+        if use_inotify is not False and sys.platform.startswith("linux"):
+            try:
+                self._source = _InotifySource(self.directory)
+            except (OSError, AttributeError) as e:
+                if use_inotify:
+                    raise
+                self.logger.debug(f"inotify unavailable, polling instead: {e}")
+        if self._source is None:
+            self._source = _PollingSource(self.directory, poll_interval)
+
+        # Files waiting to settle, with their last seen signature and when it changed
+        self._pending: dict[str, tuple[Signature, float]] = {}
+        self._ignored: dict[str, Signature] = {}
+        self._stopped = threading.Event()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return isinstance(self._source, _InotifySource)
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops watching, must not be called while another thread is polling."""
+        self._source.close()
+
+    def stop(self) -> None:
+        """Ends iteration and any ``poll`` in progress, safe to call from another thread."""
+        self._stopped.set()
+        self._source.wake()
+
+    def ignore(self, path: str | Path) -> None:
+        """Ignores the next change reported for a file, i.e one we just moved there ourselves."""
+        signature = _signature(str(path))
+        if signature is not None:
+            self._ignored[str(path)] = signature
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith("."):
+            return False
+        return self.extensions is None or name.lower().endswith(self.extensions)
+
+    def _track(self, paths: Iterable[str], now: float) -> None:
+        for path in paths:
+            if not self._wanted(path):
+                continue
+            signature = _signature(path)
+            if signature is None:
+                self._pending.pop(path, None)
+            elif self._ignored.get(path) == signature:
+                del self._ignored[path]
+            elif path not in self._pending or self._pending[path][0] != signature:
+                self._pending[path] = (signature, now)
+
+    def _settled(self, now: float) -> list[str]:
+        ready = []
+        for path, (signature, changed_at) in list(self._pending.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+            current = _signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != signature:
+                self._pending[path] = (current, now)
+            else:
+                del self._pending[path]
+                ready.append(path)
+        return sorted(ready)
+
+    def poll(self, timeout: float = 1.0) -> list[str]:
+        """Waits up to ``timeout`` seconds for files to settle.
+
+        Returns early, possibly with no files, once ``stop`` is called.
+
+        Returns:
+            list[str]: Paths of the files that settled, possibly none.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            ready = self._settled(now)
+            if ready or now >= deadline or self._stopped.is_set():
+                return ready
+
+            wait = deadline - now
+            if self._pending:
+                next_settle = min(t for _, t in self._pending.values())
+                wait = min(wait, max(next_settle + self.settle_seconds - now, 0.01))
+            self._track(self._source.wait(wait), time.monotonic())
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields settled files until ``stop`` is called, i.e from another thread."""
+        while not self._stopped.is_set():
+            yield from self.poll()
+
+
+class Ingestor:
+    """Parses, aggregates and organizes files one at a time.
+
+    Args:
+        root (str | Path): Directory files are organized into.
+        template (organizer.PathTemplate | str): Template for each file's target
+            directory relative to ``root``.
+        backend (str | audio.MetadataBackend, Optional): Metadata backend used to parse files.
+        index (audio.AlbumIndex, Optional): Album aggregates to extend, i.e built
+            from a scan of the existing library. Starts empty if not given.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        template: organizer.PathTemplate | str = organizer.DEFAULT_TEMPLATE,
+        backend: str | audio.MetadataBackend | None = None,
+        index: audio.AlbumIndex | None = None,
+    ):
+        self.root = Path(root)
+        self.template = template
+        self.backend = backend
+        self.index = index if index is not None else audio.AlbumIndex()
+
+    def ingest(self, filepath: str | Path) -> organizer.MoveResult:
+        """Parses a single file, folds it into its album and moves it into place.
+
+        The file takes the album's shared artist and download date, tracks that were
+        already moved aren't revisited.
+        """
+        track = audio.Audio._from_filepath(Path(filepath), self.backend)
+        self.index.add(track)
+        track = self.index.resolve(track)
+        plan = organizer.plan_moves([track], self.root, self.template)
+        return organizer.execute_plan(plan, workers=1)
+
+
+def watch(
+    directory: str | Path,
+    root: str | Path | None = None,
+    template: organizer.PathTemplate | str = organizer.DEFAULT_TEMPLATE,
+    settle_seconds: float = 0.5,
+    stop: threading.Event | None = None,
+    on_ingest: Callable[[str, organizer.MoveResult], None] | None = None,
+    backend: str | audio.MetadataBackend | None = None,
+    index: audio.AlbumIndex | None = None,
+    **kwargs,
+) -> None:
+    """Organizes files as they arrive in a directory, until ``stop`` is set.
+
+    Args:
+        directory (str | Path): Directory to watch, i.e a download folder.
+        root (str | Path, Optional): Directory files are organized into, the watched
+            directory if not given.
+        template (organizer.PathTemplate | str): Template for each file's target
+            directory relative to ``root``.
+        settle_seconds (float): Time a file must stay unchanged before it is ingested.
+        stop (threading.Event, Optional): Set to stop watching, runs forever if not given.
+        on_ingest (Callable[[str, organizer.MoveResult], None], Optional): Called
+            with each ingested file and the result of moving it.
+        backend (str | audio.MetadataBackend, Optional): Metadata backend used to parse files.
+        index (audio.AlbumIndex, Optional): Album aggregates to extend, i.e built
+            from a scan of ``root`` so arriving tracks join the albums already
+            there. Starts empty if not given.
+        **kwargs: Passed on to ``Watcher``.
+    """
+    stop = stop or threading.Event()
+    ingestor = Ingestor(
+        root if root is not None else directory, template, backend=backend, index=index
+    )
+    with Watcher(directory, settle_seconds=settle_seconds, **kwargs) as watcher:
+        while not stop.is_set():
+            for filepath in watcher.poll(timeout=0.5):
+                try:
+                    result = ingestor.ingest(filepath)
+                except Exception as e:
+                    watcher.logger.error(f"Error ingesting {filepath}: {e}")
+                    continue
+                for move in result.moved:
+                    watcher.ignore(move.target)
+                for move, error in result.failed:
+                    watcher.logger.error(f"Error moving {move.source}: {error}")
+                if on_ingest is not None:
+                    on_ingest(filepath, result)
@@ -0,0 +1,27 @@
+"""Benchmark bandcamp tag extraction against the full BeautifulSoup parse.
+
+Run with ``python -m tests.benchmarks.bench_bandcamp`` from the package root.
+"""
+
+import timeit
+
+from audiopyle import bandcamp
+from tests.conftest import TEST_DATA
+
+
+def main(number: int = 50):
+    for page in sorted(TEST_DATA.glob("bandcamp_*.html")):
+        content = page.read_bytes()
+        assert bandcamp._extract_tags(content) == bandcamp._extract_tags_soup(content)
+
+        print(f"{page.name} ({len(content) // 1024} KB)")
+        for name, extract in [
+            ("BeautifulSoup", bandcamp._extract_tags_soup),
+            ("HTMLParser", bandcamp._extract_tags),
+        ]:
+            seconds = timeit.timeit(lambda: extract(content), number=number)
+            print(f"  {name:<14} {seconds / number * 1000:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
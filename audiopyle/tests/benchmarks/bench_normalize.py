@@ -0,0 +1,43 @@
+"""Benchmark Rekordbox uri conversion against the original ``urllib`` based one.
+
+Run with ``python -m tests.benchmarks.bench_normalize`` from the package root.
+"""
+
+import time
+
+from audiopyle import normalize
+from tests.unit.test_normalize import _reference_uri
+
+
+def _library(n_paths: int, tracks_per_album: int = 12) -> list[str]:
+    return [
+        f"/home/dj/Music/2023/{i // tracks_per_album % 12:02d} - Month/"
+        f"Artíst {i // tracks_per_album} - Album (Deluxe Edition)/"
+        f"{i % tracks_per_album:02d} - Track Name feat. Someone [Remix].mp3"
+        for i in range(n_paths)
+    ]
+
+
+def main(n_paths: int = 1_000_000):
+    paths = _library(n_paths)
+    assert all(
+        normalize.filepath_to_rekordbox_uri(p) == _reference_uri(p)
+        for p in paths[:1000]
+    )
+
+    print(f"{n_paths} paths")
+    for name, convert in [
+        ("urllib + re.sub", _reference_uri),
+        ("normalize", normalize.filepath_to_rekordbox_uri),
+        ("normalize.quote", lambda p: normalize.quote(p)),
+    ]:
+        normalize._quote_directory.cache_clear()
+        start = time.perf_counter()
+        for path in paths:
+            convert(path)
+        seconds = time.perf_counter() - start
+        print(f"  {name:<16} {seconds:6.2f} s  {seconds / n_paths * 1e6:6.2f} us/path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark similar-track queries on a synthetic 100k track library.
+
+Run with ``python -m tests.benchmarks.bench_similarity`` from the package root.
+"""
+
+import time
+import timeit
+
+import numpy as np
+
+from audiopyle import similarity
+
+
+def main(n_tracks: int = 100_000, dimensions: int = 58, number: int = 100):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n_tracks, dimensions)).astype(np.float32)
+    paths = [f"/music/{i}.mp3" for i in range(n_tracks)]
+    queries = vectors[rng.choice(n_tracks, number, replace=False)]
+
+    print(f"{n_tracks} tracks, {dimensions} features")
+    for name, kwargs in [
+        ("exact", {}),
+        ("pca", {"n_components": 16}),
+        ("ivf", {"n_lists": int(np.sqrt(n_tracks))}),
+        ("pca + ivf", {"n_components": 16, "n_lists": int(np.sqrt(n_tracks))}),
+    ]:
+        start = time.perf_counter()
+        index = similarity.SimilarityIndex(vectors, paths, **kwargs)
+        build = time.perf_counter() - start
+
+        single = timeit.timeit(
+            lambda: [index.search(query, k=10) for query in queries], number=1
+        )
+        batch = timeit.timeit(lambda: index.search(queries, k=10), number=1)
+        print(
+            f"  {name:<10} build {build:6.2f} s  "
+            f"{single / number * 1000:7.2f} ms/query  "
+            f"{batch / number * 1000:7.2f} ms/query batched"
+        )
+
+
+if __name__ == "__main__":
+    main()
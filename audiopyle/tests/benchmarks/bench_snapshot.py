@@ -0,0 +1,43 @@
+"""Benchmark exporting, importing and diffing a 100k track library snapshot.
+
+Run with ``python -m tests.benchmarks.bench_snapshot`` from the package root.
+"""
+
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from audiopyle import snapshot
+from tests.conftest import make_audio
+
+
+def _timed(name: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"  {name:<8} {time.perf_counter() - start:6.2f} s")
+    return result
+
+
+def main(n_tracks: int = 100_000):
+    tracks = [
+        replace(
+            make_audio(f"/music/Album {i // 12}/{i % 12:02d} - Track.mp3"),
+            album=f"Album {i // 12}",
+            tags=["dub", "techno"],
+        )
+        for i in range(n_tracks)
+    ]
+
+    print(f"{n_tracks} tracks")
+    with tempfile.TemporaryDirectory() as directory:
+        old, new = Path(directory, "old.ndjson"), Path(directory, "new.ndjson")
+        _timed("export", lambda: snapshot.export_snapshot(tracks, old))
+        _timed("import", lambda: list(snapshot.import_snapshot(old)))
+        tracks[0] = replace(tracks[0], title="Retitled")
+        snapshot.export_snapshot(tracks, new)
+        _timed("diff", lambda: snapshot.diff_snapshots(old, new))
+
+
+if __name__ == "__main__":
+    main()
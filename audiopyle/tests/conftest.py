@@ -1 +1,186 @@
 """Test fixtures for pytest"""
+
+import struct
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from audiopyle import audio
+
+# Data files shared by the unit tests
+TEST_DATA = Path(__file__).parent / "unit" / "test_data"
+
+# MPEG1 Layer III, 128kbps, 44.1kHz, stereo
+MPEG_FRAME_HEADER = b"\xff\xfb\x90\x00"
+MPEG_FRAME_LENGTH = 417
+
+
+def _syncsafe(size: int) -> bytes:
+    return bytes(
+        [(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F]
+    )
+
+
+def build_id3v2(
+    tags: dict, version: int = 3, picture: bytes | None = None, padding: int = 0
+) -> bytes:
+    """Builds an ID3v2 tag from a mapping of frame id -> text."""
+    frames = b""
+    payloads = [
+        (frame_id, b"\x03" + text.encode("utf-8")) for frame_id, text in tags.items()
+    ]
+    if picture is not None:
+        payloads.append(
+            ("APIC", b"\x00image/jpeg\x00\x03\x00" + picture),
+        )
+    for frame_id, payload in payloads:
+        if version == 4:
+            size = _syncsafe(len(payload))
+        else:
+            size = struct.pack(">I", len(payload))
+        frames += frame_id.encode("latin-1") + size + b"\x00\x00" + payload
+    frames += b"\x00" * padding
+    return b"ID3" + bytes([version, 0, 0]) + _syncsafe(len(frames)) + frames
+
+
+def build_id3v1(title: str = "", artist: str = "", album: str = "") -> bytes:
+    """Builds an ID3v1 tag."""
+
+    def _field(value: str, size: int) -> bytes:
+        return value.encode("latin-1")[:size].ljust(size, b"\x00")
+
+    return (
+        b"TAG"
+        + _field(title, 30)
+        + _field(artist, 30)
+        + _field(album, 30)
+        + _field("", 4)
+        + _field("", 30)
+        + b"\xff"
+    )
+
+
+def build_mp3(
+    tags: dict | None = None,
+    frames: int = 10,
+    version: int = 3,
+    xing_frames: int | None = None,
+    picture: bytes | None = None,
+    id3v1: bytes = b"",
+    payload: bytes = b"\x00",
+) -> bytes:
+    """Builds a minimal MP3 file: an ID3v2 tag followed by CBR Layer III frames."""
+    body = b""
+    if xing_frames is not None:
+        # Xing header sits after the 32 bytes of side information
+        xing = b"Xing" + struct.pack(">II", 0x01, xing_frames)
+        first = MPEG_FRAME_HEADER + b"\x00" * 32 + xing
+        body += first.ljust(MPEG_FRAME_LENGTH, b"\x00")
+    frame = MPEG_FRAME_HEADER + (payload * MPEG_FRAME_LENGTH)[: MPEG_FRAME_LENGTH - 4]
+    body += frame * frames
+    header = build_id3v2(tags, version=version, picture=picture) if tags else b""
+    return header + body + id3v1
+
+
+def make_audio(
+    filepath: str,
+    album: str = "Album",
+    album_artist: str = "Artist",
+    year: str = "2023",
+    month: str = "01 - January",
+) -> audio.Audio:
+    """Builds an ``audio.Audio`` record with placeholder metadata."""
+    return audio.Audio(
+        _filename=filepath.rsplit("/", 1)[-1],
+        _filepath=filepath,
+        _download_year=year,
+        _download_month=month,
+        title="Title",
+        album=album,
+        artist=album_artist,
+        album_artist=album_artist,
+        year="N/A",
+        length="0",
+        comment="",
+        origin="other",
+        bit_rate="0",
+        _rekordbox_uri="",
+    )
+
+
+def make_tracks(
+    count: int, tags: list[str] | None = None, albums: int | None = None
+) -> list[audio.Audio]:
+    """Builds ``count`` tracks at ``/music/<i>.mp3``, each with its own bpm.
+
+    With ``albums`` the tracks are spread over that many albums named ``Album <n>``.
+    """
+    return [
+        replace(
+            make_audio(
+                f"/music/{i}.mp3",
+                **({"album": f"Album {i % albums}"} if albums is not None else {}),
+            ),
+            tags=list(tags) if tags is not None else ["dub"],
+            bpm=120.0 + i,
+        )
+        for i in range(count)
+    ]
+
+
+def write_files(root: Path, files: dict[str, bytes | str]) -> list[Path]:
+    """Writes files at paths relative to ``root``, creating their directories."""
+    paths = []
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, str):
+            path.write_text(content)
+        else:
+            path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture(scope="function")
+def fx_mp3_factory(tmp_path):
+    """Returns a function writing synthetic MP3 files beneath a temporary directory."""
+
+    def _make(relative_path: str, **kwargs) -> Path:
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(build_mp3(**kwargs))
+        return path
+
+    return _make
+
+
+@pytest.fixture(scope="function")
+def fx_downloads_factory(tmp_path):
+    """Returns a function writing one placeholder download per album name.
+
+    Each file is ``downloads/<i>.mp3`` holding ``i``, the ``audio.Audio`` records
+    are returned.
+    """
+
+    def _make(albums: list[str]) -> list[audio.Audio]:
+        paths = write_files(
+            tmp_path / "downloads", {f"{i}.mp3": str(i) for i in range(len(albums))}
+        )
+        return [
+            make_audio(str(path), album=album) for path, album in zip(paths, albums)
+        ]
+
+    return _make
+
+
+@pytest.fixture(scope="function")
+def fx_music_dir(tmp_path, fx_mp3_factory):
+    """Creates a directory of synthetic MP3s spread over two albums."""
+    for i in range(6):
+        fx_mp3_factory(
+            f"music/album_{i % 2}/{i}.mp3",
+            tags={"TIT2": f"Track {i}", "TALB": f"Album {i % 2}", "TPE1": f"A{i}"},
+        )
+    yield tmp_path / "music"
@@ -0,0 +1,76 @@
+"""Test tempo and key estimation"""
+
+import numpy as np
+import pytest
+import soundfile
+
+from audiopyle import analysis, cache
+from tests.conftest import make_audio
+
+SAMPLE_RATE = 22050
+
+
+def _write_track(path, bpm: float, frequencies: list[float], seconds: float = 20):
+    """Writes a chord with a click on every beat."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    signal = sum(0.2 * np.sin(2 * np.pi * f * t) for f in frequencies)
+    click = np.exp(-np.arange(int(SAMPLE_RATE * 0.03)) / 100) * np.sin(
+        2 * np.pi * 1000 * np.arange(int(SAMPLE_RATE * 0.03)) / SAMPLE_RATE
+    )
+    for beat in np.arange(0, seconds, 60 / bpm):
+        start = int(beat * SAMPLE_RATE)
+        signal[start : start + len(click)] += click[: len(signal) - start]
+    soundfile.write(path, signal / np.abs(signal).max(), SAMPLE_RATE)
+
+
+@pytest.fixture(scope="module")
+def fx_tracks(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tracks")
+    tracks = {
+        "a_minor.wav": (120, [220.0, 261.63, 329.63]),
+        "g_major.wav": (128, [196.0, 392.0, 246.94, 293.66, 261.63, 220.0, 369.99]),
+    }
+    for name, (bpm, frequencies) in tracks.items():
+        _write_track(directory / name, bpm, frequencies)
+    return [make_audio(str(directory / name)) for name in tracks]
+
+
+@pytest.mark.parametrize(
+    "tonic,minor,expected_result",
+    [(9, False, "A"), (9, True, "Am"), (6, True, "F#m")],
+    ids=["major", "minor", "sharp"],
+)
+def test_estimate_keys_matches_profiles(tonic, minor, expected_result):
+    profile = analysis.MINOR_PROFILE if minor else analysis.MAJOR_PROFILE
+    assert analysis.estimate_keys(np.roll(profile, tonic)) == [expected_result]
+
+
+def test_estimate_keys_silence():
+    assert analysis.estimate_keys(np.zeros((2, 12))) == [None, None]
+
+
+@pytest.mark.parametrize("workers", [1, 2], ids=["serial", "processes"])
+def test_analyze_library(fx_tracks, workers):
+    missing = make_audio("/music/missing.wav")
+    analyzed = analysis.analyze_library(
+        fx_tracks + [missing], workers=workers, chunk_size=2
+    )
+
+    assert [track.key for track in analyzed] == ["Am", "G", None]
+    assert analyzed[0].bpm == pytest.approx(120, rel=0.03)
+    assert analyzed[1].bpm == pytest.approx(128, rel=0.03)
+    assert analyzed[2].bpm is None
+    assert fx_tracks[0].bpm is None
+
+
+def test_analyze_library_cache(tmp_path, fx_tracks):
+    with cache.AnalysisCache(tmp_path / "analysis.sqlite") as analysis_cache:
+        first = analysis.analyze_library(
+            fx_tracks, workers=1, analysis_cache=analysis_cache
+        )
+        second = analysis.analyze_library(
+            fx_tracks, workers=1, analysis_cache=analysis_cache
+        )
+
+        assert first == second
+        assert analysis_cache.stats == cache.CacheStats(hits=2, misses=2)
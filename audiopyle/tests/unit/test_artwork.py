@@ -0,0 +1,127 @@
+"""Test extracting and storing album artwork"""
+
+import io
+import sys
+import types
+
+import pytest
+
+from audiopyle import artwork
+from tests.conftest import make_audio
+
+COVER = b"\xff\xd8\xff\xe0cover"
+
+
+@pytest.fixture(scope="function")
+def fx_store(tmp_path):
+    with artwork.ArtworkStore(tmp_path / "artwork") as store:
+        yield store
+
+
+@pytest.fixture(scope="function")
+def fx_albums(fx_mp3_factory):
+    """Creates an album embedding its cover in every track and one with a sidecar image."""
+    tracks = []
+    for i in range(3):
+        path = fx_mp3_factory(f"music/a/{i}.mp3", tags={"TALB": "A"}, picture=COVER)
+        tracks.append(make_audio(str(path), album="A"))
+    path = fx_mp3_factory("music/b/0.mp3", tags={"TALB": "B"})
+    (path.parent / "scan.png").write_bytes(b"back")
+    (path.parent / "Folder.JPG").write_bytes(b"front")
+    tracks.append(make_audio(str(path), album="B"))
+    path = fx_mp3_factory("music/c/0.mp3", tags={"TALB": "C"})
+    tracks.append(make_audio(str(path), album="C"))
+    # Same title as the first album, by another artist
+    path = fx_mp3_factory("music/d/0.mp3", tags={"TALB": "A"})
+    tracks.append(make_audio(str(path), album="A", album_artist="Other"))
+    return tracks
+
+
+def test_extract_artwork(fx_albums):
+    embedded = artwork.extract_artwork(fx_albums[0]._filepath)
+    assert (embedded.data, embedded.mime) == (COVER, "image/jpeg")
+    sidecar = artwork.extract_artwork(fx_albums[3]._filepath)
+    assert (sidecar.data, sidecar.mime) == (b"front", "image/jpeg")
+    assert artwork.extract_artwork(fx_albums[4]._filepath) is None
+
+
+def test_put_deduplicates(fx_store):
+    digest = fx_store.put(COVER, "image/jpeg")
+    assert fx_store.put(COVER, "image/jpeg") == digest
+    assert len(list(fx_store.images_directory.rglob("*.jpg"))) == 1
+
+
+def test_add_tracks(fx_store, fx_albums):
+    assert fx_store.add_tracks(fx_albums, workers=2) == 2
+    assert set(fx_store.albums()) == {("Artist", "A"), ("Artist", "B")}
+    assert fx_store.get(("Artist", "A")).read_bytes() == COVER
+    assert fx_store.get(("Artist", "B")).read_bytes() == b"front"
+    assert fx_store.get(("Artist", "C")) is None
+    assert fx_store.get(("Other", "A")) is None
+    # Albums that already have artwork aren't read again
+    assert fx_store.add_tracks(fx_albums) == 0
+
+
+def test_thumbnail(fx_store):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (1000, 500), "red").save(buffer, format="PNG")
+    album = ("Artist", "A")
+    fx_store.assign(album, artwork.Artwork(buffer.getvalue(), "image/png", "cover.png"))
+
+    thumbnail = fx_store.thumbnail(album, size=100)
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.size == (100, 50)
+    assert fx_store.thumbnail(album, size=100) == thumbnail
+    assert fx_store.thumbnail(("Artist", "missing")) is None
+
+
+class _FakeImage:
+    """Stands in for a ``PIL.Image.Image``, saving its size as the image data."""
+
+    opened = 0
+
+    def __init__(self, size):
+        self.size = size
+
+    @classmethod
+    def open(cls, path):
+        cls.opened += 1
+        return cls((1000, 500))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def thumbnail(self, size):
+        scale = min(size[0] / self.size[0], size[1] / self.size[1], 1)
+        self.size = (round(self.size[0] * scale), round(self.size[1] * scale))
+
+    def convert(self, mode):
+        return self
+
+    def save(self, fh, format, **kwargs):
+        fh.write(f"{format} {self.size[0]}x{self.size[1]}".encode())
+
+
+def test_thumbnail_without_pillow(monkeypatch, tmp_path):
+    pil = types.ModuleType("PIL")
+    pil.Image = types.SimpleNamespace(open=_FakeImage.open)
+    monkeypatch.setitem(sys.modules, "PIL", pil)
+    monkeypatch.setattr(_FakeImage, "opened", 0)
+
+    album = ("Artist", "A")
+    with artwork.ArtworkStore(tmp_path / "artwork") as store:
+        store.assign(album, artwork.Artwork(COVER, "image/jpeg", "cover.jpg"))
+        assert store.thumbnail(album, size=100) == b"JPEG 100x50"
+        assert store.thumbnail(album, size=100) == b"JPEG 100x50"
+        assert _FakeImage.opened == 1
+
+    # Thumbnails already on disk are read back without Pillow
+    monkeypatch.setitem(sys.modules, "PIL", None)
+    with artwork.ArtworkStore(tmp_path / "artwork") as store:
+        assert store.thumbnail(album, size=100) == b"JPEG 100x50"
+        with pytest.raises(ImportError):
+            store.thumbnail(album, size=50)
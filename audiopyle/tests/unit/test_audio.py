@@ -0,0 +1,54 @@
+"""Test classes and methods defined in the audiopyle.audio module"""
+
+import pytest
+
+from audiopyle import audio
+from tests.conftest import make_audio
+
+
+@pytest.fixture(scope="function")
+def fx_album_tracks():
+    return [
+        make_audio("/a/1.mp3", album_artist="Foo", month="03 - March"),
+        make_audio("/a/2.mp3", album_artist="Bar", month="01 - January"),
+        make_audio("/b/1.mp3", album="Other", album_artist="Baz", year="2022"),
+    ]
+
+
+def test_reconcile_albums_various_artists(fx_album_tracks):
+    tracks = audio.reconcile_albums(fx_album_tracks)
+    assert [track.album_artist for track in tracks] == [
+        "Various Artists",
+        "Various Artists",
+        "Baz",
+    ]
+
+
+def test_reconcile_albums_earliest_date(fx_album_tracks):
+    tracks = audio.reconcile_albums(fx_album_tracks)
+    assert {track._download_month for track in tracks[:2]} == {"01 - January"}
+    assert tracks[2]._download_year == "2022"
+
+
+def test_reconcile_albums_order_independent(fx_album_tracks):
+    forward = audio.reconcile_albums(fx_album_tracks)
+    backward = audio.reconcile_albums(reversed(fx_album_tracks))
+    assert forward == list(reversed(backward))
+
+
+@pytest.mark.parametrize(
+    "backend,expected_result",
+    [
+        (None, audio.native_backend),
+        ("ffprobe", audio.ffprobe_backend),
+        (len, len),
+        ("foo", KeyError),
+    ],
+    ids=["default", "by_name", "callable", "raises_KeyError"],
+)
+def test_get_metadata_backend(backend, expected_result):
+    if type(expected_result) == type and issubclass(expected_result, Exception):
+        with pytest.raises(expected_result):
+            audio.get_metadata_backend(backend)
+    else:
+        assert audio.get_metadata_backend(backend) is expected_result
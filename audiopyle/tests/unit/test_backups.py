@@ -0,0 +1,105 @@
+"""Test incremental snapshot backups"""
+
+import os
+
+import pytest
+
+from audiopyle import backups
+from tests.conftest import write_files
+
+
+@pytest.fixture(scope="function")
+def fx_library(tmp_path):
+    """Creates a small library to back up."""
+    library = tmp_path / "library"
+    write_files(
+        library,
+        {
+            relative_path: relative_path.encode()
+            for relative_path in ["a.mp3", "album/b.mp3", "album/nested/c.mp3"]
+        },
+    )
+    return library
+
+
+def test_copy_file(tmp_path):
+    source = tmp_path / "source"
+    source.write_bytes(os.urandom(100_000))
+    source.chmod(0o640)
+    method = backups.copy_file(source, tmp_path / "target")
+    assert method in ["reflink", "copy_file_range", "bytes"]
+    assert (tmp_path / "target").read_bytes() == source.read_bytes()
+    assert (tmp_path / "target").stat().st_mode == source.stat().st_mode
+
+
+def test_create_snapshot(tmp_path, fx_library):
+    first = backups.create_snapshot(fx_library, tmp_path / "snapshots", workers=2)
+    assert (first.linked, sum(first.copied.values())) == (0, 3)
+    assert (first.snapshot / "album/nested/c.mp3").read_bytes() == b"album/nested/c.mp3"
+    assert set(backups.read_manifest(first.snapshot)) == {
+        "a.mp3",
+        "album/b.mp3",
+        "album/nested/c.mp3",
+    }
+
+    (fx_library / "album/b.mp3").write_bytes(b"changed")
+    (fx_library / "d.mp3").write_bytes(b"new")
+    second = backups.create_snapshot(fx_library, tmp_path / "snapshots", workers=2)
+    assert (second.linked, sum(second.copied.values())) == (2, 2)
+    assert (second.snapshot / "album/b.mp3").read_bytes() == b"changed"
+    assert os.path.samefile(first.snapshot / "a.mp3", second.snapshot / "a.mp3")
+    assert not os.path.samefile(
+        first.snapshot / "album/b.mp3", second.snapshot / "album/b.mp3"
+    )
+    assert (first.snapshot / "album/b.mp3").read_bytes() == b"album/b.mp3"
+    assert (
+        os.stat(second.snapshot / "album/b.mp3").st_mtime_ns
+        == os.stat(fx_library / "album/b.mp3").st_mtime_ns
+    )
+
+
+def test_create_snapshot_file_vanishes(tmp_path, fx_library, monkeypatch):
+    scan_tree = backups.builtins.scan_tree
+
+    def _scan_tree(directory):
+        # Removes a file after it is listed but before it is stat'd
+        for entry in scan_tree(directory):
+            if entry.name == "a.mp3":
+                os.unlink(entry.path)
+            yield entry
+
+    monkeypatch.setattr(backups.builtins, "scan_tree", _scan_tree)
+    result = backups.create_snapshot(fx_library, tmp_path / "snapshots")
+    assert [relative_path for relative_path, _ in result.failed] == ["a.mp3"]
+    assert sum(result.copied.values()) == 2
+    assert set(backups.read_manifest(result.snapshot)) == {
+        "album/b.mp3",
+        "album/nested/c.mp3",
+    }
+
+
+def test_create_snapshot_rotates(tmp_path, fx_library):
+    snapshots = [
+        backups.create_snapshot(fx_library, tmp_path / "snapshots", keep=2).snapshot
+        for _ in range(3)
+    ]
+    assert backups.list_snapshots(tmp_path / "snapshots") == snapshots[1:]
+    assert not snapshots[0].exists()
+
+
+def test_interrupted_snapshot_is_ignored(tmp_path, fx_library):
+    first = backups.create_snapshot(fx_library, tmp_path / "snapshots")
+    interrupted = tmp_path / "snapshots" / "20000101T000000000000Z"
+    interrupted.mkdir()
+    second = backups.create_snapshot(fx_library, tmp_path / "snapshots")
+    assert second.linked == 3
+    assert second.removed == [interrupted]
+    assert backups.list_snapshots(tmp_path / "snapshots") == [
+        first.snapshot,
+        second.snapshot,
+    ]
+
+
+def test_create_snapshot_raises_ValueError(tmp_path, fx_library):
+    with pytest.raises(ValueError):
+        backups.create_snapshot(fx_library, tmp_path / "snapshots", keep=0)
@@ -0,0 +1,198 @@
+"""Test bandcamp scraping against a local stub server"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from audiopyle import bandcamp, cache
+from tests.conftest import TEST_DATA
+
+PAGES: dict = {
+    "/album/foo": ["dub", "reggae"],
+    "/album/bar-2": ["techno"],
+    "/track/baz": [],
+    "/album/flaky-2": ["ambient"],
+}
+
+# Paths answered with a server error rather than a page
+UNAVAILABLE: set = {"/album/flaky"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves album pages from ``PAGES``, 503 for ``UNAVAILABLE`` and 404 for anything else."""
+
+    requests_served: list = []
+
+    def do_GET(self):
+        StubHandler.requests_served.append(self.path)
+        if self.path in UNAVAILABLE:
+            self.send_error(503)
+            return
+        tags = PAGES.get(self.path)
+        if tags is None:
+            self.send_error(404)
+            return
+        links = "".join(f'<a class="tag" href="/tag/{tag}">{tag}</a>' for tag in tags)
+        body = f"<html><body><div class='tralbum-tags'>{links}</div></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fx_stub_server():
+    """Runs a stub bandcamp server, yielding its origin."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "album,track,expected_result",
+    [
+        ("Dub Album (Deluxe)", "N/A", "album/dub-album-deluxe"),
+        ("N/A", "Azzido Domingo feat. Anna", "track/azzido-domingo-feat-anna"),
+    ],
+    ids=["album", "track"],
+)
+def test_build_url_path(album, track, expected_result):
+    assert bandcamp._build_url_path(album=album, track=track) == expected_result
+
+
+def test_get_tags(fx_stub_server):
+    assert bandcamp.get_tags(f"{fx_stub_server}/album/foo") == ["dub", "reggae"]
+    assert bandcamp.get_tags(f"{fx_stub_server}/album/bar") == ["techno"]
+
+
+def test_fetch_tags(fx_stub_server):
+    StubHandler.requests_served.clear()
+    pairs = [
+        (fx_stub_server, "album/foo"),
+        (fx_stub_server, "album/bar"),
+        (fx_stub_server, "track/baz"),
+        (fx_stub_server, "album/missing"),
+        (fx_stub_server, "album/foo"),
+    ]
+    tags = bandcamp.fetch_tags(pairs, workers=3, requests_per_second=0)
+
+    assert tags == {
+        f"{fx_stub_server}/album/foo": ["dub", "reggae"],
+        f"{fx_stub_server}/album/bar": ["techno"],
+        f"{fx_stub_server}/track/baz": [],
+        f"{fx_stub_server}/album/missing": [],
+    }
+    assert sorted(StubHandler.requests_served) == [
+        "/album/bar",
+        "/album/bar-2",
+        "/album/foo",
+        "/album/missing",
+        "/album/missing-2",
+        "/track/baz",
+    ]
+
+
+def test_fetch_tags_unexpected_error(fx_stub_server, fx_tag_cache, monkeypatch):
+    get_page_info = bandcamp.get_page_info
+
+    def _get_page_info(url, **kwargs):
+        if url.endswith("/album/foo"):
+            raise LookupError("unknown encoding: foo")
+        return get_page_info(url, **kwargs)
+
+    monkeypatch.setattr(bandcamp, "get_page_info", _get_page_info)
+    pairs = [(fx_stub_server, "album/foo"), (fx_stub_server, "track/baz")]
+    tags = bandcamp.fetch_tags(
+        pairs, workers=1, requests_per_second=0, tag_cache=fx_tag_cache
+    )
+
+    assert tags == {
+        f"{fx_stub_server}/album/foo": [],
+        f"{fx_stub_server}/track/baz": [],
+    }
+    assert fx_tag_cache.get(f"{fx_stub_server}/album/foo") is None
+
+
+def test_fetch_tags_retry_after_error(fx_stub_server, fx_tag_cache):
+    pairs = [(fx_stub_server, "album/flaky")]
+    tags = bandcamp.fetch_tags(
+        pairs, workers=1, requests_per_second=0, tag_cache=fx_tag_cache
+    )
+
+    assert tags == {f"{fx_stub_server}/album/flaky": ["ambient"]}
+    assert fx_tag_cache.get(f"{fx_stub_server}/album/flaky") == ["ambient"]
+
+
+def test_rate_limiter():
+    limiter = bandcamp.RateLimiter(requests_per_second=1000)
+    limiter.wait("http://foo.bandcamp.com/album/a")
+    limiter.wait("http://bar.bandcamp.com/album/a")
+    assert set(limiter._next_slot) == {"foo.bandcamp.com", "bar.bandcamp.com"}
+
+
+@pytest.fixture(scope="function")
+def fx_tag_cache(tmp_path):
+    with cache.TagCache(tmp_path / "tags.sqlite") as tag_cache:
+        yield tag_cache
+
+
+def test_fetch_tags_warm_cache(fx_stub_server, fx_tag_cache):
+    pairs = [(fx_stub_server, "album/foo"), (fx_stub_server, "album/missing")]
+    cold = bandcamp.fetch_tags(pairs, tag_cache=fx_tag_cache, requests_per_second=0)
+
+    StubHandler.requests_served.clear()
+    warm = bandcamp.fetch_tags(pairs, tag_cache=fx_tag_cache, requests_per_second=0)
+
+    assert warm == cold
+    assert StubHandler.requests_served == []
+
+
+def test_get_tags_cache(fx_stub_server, fx_tag_cache):
+    url = f"{fx_stub_server}/album/bar"
+    assert bandcamp.get_tags(url, tag_cache=fx_tag_cache) == ["techno"]
+
+    StubHandler.requests_served.clear()
+    assert bandcamp.get_tags(url + "/", tag_cache=fx_tag_cache) == ["techno"]
+    assert StubHandler.requests_served == []
+
+
+@pytest.fixture(scope="module")
+def fx_album_page():
+    return (TEST_DATA / "bandcamp_album.html").read_bytes()
+
+
+def test_parse_page(fx_album_page):
+    info = bandcamp.parse_page([fx_album_page])
+    assert info == bandcamp.PageInfo(
+        tags=["dub", "reggae", "roots", "Barcelona"],
+        title="Dub Sessions",
+        artist="Pablo Dread & Broken Lip",
+        release_date="13 Oct 2023 00:00:00 GMT",
+    )
+
+
+def test_parse_page_matches_soup(fx_album_page):
+    assert bandcamp._extract_tags(fx_album_page) == bandcamp._extract_tags_soup(
+        fx_album_page
+    )
+
+
+def test_parse_page_stops_after_tags(fx_album_page):
+    chunks = iter(
+        [fx_album_page[i : i + 4096] for i in range(0, len(fx_album_page), 4096)]
+    )
+    bandcamp.parse_page(chunks)
+    assert len(list(chunks)) > 0
+
+
+def test_parse_page_json_ld_keywords():
+    page = b"""<script type="application/ld+json">{"keywords": ["dub", "techno"]}</script>"""
+    assert bandcamp.parse_page([page]).tags == ["dub", "techno"]
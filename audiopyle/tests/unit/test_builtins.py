@@ -74,7 +74,7 @@ def test_is_audio(filename, expected_result):
 @pytest.mark.parametrize(
     "directory,expected_result",
     [
-        (os.path.join(os.path.dirname(__file__), "test_data"), 2),
+        (os.path.join(os.path.dirname(__file__), "test_data"), 3),
         (os.path.join(os.path.dirname(__file__), "test_data", "test_subdirectory"), 1),
     ],
     ids=[
@@ -84,3 +84,60 @@ def test_is_audio(filename, expected_result):
 )
 def test_count_files(directory, expected_result):
     assert builtins.count_files(directory) == expected_result
+
+
+def test_scan_tree():
+    directory = os.path.join(os.path.dirname(__file__), "test_data")
+    assert [entry.name for entry in builtins.scan_tree(directory)] == [
+        "bandcamp_album.html",
+        "foo.txt",
+        "bar.txt",
+    ]
+
+
+@pytest.fixture(scope="function")
+def fx_tree_to_prune(tmp_path):
+    """Creates nested directories that are empty or only hold junk, next to a kept file."""
+    for relative_path in ["a/b/c", "a/d", "keep/e", "empty"]:
+        (tmp_path / relative_path).mkdir(parents=True)
+    (tmp_path / "a/b/c/.DS_Store").write_bytes(b"")
+    (tmp_path / "a/d/Thumbs.db").write_bytes(b"")
+    (tmp_path / "keep/song.mp3").write_bytes(b"")
+    return tmp_path
+
+
+def test_prune_empty_directories(fx_tree_to_prune):
+    removed = builtins.prune_empty_directories(fx_tree_to_prune)
+    assert sorted(p.relative_to(fx_tree_to_prune).as_posix() for p in removed) == [
+        "a",
+        "a/b",
+        "a/b/c",
+        "a/d",
+        "empty",
+        "keep/e",
+    ]
+    assert sorted(p.name for p in fx_tree_to_prune.iterdir()) == ["keep"]
+
+
+def test_prune_empty_directories_touched(fx_tree_to_prune):
+    removed = builtins.prune_empty_directories(
+        fx_tree_to_prune, [fx_tree_to_prune / "a/b/c", fx_tree_to_prune / "keep"]
+    )
+    assert [p.relative_to(fx_tree_to_prune).as_posix() for p in removed] == [
+        "a/b/c",
+        "a/b",
+    ]
+    assert (fx_tree_to_prune / "empty").exists()
+
+
+@pytest.mark.parametrize(
+    "names,expected_result",
+    [([], True), ([".DS_Store"], True), (["song.mp3"], False)],
+    ids=["empty", "junk_only", "not_empty"],
+)
+def test_remove_if_empty(tmp_path, names, expected_result):
+    (tmp_path / "dir").mkdir()
+    for name in names:
+        (tmp_path / "dir" / name).write_bytes(b"")
+    assert builtins.remove_if_empty(tmp_path / "dir") == expected_result
+    assert (tmp_path / "dir").exists() != expected_result
@@ -0,0 +1,79 @@
+"""Test on-disk metadata caches"""
+
+import os
+
+import pytest
+
+from audiopyle import cache, management
+
+
+@pytest.fixture(scope="function")
+def fx_metadata_cache(tmp_path):
+    with cache.MetadataCache(tmp_path / "metadata.sqlite") as _cache:
+        yield _cache
+
+
+def test_rescan_unchanged_directory_hits_cache(fx_music_dir, fx_metadata_cache):
+    first = management.Directory(fx_music_dir, metadata_cache=fx_metadata_cache).scan()
+    second = management.Directory(fx_music_dir, metadata_cache=fx_metadata_cache).scan()
+
+    assert first == second
+    assert fx_metadata_cache.stats == cache.CacheStats(hits=6, misses=6)
+
+
+def test_rescan_changed_directory(fx_music_dir, fx_metadata_cache):
+    management.Directory(fx_music_dir, metadata_cache=fx_metadata_cache).scan()
+
+    (fx_music_dir / "album_0" / "0.mp3").unlink()
+    changed = fx_music_dir / "album_1" / "1.mp3"
+    changed.write_bytes(changed.read_bytes() + b"\x00")
+    os.utime(changed, ns=(0, 0))
+
+    files = management.Directory(fx_music_dir, metadata_cache=fx_metadata_cache).scan()
+
+    assert len(files) == 5
+    assert len(fx_metadata_cache) == 5
+    assert fx_metadata_cache.stats == cache.CacheStats(
+        hits=4, misses=6, invalidated=1, removed=1
+    )
+
+
+@pytest.mark.parametrize(
+    "url,expected_result",
+    [
+        ("HTTPS://Foo.Bandcamp.com/album/bar/", "https://foo.bandcamp.com/album/bar"),
+        (
+            "https://foo.bandcamp.com/album/bar?from=search#x",
+            "https://foo.bandcamp.com/album/bar",
+        ),
+    ],
+    ids=["case_and_trailing_slash", "query_and_fragment"],
+)
+def test_normalize_url(url, expected_result):
+    assert cache.normalize_url(url) == expected_result
+
+
+def test_tag_cache_ttl(tmp_path):
+    with cache.TagCache(tmp_path / "tags.sqlite", ttl=60, negative_ttl=-1) as tag_cache:
+        tag_cache.put_many(
+            [
+                ("https://a.bandcamp.com/album/a", ["dub"]),
+                ("https://a.bandcamp.com/album/b", None),
+            ]
+        )
+        assert tag_cache.get("https://a.bandcamp.com/album/a") == ["dub"]
+        assert tag_cache.get("https://a.bandcamp.com/album/b") is None
+        assert tag_cache.get("https://a.bandcamp.com/album/c") is None
+        assert tag_cache.stats == cache.CacheStats(hits=1, misses=1, invalidated=1)
+
+
+def test_tag_cache_evicts_least_recently_used(tmp_path):
+    with cache.TagCache(tmp_path / "tags.sqlite", max_entries=2) as tag_cache:
+        tag_cache.put("https://a.bandcamp.com/album/a", ["a"])
+        tag_cache.put("https://a.bandcamp.com/album/b", ["b"])
+        tag_cache.get("https://a.bandcamp.com/album/a")
+        tag_cache.put("https://a.bandcamp.com/album/c", ["c"])
+
+        assert len(tag_cache) == 2
+        assert tag_cache.get("https://a.bandcamp.com/album/b") is None
+        assert tag_cache.get("https://a.bandcamp.com/album/a") == ["a"]
@@ -6,6 +6,7 @@ from typing import Self
 import pytest
 
 from audiopyle import core
+from tests.conftest import make_audio
 
 
 class DummyFile(core.File):
@@ -59,3 +60,16 @@ def test_move(fx_temp_dir, fx_other_dir):
     expected_result = fx_other_dir / "test_file.txt"
     assert f._filepath == expected_result
     # assert False
+
+
+def test_move_image(tmp_path):
+    """Tests that images are moved with the album rather than deleted."""
+    source = tmp_path / "album" / "cover.jpg"
+    source.parent.mkdir()
+    source.write_bytes(b"image")
+    f = make_audio(str(source))
+    f.move(target_directory=tmp_path / "moved")
+
+    assert not source.parent.exists()
+    assert (tmp_path / "moved" / "cover.jpg").read_bytes() == b"image"
+    assert f._filepath == (tmp_path / "moved" / "cover.jpg").resolve()
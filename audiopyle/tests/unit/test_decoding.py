@@ -0,0 +1,70 @@
+"""Test streaming audio decoding"""
+
+import numpy as np
+import pytest
+import soundfile
+
+from audiopyle import decoding
+
+SAMPLE_RATE = 22050
+
+
+@pytest.fixture(scope="function")
+def fx_track(tmp_path):
+    """Writes a 3 second stereo noise track at 44.1kHz, returning its path."""
+    path = tmp_path / "noise.wav"
+    signal = np.random.default_rng(0).uniform(-0.5, 0.5, (44100 * 3, 2))
+    soundfile.write(path, signal, 44100, subtype="FLOAT")
+    return path
+
+
+def test_decode_resamples_to_mono(fx_track):
+    samples = np.concatenate(list(decoding.decode(fx_track, SAMPLE_RATE)))
+    assert samples.dtype == np.float32
+    assert abs(len(samples) - SAMPLE_RATE * 3) <= 1
+
+
+def test_decode_window(fx_track):
+    samples = np.concatenate(
+        list(decoding.decode(fx_track, 44100, offset=1.0, duration=0.5))
+    )
+    expected = soundfile.read(fx_track, start=44100, stop=44100 + 22050)[0].mean(1)
+    np.testing.assert_allclose(samples, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize("overlap", [0, 1000], ids=["no_overlap", "overlap"])
+def test_stream_blocks(fx_track, overlap):
+    block_size = 10000
+    blocks = list(
+        decoding.stream_blocks(fx_track, 44100, block_size=block_size, overlap=overlap)
+    )
+    expected = soundfile.read(fx_track, dtype="float32")[0].mean(1)
+
+    assert all(len(block) == block_size for block in blocks[:-1])
+    stitched = np.concatenate([blocks[0]] + [block[overlap:] for block in blocks[1:]])
+    np.testing.assert_allclose(stitched, expected, atol=1e-6)
+
+
+def test_stream_blocks_invalid_overlap(fx_track):
+    with pytest.raises(ValueError):
+        next(decoding.stream_blocks(fx_track, block_size=100, overlap=100))
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected_result",
+    [
+        ({}, [(0.0, 100.0)]),
+        ({"skip_intro_seconds": 10, "skip_outro_seconds": 20}, [(10.0, 70.0)]),
+        ({"n_windows": 3}, [(0.0, 10.0), (45.0, 10.0), (90.0, 10.0)]),
+        ({"n_windows": 3, "skip_intro_seconds": 85}, [(87.5, 10.0)]),
+        ({"skip_intro_seconds": 200}, []),
+    ],
+    ids=["whole_track", "skip_intro_outro", "sampled", "too_short", "nothing_left"],
+)
+def test_select_windows(kwargs, expected_result):
+    windows = decoding.select_windows(100.0, 10.0, **kwargs)
+    assert [(w.offset, w.duration) for w in windows] == expected_result
+
+
+def test_get_duration(fx_track):
+    assert decoding.get_duration(fx_track) == pytest.approx(3.0)
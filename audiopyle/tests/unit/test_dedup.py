@@ -0,0 +1,84 @@
+"""Test duplicate detection"""
+
+import pytest
+
+from audiopyle import cache, dedup, id3, management, organizer
+from tests.conftest import build_id3v1
+
+
+@pytest.fixture(scope="function")
+def fx_library(tmp_path, fx_mp3_factory):
+    """Creates a library with a retagged copy, a renamed copy and unique tracks."""
+    fx_mp3_factory("library/a/song.mp3", tags={"TIT2": "Song"}, payload=b"\x01")
+    fx_mp3_factory(
+        "library/b/song (copy).mp3",
+        tags={"TIT2": "Song", "TALB": "Retagged Album"},
+        id3v1=build_id3v1(title="Song"),
+        payload=b"\x01",
+    )
+    fx_mp3_factory("library/c/song.mp3", payload=b"\x01")
+    fx_mp3_factory("library/d/other.mp3", tags={"TIT2": "Other"}, payload=b"\x02")
+    fx_mp3_factory("library/e/longer.mp3", frames=20, payload=b"\x01")
+    yield tmp_path / "library"
+
+
+def test_audio_bounds(fx_mp3_factory):
+    plain = fx_mp3_factory("plain.mp3", frames=3)
+    tagged = fx_mp3_factory(
+        "tagged.mp3", tags={"TIT2": "Foo"}, frames=3, id3v1=build_id3v1(title="Foo")
+    )
+    plain_start, plain_end = id3.audio_bounds(plain)
+    tagged_start, tagged_end = id3.audio_bounds(tagged)
+    assert plain_start == 0
+    assert tagged_start > 0
+    assert tagged_end - tagged_start == plain_end - plain_start
+
+
+def test_find_duplicates(fx_library):
+    groups = management.Directory(fx_library).duplicates(workers=2)
+    assert len(groups) == 1
+    assert [path.relative_to(fx_library) for path in groups[0].files] == [
+        fx_library.joinpath("a", "song.mp3").relative_to(fx_library),
+        fx_library.joinpath("b", "song (copy).mp3").relative_to(fx_library),
+        fx_library.joinpath("c", "song.mp3").relative_to(fx_library),
+    ]
+    assert groups[0].wasted_bytes == 2 * groups[0].payload_size
+
+
+def test_find_duplicates_hash_cache(tmp_path, fx_library):
+    filepaths = sorted(fx_library.rglob("*.mp3"))
+    with cache.HashCache(tmp_path / "hashes.sqlite") as hash_cache:
+        first = dedup.find_duplicates(filepaths, hash_cache=hash_cache)
+        second = dedup.find_duplicates(filepaths, hash_cache=hash_cache)
+        assert first == second
+        # The unique sized file is never hashed
+        assert hash_cache.stats == cache.CacheStats(hits=4, misses=4)
+
+
+def test_find_duplicates_unreadable(fx_library, monkeypatch):
+    hash_payload = dedup.hash_payload
+
+    def _hash_payload(filepath, start, end):
+        if filepath.parent.name == "c":
+            raise PermissionError(13, "Permission denied", str(filepath))
+        return hash_payload(filepath, start, end)
+
+    monkeypatch.setattr(dedup, "hash_payload", _hash_payload)
+    groups = dedup.find_duplicates(sorted(fx_library.rglob("*.mp3")), workers=2)
+    assert [path.relative_to(fx_library).parent.name for path in groups[0].files] == [
+        "a",
+        "b",
+    ]
+
+
+def test_plan_duplicate_moves(tmp_path, fx_library):
+    groups = dedup.find_duplicates(sorted(fx_library.rglob("*.mp3")))
+    plan = dedup.plan_duplicate_moves(groups, tmp_path / "quarantine")
+    result = organizer.execute_plan(plan)
+
+    assert len(result.moved) == 2
+    assert sorted(p.name for p in (tmp_path / "quarantine").rglob("*.mp3")) == [
+        "song (copy).mp3",
+        "song.mp3",
+    ]
+    assert (fx_library / "a" / "song.mp3").exists()
@@ -0,0 +1,120 @@
+"""Test the memory-mapped feature store"""
+
+import os
+
+import numpy as np
+import pytest
+import soundfile
+
+from audiopyle import featurestore, features
+
+
+@pytest.fixture(scope="function")
+def fx_store(tmp_path):
+    with featurestore.FeatureStore(tmp_path / "store") as store:
+        yield store
+
+
+def _vector(i: int, dimensions: int = 4) -> np.ndarray:
+    return np.full(dimensions, i, dtype=np.float32)
+
+
+def test_put_and_load(fx_store):
+    fx_store.put_many(
+        (f"/music/{i}.mp3", None, f"d{i}", _vector(i), None) for i in range(3)
+    )
+    matrix, entries = fx_store.load()
+
+    assert isinstance(matrix, np.memmap)
+    assert matrix.shape == (3, 4)
+    assert [entry.path for entry in entries] == [f"/music/{i}.mp3" for i in range(3)]
+    np.testing.assert_array_equal(matrix[:, 0], [0, 1, 2])
+
+
+def test_upsert_updates_in_place(fx_store):
+    fx_store.put("/music/a.mp3", "old", _vector(1))
+    fx_store.put_many(
+        [
+            ("/music/a.mp3", None, "new", _vector(5), None),
+            ("/music/b.mp3", None, "b", _vector(2), None),
+        ]
+    )
+
+    assert len(fx_store) == 2
+    np.testing.assert_array_equal(fx_store.get("/music/a.mp3", "new"), _vector(5))
+    assert fx_store.get("/music/a.mp3", "old") is None
+    assert fx_store.get("/music/c.mp3") is None
+
+
+def test_store_grows(fx_store, monkeypatch):
+    monkeypatch.setattr(featurestore, "INITIAL_CAPACITY", 2)
+    for i in range(5):
+        fx_store.put(f"/music/{i}.mp3", f"d{i}", _vector(i))
+
+    matrix, _ = fx_store.load()
+    np.testing.assert_array_equal(matrix[:, 0], np.arange(5))
+    assert np.load(fx_store.matrix_path, mmap_mode="r").shape[0] == 8
+
+
+def test_remove_keeps_rows_contiguous(fx_store):
+    fx_store.put_many(
+        (f"/music/{i}.mp3", None, f"d{i}", _vector(i), None) for i in range(5)
+    )
+    assert fx_store.prune([f"/music/{i}.mp3" for i in (0, 2, 4)]) == 2
+
+    matrix, entries = fx_store.load()
+    assert [entry.row for entry in entries] == [0, 1, 2]
+    for entry, row in zip(entries, matrix):
+        np.testing.assert_array_equal(fx_store.get(entry.path), row)
+
+
+def test_dimension_mismatch(fx_store):
+    fx_store.put("/music/a.mp3", "a", _vector(1))
+    with pytest.raises(ValueError):
+        fx_store.put("/music/b.mp3", "b", _vector(1, dimensions=3))
+
+
+def test_dimension_mismatch_leaves_store_unchanged(fx_store):
+    fx_store.put("/music/a.mp3", "a", _vector(1))
+    with pytest.raises(ValueError):
+        fx_store.put_many(
+            [
+                ("/music/a.mp3", None, "a2", _vector(2), None),
+                ("/music/b.mp3", None, "b", _vector(3, dimensions=3), None),
+            ]
+        )
+
+    _, entries = fx_store.load()
+    assert [entry.path for entry in entries] == ["/music/a.mp3"]
+    np.testing.assert_array_equal(fx_store.get("/music/a.mp3", "a"), _vector(1))
+
+
+def test_update_store(tmp_path, fx_store, monkeypatch):
+    t = np.arange(22050 * 2) / 22050
+    paths = []
+    for i, frequency in enumerate([220, 440]):
+        paths.append(tmp_path / f"{i}.wav")
+        soundfile.write(paths[-1], 0.5 * np.sin(2 * np.pi * frequency * t), 22050)
+    config = features.FeatureConfig(segment_seconds=1.0)
+
+    assert featurestore.update_store(fx_store, paths, config, workers=1) == 2
+
+    digested = []
+    content_digest = featurestore.content_digest
+    monkeypatch.setattr(
+        featurestore,
+        "content_digest",
+        lambda filepath: digested.append(filepath) or content_digest(filepath),
+    )
+    assert featurestore.update_store(fx_store, paths, config, workers=1) == 0
+    assert digested == []
+
+    # Files whose stat changed but whose audio didn't are digested once
+    os.utime(paths[1], ns=(0, 0))
+    assert featurestore.update_store(fx_store, paths, config, workers=1) == 0
+    assert featurestore.update_store(fx_store, paths, config, workers=1) == 0
+    assert digested == [str(paths[1])]
+
+    soundfile.write(paths[0], 0.5 * np.sin(2 * np.pi * 880 * t), 22050)
+    assert featurestore.update_store(fx_store, paths, config, workers=1) == 1
+    assert fx_store.dimensions == len(config.feature_names)
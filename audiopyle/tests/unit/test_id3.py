@@ -0,0 +1,105 @@
+"""Test native ID3 and MPEG header parsing"""
+
+import random
+
+import pytest
+
+from audiopyle import id3
+from audiopyle.exceptions import MetadataError
+from tests.conftest import MPEG_FRAME_HEADER, MPEG_FRAME_LENGTH, build_id3v1
+
+
+@pytest.mark.parametrize(
+    "version",
+    [3, 4],
+    ids=["id3v2.3", "id3v2.4"],
+)
+def test_read_mediainfo_tags(fx_mp3_factory, version):
+    tags = {
+        "TIT2": "Azzido Domingo",
+        "TALB": "Dub Album",
+        "TPE1": "Pablo Dread",
+        "TDRC": "2023",
+    }
+    path = fx_mp3_factory("foo.mp3", tags=tags, version=version)
+    info = id3.read_mediainfo(path)
+    assert info["TAG"] == {
+        "title": "Azzido Domingo",
+        "album": "Dub Album",
+        "artist": "Pablo Dread",
+        "date": "2023",
+    }
+
+
+def test_read_mediainfo_skips_pictures(fx_mp3_factory):
+    path = fx_mp3_factory(
+        "foo.mp3", tags={"TIT2": "Title"}, picture=b"\xff\xd8" + b"\x00" * 50000
+    )
+    assert id3.read_mediainfo(path)["TAG"] == {"title": "Title"}
+
+
+def test_read_mediainfo_cbr_duration(fx_mp3_factory):
+    path = fx_mp3_factory("foo.mp3", tags={"TIT2": "Title"}, frames=100)
+    info = id3.read_mediainfo(path)
+    assert info["bit_rate"] == "128000"
+    assert info["sample_rate"] == "44100"
+    assert float(info["duration"]) == pytest.approx(
+        100 * MPEG_FRAME_LENGTH * 8 / 128000
+    )
+
+
+def test_read_mediainfo_xing_duration(fx_mp3_factory):
+    path = fx_mp3_factory("foo.mp3", tags={"TIT2": "Title"}, xing_frames=1000)
+    info = id3.read_mediainfo(path)
+    assert float(info["duration"]) == pytest.approx(1000 * 1152 / 44100)
+
+
+def test_read_mediainfo_id3v1_fallback(fx_mp3_factory):
+    path = fx_mp3_factory(
+        "foo.mp3",
+        tags={"TIT2": "V2 Title"},
+        id3v1=build_id3v1(title="V1 Title", artist="V1 Artist"),
+    )
+    info = id3.read_mediainfo(path)
+    assert info["TAG"]["title"] == "V2 Title"
+    assert info["TAG"]["artist"] == "V1 Artist"
+
+
+def test_read_mediainfo_raises_MetadataError(tmp_path):
+    path = tmp_path / "foo.txt"
+    path.write_text("test")
+    with pytest.raises(MetadataError):
+        id3.read_mediainfo(path)
+
+
+@pytest.mark.parametrize(
+    "header_offset",
+    [id3.FRAME_SEARCH_WINDOW - MPEG_FRAME_LENGTH // 2, id3.FRAME_SEARCH_WINDOW - 4],
+    ids=["frame_crosses_window", "header_ends_window"],
+)
+def test_read_mediainfo_garbage(tmp_path, header_offset):
+    # A lone frame header near the end of the search window is not enough
+    data = bytearray(
+        random.Random(header_offset).randbytes(4 * id3.FRAME_SEARCH_WINDOW)
+    )
+    data = data.replace(b"\xff", b"\x00")
+    data[header_offset : header_offset + 4] = MPEG_FRAME_HEADER
+    path = tmp_path / "garbage.mp3"
+    path.write_bytes(bytes(data))
+    with pytest.raises(MetadataError):
+        id3.read_mediainfo(path)
+
+
+@pytest.mark.parametrize("version", [3, 4], ids=["v2.3", "v2.4"])
+def test_read_pictures(fx_mp3_factory, version):
+    path = fx_mp3_factory(
+        "foo.mp3", tags={"TIT2": "Title"}, version=version, picture=b"\xff\xd8cover"
+    )
+    assert id3.read_pictures(path) == [
+        id3.Picture("image/jpeg", id3.FRONT_COVER, "", b"\xff\xd8cover")
+    ]
+    assert id3.read_mediainfo(path)["TAG"]["title"] == "Title"
+
+
+def test_read_pictures_none(fx_mp3_factory):
+    assert id3.read_pictures(fx_mp3_factory("foo.mp3", tags={"TIT2": "T"})) == []
@@ -0,0 +1,122 @@
+"""Test the crash-safe move journal"""
+
+import os
+
+import pytest
+
+from audiopyle import journal, organizer
+
+
+@pytest.fixture(scope="function")
+def fx_plan(tmp_path, fx_downloads_factory):
+    """Plans moving four files into two album directories."""
+    files = fx_downloads_factory([f"Album {i % 2}" for i in range(4)])
+    return organizer.plan_moves(files, tmp_path / "library", "{album}")
+
+
+def test_execute_plan_with_journal(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    with journal.MoveJournal(journal_path, group_size=2) as move_journal:
+        organizer.execute_plan(fx_plan, journal=move_journal)
+
+    state = journal.MoveJournal.replay(journal_path)
+    assert len(state.planned) == 4
+    assert state.done == {0, 1, 2, 3}
+    assert state.pending == []
+
+
+def test_resume(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    with journal.MoveJournal(journal_path) as move_journal:
+        move_journal.record_plan(fx_plan)
+        # Simulate a crash after the first move, before its marker was committed
+        first = fx_plan.moves[0]
+        first.target.parent.mkdir(parents=True)
+        os.replace(first.source, first.target)
+
+    result = journal.resume(journal_path)
+
+    assert len(result.moved) == 3
+    assert all(move.target.exists() for move in fx_plan.moves)
+    assert journal.MoveJournal.replay(journal_path).pending == []
+
+
+def _interrupt(plan: organizer.MovePlan, journal_path) -> None:
+    """Records a plan and leaves its first two moves half done, as a crash would."""
+    with journal.MoveJournal(journal_path) as move_journal:
+        move_journal.record_plan(plan)
+    linked, copied = plan.moves[:2]
+    for move in (linked, copied):
+        move.target.parent.mkdir(parents=True, exist_ok=True)
+    # Linked into place but not yet unlinked
+    os.link(linked.source, linked.target)
+    # Copy to another filesystem cut short
+    copied.target.write_bytes(copied.source.read_bytes()[:-1])
+
+
+def test_resume_half_done_moves(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    _interrupt(fx_plan, journal_path)
+
+    result = journal.resume(journal_path)
+
+    assert len(result.moved) == 3 and not result.failed
+    assert not any(move.source.exists() for move in fx_plan.moves)
+    assert [move.target.read_text() for move in fx_plan.moves] == ["0", "1", "2", "3"]
+    assert journal.MoveJournal.replay(journal_path).pending == []
+
+
+def test_rollback_half_done_moves(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    _interrupt(fx_plan, journal_path)
+
+    result = journal.rollback(journal_path)
+
+    assert len(result.moved) == 1 and not result.failed
+    assert [move.source.read_text() for move in fx_plan.moves] == ["0", "1", "2", "3"]
+    assert not any(move.target.exists() for move in fx_plan.moves)
+    assert journal.MoveJournal.replay(journal_path).rolled_back
+
+
+def test_rollback(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    with journal.MoveJournal(journal_path) as move_journal:
+        organizer.execute_plan(fx_plan, journal=move_journal)
+
+    result = journal.rollback(journal_path)
+
+    assert len(result.moved) == 4
+    assert all(move.source.exists() for move in fx_plan.moves)
+    assert not any(move.target.exists() for move in fx_plan.moves)
+    assert journal.MoveJournal.replay(journal_path).rolled_back
+    assert journal.rollback(journal_path).moved == []
+
+
+def test_reuse_after_rollback(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    with journal.MoveJournal(journal_path) as move_journal:
+        organizer.execute_plan(fx_plan, journal=move_journal)
+    journal.rollback(journal_path)
+
+    # A later run reusing the journal is interrupted before any move
+    with journal.MoveJournal(journal_path) as move_journal:
+        move_journal.record_plan(fx_plan)
+    state = journal.MoveJournal.replay(journal_path)
+    assert not state.rolled_back
+    assert len(state.pending) == 4
+
+    assert len(journal.resume(journal_path).moved) == 4
+    assert all(move.target.exists() for move in fx_plan.moves)
+
+
+def test_replay_ignores_torn_entry(tmp_path, fx_plan):
+    journal_path = tmp_path / "moves.journal"
+    with journal.MoveJournal(journal_path) as move_journal:
+        move_journal.record_plan(fx_plan)
+    with open(journal_path, "a") as fh:
+        fh.write('{"op": "do')
+
+    assert len(journal.MoveJournal.replay(journal_path).pending) == 4
+
+    journal.resume(journal_path)
+    assert journal.MoveJournal.replay(journal_path).pending == []
@@ -188,6 +188,18 @@ def test_backup_directory(fx_temp_dir, fx_cleanup_temp_dir):
     assert _d._num_files == 1
 
 
+def test_incremental_backup(fx_music_dir):
+    """Tests that an incremental backup links files unchanged since the last snapshot."""
+    d = management.Directory._from_filepath(fx_music_dir)
+    assert sum(d.backup(incremental=True).copied.values()) == 6
+    result = d.backup(incremental=True, keep=1)
+    assert result.linked == 6
+    assert len(result.removed) == 1
+    assert result.snapshot.parent == Path(str(fx_music_dir) + "_snapshots")
+    # Logging the backup doesn't walk the directory for statistics
+    assert "statistics" not in d.__dict__
+
+
 def test_get_files(fx_temp_dir_with_files):
     """Tests that the directory object can get files."""
     d, num_files = (
@@ -198,12 +210,12 @@ def test_get_files(fx_temp_dir_with_files):
 
 
 def test_get_empty_directories(fx_temp_dir_with_subdirs):
-    """Tests that the Directory object can get empty directories."""
+    """Tests that the Directory object reports the empty directories it deletes."""
     d, expected_empty_directories = (
         management.Directory._from_filepath(fx_temp_dir_with_subdirs[0]),
         fx_temp_dir_with_subdirs[1],
     )
-    assert len(d._empty_directories) == expected_empty_directories
+    assert len(d._delete_empty_directories()) == expected_empty_directories
 
 
 def test_delete_empty_directories(fx_temp_dir_with_subdirs):
@@ -237,8 +249,78 @@ def test_create_directory(fx_temp_dir, subdirs):
     assert created_directory.exists()
 
 
-def test_move_files(fx_temp_dir):
+def test_move_files(fx_music_dir):
     """Tests that the files in a directory can be moved."""
-    d = management.Directory._from_filepath(fx_temp_dir)
-    d.move_files()
-    assert False
+    d = management.Directory._from_filepath(fx_music_dir)
+    result = d.move_files(template="{album}")
+
+    assert len(result.moved) == 6
+    assert sorted(p.name for p in fx_music_dir.iterdir()) == ["Album 0", "Album 1"]
+    assert all(Path(f._filepath).parent.name == f.album for f in d.files)
+
+
+def test_move_files_with_covers(fx_music_dir):
+    """Tests that each album's cover moves with its tracks rather than on its own."""
+    for album in ["album_0", "album_1"]:
+        (fx_music_dir / album / "cover.jpg").write_bytes(album.encode())
+    d = management.Directory._from_filepath(fx_music_dir)
+    result = d.move_files(template="{album}")
+
+    assert len(result.moved) == 8
+    assert sorted(p.name for p in fx_music_dir.iterdir()) == ["Album 0", "Album 1"]
+    assert (fx_music_dir / "Album 0" / "cover.jpg").read_bytes() == b"album_0"
+    assert (fx_music_dir / "Album 1" / "cover.jpg").read_bytes() == b"album_1"
+
+
+@pytest.mark.parametrize(
+    "workers,use_processes",
+    [(1, False), (4, False), (2, True)],
+    ids=["serial", "threads", "processes"],
+)
+def test_scan(fx_music_dir, workers, use_processes):
+    """Tests that scanning yields sorted, album-reconciled files for any number of workers."""
+    d = management.Directory._from_filepath(fx_music_dir)
+    files = d.scan(workers=workers, chunk_size=2, use_processes=use_processes)
+    assert [f._filepath for f in files] == sorted(f._filepath for f in files)
+    assert {f.album_artist for f in files} == {"Various Artists"}
+    assert files == d.scan()
+
+
+def test_table(fx_music_dir):
+    """Tests that the columnar table holds the same tracks as a scan."""
+    d = management.Directory._from_filepath(fx_music_dir)
+    table = d.table()
+    assert sorted(table, key=lambda f: f._filepath) == d.scan()
+    assert list(d.table()) == d.files
+
+
+def test_statistics(fx_music_dir):
+    """Tests that statistics are collected lazily and reused by the scan."""
+    d = management.Directory._from_filepath(fx_music_dir, workers=2)
+    assert "statistics" not in d.__dict__
+    assert (d._num_files, d.statistics.extensions) == (6, {".mp3": 6})
+    assert d._directory_size == sum(
+        p.stat().st_size for p in fx_music_dir.rglob("*.mp3")
+    )
+    assert d._filepaths() == sorted(fx_music_dir.rglob("*.mp3"))
+    assert len(d.files) == 6
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected_titles",
+    [
+        ({}, ["Track 0", "Track 2", "Track 4", "Track 1", "Track 3", "Track 5"]),
+        ({"extensions": [".MP3"]}, ["Track 0", "Track 2", "Track 4", "Track 1"]),
+        ({"pattern": "album_1/*"}, ["Track 1", "Track 3", "Track 5"]),
+        ({"modified_since": 10**10}, []),
+    ],
+    ids=["no_filters", "extensions", "pattern", "modified_since"],
+)
+def test_iter_files(fx_music_dir, kwargs, expected_titles):
+    """Tests that files are streamed lazily, filtered before they are parsed."""
+    for path in sorted(fx_music_dir.rglob("*.mp3"))[-2:]:
+        path.rename(path.with_suffix(".flac"))
+    d = management.Directory._from_filepath(fx_music_dir)
+    files = d.iter_files(**kwargs)
+    assert not isinstance(files, list)
+    assert [f.title for f in files] == expected_titles
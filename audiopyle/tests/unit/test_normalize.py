@@ -0,0 +1,58 @@
+"""Test path, uri and name normalization"""
+
+import re
+import urllib.parse
+
+import pytest
+
+from audiopyle import normalize
+
+
+def _reference_uri(filepath: str) -> str:
+    """The original ``urllib`` based conversion the table-driven one replaces."""
+    uri = "file://localhost/" + urllib.parse.quote(
+        filepath, safe=":\\()!,+$#@"
+    ).replace("\\", "/")
+    return re.sub(r"%[0-9A-Fa-f]{2}", lambda x: x.group(0).lower(), uri)
+
+
+@pytest.mark.parametrize(
+    "filepath",
+    [
+        "/music/Artist - Album/01 - Track.mp3",
+        "C:\\Users\\Me\\Music\\Björk - Jóga (Remix) [2023].mp3",
+        "/music/\u65e5\u672c/\u97f3\u697d & more; 100%.mp3",
+        "/music/emoji \U0001f3b5/~tilde_under.score-dash.mp3",
+        "relative.mp3",
+        "",
+    ],
+    ids=["posix", "windows", "cjk", "astral", "no_directory", "empty"],
+)
+def test_filepath_to_rekordbox_uri_matches_urllib(filepath):
+    assert normalize.filepath_to_rekordbox_uri(filepath) == _reference_uri(filepath)
+
+
+def test_directory_prefix_is_cached():
+    normalize._quote_directory.cache_clear()
+    for i in range(3):
+        normalize.filepath_to_rekordbox_uri(f"/music/Album/{i}.mp3")
+    assert normalize._quote_directory.cache_info().hits == 2
+
+
+@pytest.mark.parametrize(
+    "text,expected_result",
+    [
+        (
+            "Visit https://foo.bandcamp.com/album/bar now",
+            "https://foo.bandcamp.com/album/bar",
+        ),
+        ("bandcamp.com", None),
+    ],
+    ids=["url", "no_url"],
+)
+def test_find_url(text, expected_result):
+    assert normalize.find_url(text) == expected_result
+
+
+def test_sanitize_name():
+    assert normalize.sanitize_name('AC/DC: "Live" <1991>?') == "AC-DC- -Live- -1991--"
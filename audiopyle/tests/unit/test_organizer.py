@@ -0,0 +1,135 @@
+"""Test planning and executing bulk moves"""
+
+from pathlib import Path
+
+import pytest
+
+from audiopyle import organizer
+from tests.conftest import make_audio
+
+
+@pytest.fixture(scope="function")
+def fx_source_files(fx_downloads_factory):
+    """Creates files across two albums, returning their Audio objects."""
+    return fx_downloads_factory(["Foo", "Foo", "Bar", ""])
+
+
+@pytest.mark.parametrize(
+    "template,expected_result",
+    [
+        ("{album}", Path("Foo")),
+        ("{_download_year}/{album}", Path("2023", "Foo")),
+        ("{album_artist}/{album}", Path("AC-DC", "Foo")),
+        ("{year}/{album}", Path("Unknown", "Foo")),
+    ],
+    ids=["single_field", "nested", "sanitized", "missing_field"],
+)
+def test_path_template_render(template, expected_result):
+    file = make_audio("/foo.mp3", album="Foo", album_artist="AC/DC")
+    assert organizer.PathTemplate(template).render(file) == expected_result
+
+
+@pytest.mark.parametrize("album", ["..", ".", " .. "], ids=["parent", "self", "padded"])
+def test_path_template_render_dot_values(album):
+    file = make_audio("/foo.mp3", album=album)
+    assert organizer.PathTemplate("{album}").render(file) == Path("Unknown")
+
+
+def test_plan_moves(tmp_path, fx_source_files):
+    plan = organizer.plan_moves(fx_source_files, tmp_path, "{album}")
+    assert [move.target.relative_to(tmp_path) for move in plan.moves] == [
+        Path("Foo", "0.mp3"),
+        Path("Foo", "1.mp3"),
+        Path("Bar", "2.mp3"),
+        Path("Unknown", "3.mp3"),
+    ]
+    assert plan.directories == {
+        tmp_path / "Foo",
+        tmp_path / "Bar",
+        tmp_path / "Unknown",
+    }
+    assert plan.collisions == {}
+
+
+def test_plan_moves_sidecars(tmp_path, fx_source_files):
+    mixed = tmp_path / "downloads" / "cover.jpg"
+    mixed.write_bytes(b"image")
+    album = tmp_path / "album"
+    album.mkdir()
+    (album / "0.mp3").write_text("0")
+    (album / "Folder.PNG").write_bytes(b"image")
+    files = fx_source_files + [make_audio(str(album / "0.mp3"), album="Baz")]
+
+    plan = organizer.plan_moves(
+        files, tmp_path, "{album}", sidecars=[mixed, album / "Folder.PNG"]
+    )
+    # The downloads directory holds several albums, so its cover stays put
+    assert [move.target.relative_to(tmp_path) for move in plan.moves][-2:] == [
+        Path("Baz", "0.mp3"),
+        Path("Baz", "Folder.PNG"),
+    ]
+    assert plan.collisions == {}
+
+
+def test_plan_moves_collisions(tmp_path, fx_source_files):
+    duplicate = tmp_path / "other" / "0.mp3"
+    duplicate.parent.mkdir()
+    duplicate.write_text("duplicate")
+    files = fx_source_files + [make_audio(str(duplicate), album="Foo")]
+
+    (tmp_path / "Bar").mkdir()
+    (tmp_path / "Bar" / "2.mp3").write_text("existing")
+
+    plan = organizer.plan_moves(files, tmp_path, "{album}")
+    assert plan.collisions == {
+        tmp_path / "Foo" / "0.mp3": [Path(files[0]._filepath), duplicate],
+        tmp_path / "Bar" / "2.mp3": [Path(files[2]._filepath)],
+    }
+    assert [move.source.name for move in plan.moves] == ["1.mp3", "3.mp3"]
+
+
+def test_execute_plan(tmp_path, fx_source_files):
+    plan = organizer.plan_moves(fx_source_files, tmp_path, "{album}")
+    result = organizer.execute_plan(plan, workers=2)
+
+    assert len(result.moved) == 4
+    assert result.directories_created == 3
+    assert (tmp_path / "Foo" / "1.mp3").read_text() == "1"
+    assert fx_source_files[2]._filepath == str(tmp_path / "Bar" / "2.mp3")
+    assert not any((tmp_path / "downloads").iterdir())
+
+
+def test_plan_moves_target_being_vacated(tmp_path):
+    """A target another move is vacating is a collision, moves run in parallel."""
+    first, second = tmp_path / "a.mp3", tmp_path / "Foo" / "a.mp3"
+    second.parent.mkdir()
+    first.write_text("first")
+    second.write_text("second")
+    files = [
+        make_audio(str(first), album="Foo"),
+        make_audio(str(second), album="Bar"),
+    ]
+    plan = organizer.plan_moves(files, tmp_path, "{album}")
+    assert plan.collisions == {second: [first]}
+    assert [move.source for move in plan.moves] == [second]
+
+
+def test_execute_plan_never_overwrites(tmp_path, fx_source_files):
+    plan = organizer.plan_moves(fx_source_files, tmp_path, "{album}")
+    # The target appears after the plan was made
+    (tmp_path / "Foo").mkdir()
+    (tmp_path / "Foo" / "0.mp3").write_text("existing")
+    result = organizer.execute_plan(plan, workers=2)
+
+    assert [move.source.name for move, _ in result.failed] == ["0.mp3"]
+    assert (tmp_path / "Foo" / "0.mp3").read_text() == "existing"
+    assert (tmp_path / "downloads" / "0.mp3").read_text() == "0"
+
+
+def test_copy_exclusive(tmp_path):
+    (tmp_path / "source").write_text("source")
+    (tmp_path / "target").write_text("target")
+    with pytest.raises(FileExistsError):
+        organizer._copy_exclusive(tmp_path / "source", tmp_path / "target")
+    organizer._copy_exclusive(tmp_path / "source", tmp_path / "copy")
+    assert (tmp_path / "copy").read_text() == "source"
@@ -0,0 +1,68 @@
+"""Test compact track records and the columnar track table"""
+
+import sys
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from audiopyle import audio, records
+from tests.conftest import make_tracks
+
+
+@pytest.fixture(scope="function")
+def fx_tracks():
+    return make_tracks(6, albums=2)
+
+
+def test_track_record_roundtrip(fx_tracks):
+    record = records.TrackRecord.from_audio(fx_tracks[0])
+    assert not hasattr(record, "__dict__")
+    assert record.to_audio() == fx_tracks[0]
+
+
+def test_track_record_interns_strings(fx_tracks):
+    first, second = (
+        records.TrackRecord.from_audio(track) for track in fx_tracks[0:3:2]
+    )
+    assert first.album is second.album is sys.intern("Album 0")
+
+
+def test_track_table_views(fx_tracks):
+    table = records.TrackTable.from_tracks(fx_tracks)
+
+    assert len(table) == 6
+    assert list(table) == fx_tracks
+    assert table[-1] == fx_tracks[-1]
+    assert table.record(2).to_audio() == fx_tracks[2]
+
+
+def test_track_table_dictionary_columns(fx_tracks):
+    table = records.TrackTable.from_tracks(fx_tracks)
+
+    codes, values = table.codes("album")
+    assert values == ["Album 0", "Album 1"]
+    assert codes.tolist() == [0, 1, 0, 1, 0, 1]
+    assert table.where("album", "Album 1").tolist() == [1, 3, 5]
+    assert table.where("album", "Missing").tolist() == []
+    assert {
+        album: rows.tolist() for album, rows in table.group_by("album").items()
+    } == {
+        "Album 0": [0, 2, 4],
+        "Album 1": [1, 3, 5],
+    }
+    with pytest.raises(KeyError):
+        table.codes("title")
+
+
+def test_track_table_resolve_albums(fx_tracks):
+    fx_tracks[2] = replace(fx_tracks[2], album_artist="Someone Else")
+    index = audio.AlbumIndex()
+    for track in fx_tracks:
+        index.add(track)
+
+    table = records.TrackTable.from_tracks(fx_tracks)
+    table.resolve_albums(index)
+
+    assert list(table) == audio.reconcile_albums(fx_tracks)
+    assert table.column("album_artist") == ["Various Artists", "Artist"] * 3
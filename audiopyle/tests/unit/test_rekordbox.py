@@ -0,0 +1,141 @@
+"""Test Rekordbox XML export, import and patching"""
+
+import xml.etree.ElementTree as ET
+from dataclasses import replace
+
+import pytest
+
+from audiopyle import audio, rekordbox
+from tests.conftest import make_audio
+
+
+def _track(i: int) -> audio.Audio:
+    filepath = f"/music/Album {i}/{i} - Song & Dance.mp3"
+    return replace(
+        make_audio(filepath, album=f"Album {i}"),
+        _rekordbox_uri=audio.filepath_to_rekordbox_uri(filepath),
+        bit_rate="320000",
+        length="241.5",
+        tags=["dub", "techno"],
+        bpm=120.5 if i % 2 else None,
+    )
+
+
+@pytest.fixture(scope="function")
+def fx_collection(tmp_path):
+    xml_path = tmp_path / "collection.xml"
+    tracks = [_track(i) for i in range(5)]
+    rekordbox.write_collection(iter(tracks), xml_path)
+    return xml_path, tracks
+
+
+def test_write_collection(fx_collection):
+    xml_path, tracks = fx_collection
+    root = ET.parse(xml_path).getroot()
+
+    collection = root.find("COLLECTION")
+    assert collection.get("Entries") == "5"
+    first = collection.find("TRACK")
+    assert first.get("Name") == "Title"
+    assert first.get("BitRate") == "320"
+    assert first.get("TotalTime") == "241"
+    assert first.get("Genre") == "dub, techno"
+    assert first.get("AverageBpm") is None
+    assert collection.findall("TRACK")[1].get("AverageBpm") == "120.50"
+
+
+def test_read_collection(fx_collection):
+    xml_path, tracks = fx_collection
+    entries = list(rekordbox.read_collection(xml_path))
+
+    assert [entry["Location"] for entry in entries] == [
+        track._rekordbox_uri for track in tracks
+    ]
+    assert entries[0]["Album"] == "Album 0"
+
+
+def test_read_collection_skips_playlist_tracks(tmp_path):
+    xml_path = tmp_path / "collection.xml"
+    xml_path.write_text(
+        """<DJ_PLAYLISTS Version="1.0.0">
+        <COLLECTION Entries="1"><TRACK TrackID="1" Location="a"><TEMPO /></TRACK></COLLECTION>
+        <PLAYLISTS><NODE Name="ROOT"><NODE Name="Set"><TRACK Key="1" /></NODE></NODE></PLAYLISTS>
+        </DJ_PLAYLISTS>"""
+    )
+    assert list(rekordbox.read_collection(xml_path)) == [
+        {"TrackID": "1", "Location": "a"}
+    ]
+
+
+def test_patch_collection(fx_collection, monkeypatch):
+    monkeypatch.setattr(rekordbox, "READ_SIZE", 64)
+    xml_path, tracks = fx_collection
+    before = xml_path.read_text().splitlines()
+
+    changed = replace(tracks[2], bpm=128.0, key="Am", title='New "Title"')
+    updates = rekordbox.track_updates([changed, tracks[3]])
+    assert rekordbox.patch_collection(xml_path, updates) == 1
+
+    after = xml_path.read_text().splitlines()
+    assert [i for i, (a, b) in enumerate(zip(before, after)) if a != b] == [6]
+
+    entry = list(rekordbox.read_collection(xml_path))[2]
+    assert entry["TrackID"] == "3"
+    assert entry["Name"] == 'New "Title"'
+    assert (entry["AverageBpm"], entry["Tonality"]) == ("128.00", "Am")
+
+
+def test_patch_collection_quotes(tmp_path):
+    xml_path = tmp_path / "collection.xml"
+    track = replace(_track(0), title='Say "Hello"')
+    rekordbox.write_collection([track], xml_path)
+    assert 'Name="Say &quot;Hello&quot;"' in xml_path.read_text()
+
+    updates = rekordbox.track_updates([replace(track, bpm=128.0)])
+    assert rekordbox.patch_collection(xml_path, updates) == 1
+    entry = next(rekordbox.read_collection(xml_path))
+    assert (entry["Name"], entry["AverageBpm"]) == ('Say "Hello"', "128.00")
+
+
+def test_patch_collection_single_quoted(tmp_path):
+    xml_path = tmp_path / "collection.xml"
+    xml_path.write_text(
+        """<DJ_PLAYLISTS Version="1.0.0">
+        <COLLECTION Entries="1"><TRACK TrackID='1' Name='Say "Hello"' Location='a' /></COLLECTION>
+        </DJ_PLAYLISTS>"""
+    )
+    assert rekordbox.patch_collection(xml_path, {"a": {"Tonality": "Am"}}) == 1
+    assert list(rekordbox.read_collection(xml_path)) == [
+        {"TrackID": "1", "Name": 'Say "Hello"', "Location": "a", "Tonality": "Am"}
+    ]
+
+
+def test_patch_collection_angle_bracket_in_value(tmp_path, monkeypatch):
+    monkeypatch.setattr(rekordbox, "READ_SIZE", 16)
+    xml_path = tmp_path / "collection.xml"
+    xml_path.write_text(
+        """<DJ_PLAYLISTS Version="1.0.0">
+        <COLLECTION Entries="1"><TRACK TrackID="1" Comments="a > b Location='b'" Location="a" /></COLLECTION>
+        </DJ_PLAYLISTS>"""
+    )
+    assert rekordbox.patch_collection(xml_path, {"a": {"Tonality": "Am"}}) == 1
+    assert list(rekordbox.read_collection(xml_path)) == [
+        {
+            "TrackID": "1",
+            "Comments": "a > b Location='b'",
+            "Location": "a",
+            "Tonality": "Am",
+        }
+    ]
+
+
+def test_write_collection_drops_control_characters(tmp_path):
+    xml_path = tmp_path / "collection.xml"
+    track = replace(_track(0), title="Foo\x00\x1bBar\tBaz")
+    rekordbox.write_collection([track], xml_path)
+
+    updates = rekordbox.track_updates([replace(track, comment="\x07Comment")])
+    assert rekordbox.patch_collection(xml_path, updates) == 1
+    entry = next(rekordbox.read_collection(xml_path))
+    assert (entry["Name"], entry["Comments"]) == ("FooBar\tBaz", "Comment")
+    assert rekordbox.patch_collection(xml_path, updates) == 0
@@ -0,0 +1,93 @@
+"""Test the similar-track search index"""
+
+import numpy as np
+import pytest
+
+from audiopyle import featurestore, similarity
+
+
+@pytest.fixture(scope="module")
+def fx_library():
+    """Vectors in 20 tight clusters with features of very different scales."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 16)) * np.geomspace(1, 1000, 16)
+    labels = np.repeat(np.arange(20), 50)
+    vectors = centers[labels] + rng.standard_normal((1000, 16)) * np.geomspace(
+        0.01, 10, 16
+    )
+    paths = [f"/music/{i}.mp3" for i in range(1000)]
+    return vectors.astype(np.float32), paths, labels
+
+
+def test_search_finds_itself(fx_library):
+    vectors, paths, _ = fx_library
+    index = similarity.SimilarityIndex(vectors, paths)
+    indices, scores = index.search(vectors[:5], k=3)
+
+    assert indices.shape == scores.shape == (5, 3)
+    np.testing.assert_array_equal(indices[:, 0], np.arange(5))
+    np.testing.assert_allclose(scores[:, 0], 1, rtol=1e-5)
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_search_pads_small_index(fx_library):
+    vectors, paths, _ = fx_library
+    index = similarity.SimilarityIndex(vectors[:2], paths[:2])
+    indices, scores = index.search(vectors[:1], k=4)
+    assert indices[0].tolist()[2:] == [-1, -1]
+    assert np.isneginf(scores[0, 2:]).all()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"n_components": 8}, {"n_lists": 20}, {"n_components": 8, "n_lists": 20}],
+    ids=["exact", "pca", "ivf", "pca_ivf"],
+)
+def test_similar_stays_in_cluster(fx_library, kwargs):
+    vectors, paths, labels = fx_library
+    index = similarity.SimilarityIndex(vectors, paths, **kwargs)
+    matches = index.similar(paths[0], k=10, n_probe=3)
+
+    assert len(matches) == 10
+    assert paths[0] not in [match.path for match in matches]
+    assert all(labels[paths.index(match.path)] == labels[0] for match in matches)
+
+
+def test_ivf_recall(fx_library):
+    vectors, paths, _ = fx_library
+    exact = similarity.SimilarityIndex(vectors, paths)
+    approximate = similarity.SimilarityIndex(vectors, paths, n_lists=30)
+
+    expected, _ = exact.search(vectors[::10], k=10)
+    found, _ = approximate.search(vectors[::10], k=10, n_probe=4)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(expected, found)])
+    assert recall > 0.9
+
+
+def test_similar_unknown_path(fx_library):
+    vectors, paths, _ = fx_library
+    with pytest.raises(KeyError):
+        similarity.SimilarityIndex(vectors, paths).similar("/music/missing.mp3")
+
+
+def test_save_and_load(tmp_path, fx_library):
+    vectors, paths, _ = fx_library
+    index = similarity.SimilarityIndex(vectors, paths, n_components=8, n_lists=20)
+    index.save(tmp_path / "index.npz")
+    loaded = similarity.SimilarityIndex.load(tmp_path / "index.npz")
+
+    assert loaded.paths == paths
+    for a, b in zip(index.search(vectors[:5]), loaded.search(vectors[:5])):
+        np.testing.assert_array_equal(a, b)
+    assert loaded.similar(paths[7], k=5) == index.similar(paths[7], k=5)
+
+
+def test_from_store(tmp_path, fx_library):
+    vectors, paths, _ = fx_library
+    with featurestore.FeatureStore(tmp_path / "store") as store:
+        store.put_many(
+            (path, None, "digest", vector, None) for path, vector in zip(paths, vectors)
+        )
+        index = similarity.SimilarityIndex.from_store(store)
+    assert len(index) == len(paths)
+    assert index.similar(paths[0], k=1)[0].score > 0.9
@@ -0,0 +1,85 @@
+"""Test NDJSON library snapshots"""
+
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from audiopyle import management, records, snapshot
+from audiopyle.exceptions import SnapshotError
+from tests.conftest import make_tracks
+
+
+@pytest.fixture(scope="function")
+def fx_tracks():
+    return make_tracks(5, tags=["dub", "ñ"])
+
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".ndjson.gz"], ids=["plain", "gzip"])
+def test_roundtrip(tmp_path, fx_tracks, suffix):
+    path = tmp_path / f"library{suffix}"
+    assert snapshot.export_snapshot(iter(fx_tracks), path) == 5
+    assert list(snapshot.import_snapshot(path)) == fx_tracks
+
+
+def test_roundtrip_table(tmp_path, fx_tracks):
+    path = tmp_path / "library.ndjson"
+    snapshot.export_snapshot(records.TrackTable.from_tracks(fx_tracks), path)
+    assert list(snapshot.import_snapshot(path)) == fx_tracks
+
+
+def test_export_moved_path(tmp_path, fx_tracks):
+    moved = replace(fx_tracks[0], _filepath=Path("/music/moved.mp3"))
+    path = tmp_path / "library.ndjson"
+    snapshot.export_snapshot([moved], path)
+    assert next(snapshot.import_snapshot(path))._filepath == "/music/moved.mp3"
+    assert json.loads(moved.json)["_filepath"] == "/music/moved.mp3"
+
+
+def test_import_older_snapshot(tmp_path, fx_tracks):
+    path = tmp_path / "library.ndjson"
+    snapshot.export_snapshot(fx_tracks[:1], path)
+    header, row = path.read_text().splitlines()
+    fields = json.loads(header)["fields"]
+    values = json.loads(row)
+    path.write_text(
+        json.dumps(
+            {"format": "audiopyle-snapshot", "version": 1, "fields": fields[:-2]}
+        )
+        + "\n"
+        + json.dumps(values[:-2])
+        + "\n"
+    )
+    assert next(snapshot.import_snapshot(path)) == replace(fx_tracks[0], bpm=None)
+
+
+def test_import_not_a_snapshot(tmp_path):
+    path = tmp_path / "library.ndjson"
+    path.write_text("not json\n")
+    with pytest.raises(SnapshotError):
+        list(snapshot.import_snapshot(path))
+
+
+def test_diff_snapshots(tmp_path, fx_tracks):
+    old, new = tmp_path / "old.ndjson", tmp_path / "new.ndjson"
+    snapshot.export_snapshot(fx_tracks[:4], old)
+    changed = replace(fx_tracks[1], title="Retitled")
+    snapshot.export_snapshot([fx_tracks[0], changed, fx_tracks[3], fx_tracks[4]], new)
+
+    result = snapshot.diff_snapshots(old, new)
+    assert result.added == ["/music/4.mp3"]
+    assert result.removed == ["/music/2.mp3"]
+    assert result.changed == {"/music/1.mp3": {"title": ("Title", "Retitled")}}
+    assert not snapshot.diff_snapshots(old, old)
+
+
+def test_directory_snapshot(tmp_path, fx_mp3_factory):
+    for i in range(3):
+        fx_mp3_factory(f"music/{i}.mp3", tags={"TIT2": f"Track {i}"})
+    directory = management.Directory._from_filepath(tmp_path / "music")
+
+    assert directory.snapshot(tmp_path / "library.ndjson") == 3
+    assert (
+        list(snapshot.import_snapshot(tmp_path / "library.ndjson")) == directory.files
+    )
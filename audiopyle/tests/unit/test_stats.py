@@ -0,0 +1,61 @@
+"""Test collecting directory statistics"""
+
+import os
+
+import pytest
+
+from audiopyle import stats
+from tests.conftest import write_files
+
+
+@pytest.fixture(scope="function")
+def fx_tree(tmp_path):
+    """Creates files of known sizes across nested directories."""
+    sizes = {
+        "a.mp3": 1,
+        "b.MP3": 2,
+        "notes": 3,
+        "x/c.mp3": 4,
+        "x/y/z/d.jpg": 5,
+        "w/e.mp3": 6,
+    }
+    write_files(
+        tmp_path,
+        {relative_path: b"\x00" * size for relative_path, size in sizes.items()},
+    )
+    (tmp_path / "empty").mkdir()
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 4], ids=["serial", "parallel"])
+def test_collect_stats(fx_tree, workers):
+    result = stats.collect_stats(fx_tree, workers=workers, keep_paths=True)
+    assert result.files == 6
+    assert result.directories == 5
+    assert result.bytes == 21
+    assert result.extensions == {".mp3": 4, ".jpg": 1, "": 1}
+    assert result.deepest_path == str(fx_tree / "x" / "y" / "z" / "d.jpg")
+    assert result.depth == 3
+    assert sorted(result.paths) == sorted(
+        entry.path for entry in os.scandir(fx_tree) if entry.is_file()
+    ) + sorted(
+        [
+            str(fx_tree / "w" / "e.mp3"),
+            str(fx_tree / "x" / "c.mp3"),
+            str(fx_tree / "x" / "y" / "z" / "d.jpg"),
+        ]
+    )
+
+
+def test_collect_stats_without_paths(fx_tree):
+    assert stats.collect_stats(fx_tree).paths is None
+
+
+def test_collect_stats_empty(tmp_path):
+    result = stats.collect_stats(tmp_path, workers=2)
+    assert (result.files, result.bytes, result.deepest_path) == (0, 0, None)
+
+
+def test_collect_stats_raises_FileNotFound(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        stats.collect_stats(tmp_path / "missing")
@@ -0,0 +1,28 @@
+"""Test cross-platform timestamp handling"""
+
+import os
+
+from audiopyle import timestamps
+
+
+def test_get_times(tmp_path):
+    path = tmp_path / "foo.txt"
+    path.write_text("test")
+    os.utime(path, ns=(1_000_000_123, 2_000_000_456))
+
+    times = timestamps.get_times(path)
+    assert (times.accessed_ns, times.modified_ns) == (1_000_000_123, 2_000_000_456)
+
+
+def test_apply_times(tmp_path):
+    paths = [tmp_path / "foo.txt", tmp_path / "bar.txt"]
+    for path in paths:
+        path.write_text("test")
+    times = timestamps.FileTimes(accessed_ns=1_000_000_001, modified_ns=3_000_000_007)
+
+    failed = timestamps.apply_times(
+        [(path, times) for path in paths] + [(tmp_path / "baz.txt", times)]
+    )
+
+    assert failed == [tmp_path / "baz.txt"]
+    assert all(os.stat(path).st_mtime_ns == 3_000_000_007 for path in paths)
@@ -0,0 +1,129 @@
+"""Test watching a directory and ingesting new files"""
+
+import os
+import threading
+
+import pytest
+
+from audiopyle import audio, watch
+
+
+def _backends():
+    backends = [pytest.param(False, id="polling")]
+    try:
+        watch._InotifySource(os.getcwd()).close()
+    except (OSError, AttributeError):
+        return backends
+    return backends + [pytest.param(True, id="inotify")]
+
+
+@pytest.fixture(scope="function", params=_backends())
+def fx_watcher(request, tmp_path):
+    """Watches an empty downloads directory with each available backend."""
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    with watch.Watcher(
+        downloads,
+        settle_seconds=0.2,
+        use_inotify=request.param,
+        poll_interval=0.05,
+    ) as watcher:
+        yield watcher
+
+
+def test_watcher_reports_new_file(fx_watcher):
+    path = fx_watcher.directory / "album" / "track.mp3"
+    path.parent.mkdir()
+    path.write_bytes(b"data")
+    assert fx_watcher.poll(timeout=3) == [str(path)]
+    assert fx_watcher.poll(timeout=0.3) == []
+
+
+def test_watcher_waits_for_file_to_settle(fx_watcher):
+    path = fx_watcher.directory / "track.mp3"
+    with open(path, "wb") as fh:
+        for _ in range(4):
+            fh.write(b"data")
+            fh.flush()
+            assert fx_watcher.poll(timeout=0.1) == []
+    assert fx_watcher.poll(timeout=3) == [str(path)]
+
+
+def test_watcher_filters(fx_watcher):
+    (fx_watcher.directory / "cover.jpg").write_bytes(b"image")
+    (fx_watcher.directory / ".track.mp3").write_bytes(b"partial")
+    assert fx_watcher.poll(timeout=0.5) == []
+
+
+def test_watcher_ignore(fx_watcher):
+    path = fx_watcher.directory / "track.mp3"
+    path.write_bytes(b"data")
+    fx_watcher.ignore(path)
+    assert fx_watcher.poll(timeout=0.5) == []
+
+
+def test_watcher_stop(fx_watcher):
+    path = fx_watcher.directory / "track.mp3"
+    path.write_bytes(b"data")
+    reported = []
+    thread = threading.Thread(target=lambda: reported.extend(fx_watcher))
+    thread.start()
+    while not reported and thread.is_alive():
+        threading.Event().wait(0.05)
+    fx_watcher.stop()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert reported == [str(path)]
+
+
+def test_ingestor(tmp_path, fx_mp3_factory):
+    first = fx_mp3_factory("downloads/1.mp3", tags={"TALB": "Foo", "TPE1": "A"})
+    second = fx_mp3_factory("downloads/2.mp3", tags={"TALB": "Foo", "TPE1": "B"})
+    ingestor = watch.Ingestor(tmp_path / "library", "{album}")
+
+    result = ingestor.ingest(first)
+    assert [move.target for move in result.moved] == [tmp_path / "library/Foo/1.mp3"]
+    ingestor.ingest(second)
+    assert (tmp_path / "library/Foo/2.mp3").exists()
+    assert ingestor.index.albums["Foo"]["artist"] == "Various Artists"
+
+
+def test_watch(tmp_path, fx_mp3_factory):
+    (tmp_path / "downloads").mkdir()
+    # An album already in the library, which the arriving track joins
+    index = audio.AlbumIndex()
+    index.add(
+        audio.Audio._from_filepath(
+            fx_mp3_factory("library/Foo/0.mp3", tags={"TALB": "Foo", "TPE1": "A"})
+        )
+    )
+    stop = threading.Event()
+    ingested = []
+
+    def on_ingest(filepath, result):
+        ingested.append(filepath)
+        stop.set()
+
+    thread = threading.Thread(
+        target=watch.watch,
+        args=(tmp_path / "downloads", tmp_path / "library", "{album}"),
+        kwargs={
+            "settle_seconds": 0.1,
+            "stop": stop,
+            "on_ingest": on_ingest,
+            "index": index,
+            "poll_interval": 0.05,
+        },
+    )
+    thread.start()
+    try:
+        # Give the watcher time to take its first listing
+        threading.Event().wait(0.3)
+        fx_mp3_factory("downloads/1.mp3", tags={"TALB": "Foo", "TPE1": "B"})
+        thread.join(timeout=5)
+    finally:
+        stop.set()
+        thread.join()
+    assert ingested == [str(tmp_path / "downloads/1.mp3")]
+    assert (tmp_path / "library/Foo/1.mp3").exists()
+    assert index.albums["Foo"]["artist"] == "Various Artists"